@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Ingest many brokerage statements (CSV and PDF) in one run.
+
+Inputs may be files, directories or glob patterns. Each statement is parsed in
+a worker process with parse_csv_portfolio / extract_pdf_portfolio, and the
+normalized holdings are merged into one consolidated holdings file that
+calculate_portfolio_metrics.py accepts directly.
+
+The same account usually appears in several monthly statements. Each
+account's holdings are taken from its latest statement date only, through a
+hash index keyed by account, so positions sold before that statement drop out.
+Every file with that date is merged and lots of the same symbol are all kept;
+a file that repeats another file's holdings for the account exactly (the same
+statement ingested twice) is counted once and reported.
+"""
+
+import os
+import re
+import csv
+import sys
+import glob
+import json
+import argparse
+from datetime import date, datetime
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from parse_csv_portfolio import PROFILE_REGISTRY_PATH, ProfileRegistry, parse_csv_file
+from extract_pdf_portfolio import PAGE_CACHE_DIR, PageCache, extract_pdf_file
+
+
+SUPPORTED_SUFFIXES = ('.csv', '.pdf')
+
+GLOB_CHARS = ('*', '?', '[')
+
+# Statement dates as printed by brokers, tried in order
+DATE_FORMATS = ('%m/%d/%Y', '%m/%d/%y', '%Y-%m-%d', '%m-%d-%Y', '%m-%d-%y', '%Y/%m/%d',
+                '%B %d, %Y', '%b %d, %Y')
+
+# Dates embedded in file names: 2025-01-31, 2025_01_31, 20250131, 2025-01
+FILENAME_DATE = re.compile(r'(?<!\d)(\d{4})[-_]?(\d{2})(?:[-_]?(\d{2}))?(?!\d)')
+
+# Per-worker profile registry and PDF page cache (set up once by _init_worker)
+_REGISTRY = None
+_PAGE_CACHE = None
+
+
+def _init_worker(registry_path, page_cache_dir):
+    global _REGISTRY, _PAGE_CACHE
+    _REGISTRY = ProfileRegistry(registry_path) if registry_path else None
+    _PAGE_CACHE = PageCache(page_cache_dir) if page_cache_dir else None
+
+
+def expand_inputs(inputs, recursive=False):
+    """Resolve files, directories and glob patterns into an ordered, de-duplicated path list."""
+    paths = []
+    seen = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            pattern = '**/*' if recursive else '*'
+            candidates = sorted(str(p) for p in Path(item).glob(pattern) if p.is_file())
+        elif any(char in item for char in GLOB_CHARS):
+            candidates = sorted(glob.glob(item, recursive=True))
+        else:
+            candidates = [item]
+
+        for path in candidates:
+            if Path(path).suffix.lower() not in SUPPORTED_SUFFIXES:
+                if not os.path.isdir(item):
+                    print(f"Warning: skipping unsupported file {path}", file=sys.stderr)
+                continue
+            key = os.path.abspath(path)
+            if key not in seen:
+                seen.add(key)
+                paths.append(path)
+    return paths
+
+
+def parse_statement_date(text):
+    """Parse a printed statement date; returns an ISO date string or None."""
+    if not text:
+        return None
+    text = text.strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def date_from_filename(path):
+    """Find a YYYY-MM[-DD] date in the file name (month-only dates map to the 1st)."""
+    for match in FILENAME_DATE.finditer(Path(path).stem):
+        year, month, day = match.groups()
+        try:
+            return date(int(year), int(month), int(day or 1)).isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def statement_account_label(path):
+    """Fallback account label: the file stem with any embedded date removed."""
+    stem = FILENAME_DATE.sub('', Path(path).stem)
+    return re.sub(r'[-_\s]+', '_', stem).strip('_') or Path(path).stem
+
+
+def resolve_statement_date(path, account_info=None):
+    """
+    Statement date from the document itself, else the file name, else the
+    file's modification time. Returns (iso_date, source).
+    """
+    account_info = account_info or {}
+    printed = parse_statement_date(account_info.get('statement_date'))
+    if printed is None and account_info.get('statement_period'):
+        # Use the closing date of "01/01/2025 to 01/31/2025"
+        parts = re.split(r'\s*(?:to|through|-)\s+', account_info['statement_period'])
+        printed = parse_statement_date(parts[-1])
+    if printed:
+        return printed, 'statement'
+
+    from_name = date_from_filename(path)
+    if from_name:
+        return from_name, 'filename'
+
+    return date.fromtimestamp(os.path.getmtime(path)).isoformat(), 'mtime'
+
+
+def _extract_pdf(path):
+    """
+    extract_pdf_file with parser failures as ValueError: pdfplumber/pdfminer
+    raise their own Exception subclasses on corrupt or encrypted PDFs.
+    """
+    try:
+        return extract_pdf_file(path, cache=_PAGE_CACHE)
+    except (OSError, ValueError, ImportError):
+        raise
+    except Exception as e:
+        raise ValueError(f"Could not parse PDF ({type(e).__name__}): {e}") from e
+
+
+def ingest_file(path):
+    """Parse one statement in a worker process. Errors are returned, not raised."""
+    source = {'file': path, 'kind': Path(path).suffix.lower().lstrip('.')}
+    learned = {}
+    try:
+        if source['kind'] == 'pdf':
+            parsed = _extract_pdf(path)
+            account_info = parsed['account_info']
+        else:
+            parsed = parse_csv_file(path, _REGISTRY)
+            account_info = {}
+            if _REGISTRY is not None:
+                learned = _REGISTRY.take_new()
+            source['format_type'] = parsed['format_type']
+    except (OSError, ValueError, ImportError, csv.Error) as e:
+        source['error'] = str(e)
+        return source, [], learned
+
+    statement_date, date_source = resolve_statement_date(path, account_info)
+    default_account = account_info.get('account_number') or statement_account_label(path)
+    source['statement_date'] = statement_date
+    source['statement_date_source'] = date_source
+
+    holdings = []
+    for holding in parsed['holdings']:
+        holding = dict(holding)
+        if not holding.get('account'):
+            holding['account'] = default_account
+        holding['statement_date'] = statement_date
+        holding['source_file'] = path
+        holdings.append(holding)
+    source['holdings'] = len(holdings)
+    return source, holdings, learned
+
+
+def account_key(holding):
+    """Hash-index key for a holding's account."""
+    return str(holding.get('account', '')).strip()
+
+
+def _numeric(value):
+    # PDF cells that fail numeric cleaning are kept as strings
+    return value if isinstance(value, (int, float)) else 0
+
+
+def _statement_fingerprint(holdings):
+    """Order-independent content of one file's holdings for an account, ignoring the file name."""
+    return tuple(sorted(json.dumps({k: v for k, v in h.items() if k != 'source_file'},
+                                   sort_keys=True, default=str) for h in holdings))
+
+
+def merge_holdings(results):
+    """
+    Collapse holdings across statements, keeping for each account only the
+    holdings of its latest statement date, so a position missing from that
+    statement is treated as sold. All files with that date are merged (two
+    statements for the same account and day, or account-less files sharing a
+    fallback label). A file whose holdings for the account repeat an earlier
+    file's exactly is a duplicate: it is counted once and reported, with files
+    taken in path order so the output does not depend on worker scheduling.
+    Returns (holdings, collapsed_count, duplicates).
+    """
+    index = {}
+    collapsed = 0
+    for holding in results:
+        key = account_key(holding)
+        statement_date = holding['statement_date']
+        entry = index.get(key)
+        if entry is None or statement_date > entry[0]:
+            if entry is not None:
+                collapsed += sum(len(lots) for lots in entry[1].values())
+            entry = index[key] = [statement_date, {}]
+        elif statement_date < entry[0]:
+            collapsed += 1
+            continue
+        entry[1].setdefault(holding['source_file'], []).append(holding)
+
+    holdings = []
+    duplicates = []
+    for key, (statement_date, files) in index.items():
+        seen = {}
+        for source_file in sorted(files):
+            fingerprint = _statement_fingerprint(files[source_file])
+            if fingerprint in seen:
+                duplicates.append({'account': key, 'statement_date': statement_date,
+                                   'file': source_file, 'duplicate_of': seen[fingerprint]})
+                continue
+            seen[fingerprint] = source_file
+            holdings.extend(files[source_file])
+    holdings.sort(key=lambda h: (h['account'], -_numeric(h.get('value'))))
+    return holdings, collapsed, duplicates
+
+
+def batch_ingest(paths, workers=None, registry=None, page_cache_dir=None):
+    """Parse statements across a process pool and merge their holdings."""
+    registry_path = str(registry.path) if registry is not None else None
+    sources = []
+    all_holdings = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(registry_path, page_cache_dir)) as pool:
+        for source, holdings, learned in pool.map(ingest_file, paths):
+            sources.append(source)
+            all_holdings.extend(holdings)
+            if registry is not None and learned:
+                registry.merge(learned)
+
+    holdings, collapsed, duplicates = merge_holdings(all_holdings)
+    return {
+        'holdings': holdings,
+        'total_holdings': len(holdings),
+        'duplicates_collapsed': collapsed,
+        'duplicate_statements': duplicates,
+        'sources': sources,
+        'total_sources': len(sources),
+        'failed_sources': sum(1 for s in sources if 'error' in s),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Parse many CSV/PDF statements in parallel into one consolidated holdings file.'
+    )
+    parser.add_argument('inputs', nargs='+', help='Statement files, directories or glob patterns')
+    parser.add_argument('--output', '-o', help='Write consolidated JSON here (default stdout)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes (default: CPU count)')
+    parser.add_argument('--recursive', action='store_true',
+                        help='Descend into subdirectories of directory inputs')
+    parser.add_argument('--profile-registry', default=str(PROFILE_REGISTRY_PATH),
+                        help=f'Broker profile registry file (default {PROFILE_REGISTRY_PATH})')
+    parser.add_argument('--no-profile-cache', action='store_true',
+                        help='Always run alias detection; do not read or update the registry')
+    parser.add_argument('--learn-profiles', action='store_true',
+                        help='Save header layouts found by alias detection to the registry')
+    parser.add_argument('--pdf-cache-dir', default=str(PAGE_CACHE_DIR),
+                        help=f'Extracted PDF page cache directory (default {PAGE_CACHE_DIR})')
+    parser.add_argument('--no-pdf-cache', action='store_true',
+                        help='Always parse PDFs; do not read or write the page cache')
+    args = parser.parse_args()
+
+    paths = expand_inputs(args.inputs, args.recursive)
+    if not paths:
+        print("Error: No CSV or PDF statements found", file=sys.stderr)
+        sys.exit(1)
+
+    registry = None if args.no_profile_cache else ProfileRegistry(args.profile_registry,
+                                                                  args.learn_profiles)
+    page_cache_dir = None if args.no_pdf_cache else args.pdf_cache_dir
+    result = batch_ingest(paths, args.workers, registry, page_cache_dir)
+    if registry is not None:
+        registry.save()
+
+    for source in result['sources']:
+        if 'error' in source:
+            print(f"Warning: {source['file']}: {source['error']}", file=sys.stderr)
+    for duplicate in result['duplicate_statements']:
+        print(f"Warning: {duplicate['file']} repeats {duplicate['duplicate_of']} for account "
+              f"{duplicate['account']} on {duplicate['statement_date']}; counted once",
+              file=sys.stderr)
+    print(f"Ingested {result['total_sources'] - result['failed_sources']}/{result['total_sources']} "
+          f"statements: {result['total_holdings']} holdings "
+          f"({result['duplicates_collapsed']} older snapshots collapsed)", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+    else:
+        print(json.dumps(result, indent=2))
+
+    if result['failed_sources'] == result['total_sources']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
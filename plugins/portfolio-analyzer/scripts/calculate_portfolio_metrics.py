@@ -2,12 +2,38 @@
 """
 Calculate portfolio metrics and performance indicators.
 Takes normalized portfolio data and computes key analytics.
+
+When NumPy is installed, holdings are loaded into value / cost basis /
+gain-loss arrays once and the totals, allocation percentages and
+concentration figures are computed column-wise, which keeps aggregated books
+of hundreds of thousands of positions fast. Without NumPy the original
+per-holding loop is used; both produce the same JSON schema.
 """
 
 import sys
 import json
+import argparse
 from collections import defaultdict
 
+try:
+    import numpy as np
+except ImportError:  # falls back to the per-holding loop
+    np = None
+
+from xirr import money_weighted_returns
+from risk_metrics import analyze_panel_risk, volatility_concerns
+from lookthrough import WEIGHT_UNITS, analyze_lookthrough, lookthrough_concerns
+
+
+NAN = float('nan')
+
+# Concentration thresholds (allocation percent) counted in the output
+CONCENTRATION_THRESHOLDS = (5, 10)
+
+# Group-by levels built by HoldingsRollup, in the order of _group_labels
+GROUP_LEVELS = ('symbol', 'account', 'asset_class')
+ROLLUP_LEVELS = ('position',) + GROUP_LEVELS
+
 
 def calculate_portfolio_metrics(holdings):
     """
@@ -25,6 +51,129 @@ def calculate_portfolio_metrics(holdings):
             'error': 'No holdings data provided'
         }
     
+    if np is not None:
+        return calculate_metrics_columnar(holdings)
+    return calculate_metrics_rows(holdings)
+
+
+def _as_float(value):
+    # Non-numeric cells (e.g. uncleaned PDF text) are treated as missing
+    if isinstance(value, (int, float)):
+        return float(value)
+    return NAN
+
+
+def holdings_columns(holdings):
+    """Load value, cost_basis and gain_loss into float arrays (NaN where missing)."""
+    n = len(holdings)
+    columns = {}
+    for field in ('value', 'cost_basis', 'gain_loss'):
+        cells = [h.get(field) for h in holdings]
+        try:
+            # None converts to NaN; anything else must already be a number
+            if str in set(map(type, cells)):
+                raise ValueError(field)
+            columns[field] = np.array(cells, dtype=float)
+        except (TypeError, ValueError):
+            columns[field] = np.fromiter((_as_float(cell) for cell in cells), dtype=float, count=n)
+    return columns
+
+
+def top_n_sum(allocation_pcts, n):
+    """Sum of the n largest allocation percentages without sorting the whole array."""
+    if len(allocation_pcts) > n:
+        allocation_pcts = allocation_pcts[np.argpartition(-allocation_pcts, n - 1)[:n]]
+    # Add largest first, matching a sum over the head of the sorted allocation list
+    return sum(sorted(allocation_pcts.tolist(), reverse=True))
+
+
+def running_total(column):
+    """
+    Left-to-right sum of a column with NaN as zero. np.sum adds pairwise,
+    which can differ from the per-holding loop in the last bit and shift a
+    rounded total by 0.01; cumsum adds in order, exactly like the loop.
+    """
+    if not len(column):
+        return 0.0
+    return float(np.cumsum(np.nan_to_num(column, nan=0.0))[-1])
+
+
+def round_pcts(pcts):
+    """
+    Round to 2 decimals exactly as Python round() does. np.round scales by
+    100 first, which can land on the other side of a .005 tie, so values
+    within rounding error of a tie are redone with round().
+    """
+    rounded = np.round(pcts, 2)
+    scaled = pcts * 100
+    near_tie = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-9 * np.maximum(1, scaled))
+    for i in near_tie.tolist():
+        rounded[i] = round(float(pcts[i]), 2)
+    return rounded
+
+
+def calculate_metrics_columnar(holdings):
+    """NumPy implementation of calculate_portfolio_metrics (same output schema)."""
+    columns = holdings_columns(holdings)
+    valid_idx = np.flatnonzero(columns['value'] > 0)  # NaN compares False
+    values = columns['value'][valid_idx]
+    
+    total_value = running_total(values)
+    total_cost_basis = running_total(columns['cost_basis'][valid_idx])
+    total_gain_loss = running_total(columns['gain_loss'][valid_idx])
+    
+    if total_value > 0:
+        allocation_pcts = round_pcts(values / total_value * 100)
+    else:
+        allocation_pcts = np.zeros(len(values))
+    pcts = allocation_pcts.tolist()
+    
+    # Stable descending order, so equal percentages keep input order
+    order = np.argsort(-allocation_pcts, kind='stable').tolist()
+    valid_idx = valid_idx.tolist()
+    allocation = []
+    for pos in order:
+        holding = holdings[valid_idx[pos]]
+        allocation.append({
+            'symbol': holding.get('symbol', 'Unknown'),
+            'description': holding.get('description', ''),
+            'value': holding.get('value', 0),
+            'allocation_pct': pcts[pos]
+        })
+    
+    metrics = {
+        'total_value': round(total_value, 2),
+        'total_cost_basis': round(total_cost_basis, 2),
+        'total_gain_loss': round(total_gain_loss, 2),
+        'total_positions': len(holdings),
+        'allocation': allocation,
+        'concentration': {},
+        'performance': {}
+    }
+    
+    if allocation:
+        metrics['concentration'] = {
+            'top_position_pct': pcts[order[0]],
+            'top_5_pct': round(top_n_sum(allocation_pcts, 5), 2),
+            'top_10_pct': round(top_n_sum(allocation_pcts, 10), 2),
+        }
+        for threshold in CONCENTRATION_THRESHOLDS:
+            metrics['concentration'][f'positions_over_{threshold}pct'] = \
+                int(np.count_nonzero(allocation_pcts > threshold))
+    
+    if total_cost_basis > 0:
+        metrics['performance'] = {
+            'total_return': round(total_gain_loss, 2),
+            'total_return_pct': round((total_gain_loss / total_cost_basis) * 100, 2),
+            'average_cost_basis': round(total_cost_basis / len(valid_idx), 2),
+            'average_holding_value': round(total_value / len(valid_idx), 2)
+        }
+    
+    return metrics
+
+
+def calculate_metrics_rows(holdings):
+    """Pure-Python implementation of calculate_portfolio_metrics."""
     metrics = {
         'total_value': 0,
         'total_cost_basis': 0,
@@ -78,9 +227,10 @@ def calculate_portfolio_metrics(holdings):
             'top_position_pct': metrics['allocation'][0]['allocation_pct'],
             'top_5_pct': round(top_5_concentration, 2),
             'top_10_pct': round(top_10_concentration, 2),
-            'positions_over_5pct': sum(1 for h in metrics['allocation'] if h['allocation_pct'] > 5),
-            'positions_over_10pct': sum(1 for h in metrics['allocation'] if h['allocation_pct'] > 10)
         }
+        for threshold in CONCENTRATION_THRESHOLDS:
+            metrics['concentration'][f'positions_over_{threshold}pct'] = \
+                sum(1 for h in metrics['allocation'] if h['allocation_pct'] > threshold)
     
     # Performance metrics
     if metrics['total_cost_basis'] > 0:
@@ -99,6 +249,82 @@ def calculate_portfolio_metrics(holdings):
     return metrics
 
 
+def _group_labels(holding):
+    """Rollup keys for one holding: (symbol, account, asset_class)."""
+    symbol = holding.get('symbol') or holding.get('description') or 'Unknown'
+    return (
+        str(symbol).strip().upper(),
+        str(holding.get('account') or 'Unassigned'),
+        str(holding.get('asset_class') or 'Unknown'),
+    )
+
+
+def _add_number(group, field, value):
+    if isinstance(value, (int, float)):
+        group[field] = (group.get(field) or 0) + value
+
+
+class HoldingsRollup:
+    """
+    Holdings aggregated by symbol, account and asset class.
+
+    All three group-bys are built together in one pass over the raw rows the
+    first time any of them is needed; the grouped holdings and the metrics
+    computed for each level are cached, so switching between views never goes
+    back to the raw rows. Grouped holdings use the same fields as positions
+    ('symbol' carries the group label) so calculate_portfolio_metrics applies
+    unchanged.
+    """
+
+    def __init__(self, holdings):
+        self.holdings = holdings
+        self._groups = None
+        self._metrics = {}
+
+    def _aggregate(self):
+        groups = {level: {} for level in GROUP_LEVELS}
+        for holding in self.holdings:
+            for level, label in zip(GROUP_LEVELS, _group_labels(holding)):
+                group = groups[level].get(label)
+                if group is None:
+                    group = groups[level][label] = {
+                        'symbol': label,
+                        'description': '',
+                        'rollup': level,
+                        'positions': 0,
+                        'accounts': set(),
+                    }
+                group['positions'] += 1
+                group['accounts'].add(str(holding.get('account') or 'Unassigned'))
+                for field in ('value', 'cost_basis', 'gain_loss'):
+                    _add_number(group, field, holding.get(field))
+                if level == 'symbol':
+                    _add_number(group, 'quantity', holding.get('quantity'))
+                    if not group['description'] and holding.get('description'):
+                        group['description'] = holding['description']
+        
+        for level_groups in groups.values():
+            for group in level_groups.values():
+                group['accounts'] = sorted(group['accounts'])
+        return {level: list(level_groups.values()) for level, level_groups in groups.items()}
+
+    def holdings_at(self, level):
+        """Holdings at a rollup level ('position' returns the raw rows)."""
+        if level == 'position':
+            return self.holdings
+        if level not in GROUP_LEVELS:
+            raise ValueError(f"Unknown rollup level '{level}' (expected one of {', '.join(ROLLUP_LEVELS)})")
+        if self._groups is None:
+            self._groups = self._aggregate()
+        return self._groups[level]
+
+    def metrics(self, level='position'):
+        """calculate_portfolio_metrics at a rollup level, computed once per level."""
+        if level not in self._metrics:
+            self._metrics[level] = calculate_portfolio_metrics(self.holdings_at(level))
+        return self._metrics[level]
+
+
 def analyze_sector_allocation(holdings):
     """
     Analyze allocation by sector/asset class if available.
@@ -164,17 +390,42 @@ def identify_risk_factors(metrics):
             'message': f"Portfolio has {total_positions} positions (may be difficult to monitor effectively)"
         })
     
+    # Covariance-based checks when a risk section is present
+    if metrics.get('risk'):
+        concerns.extend(volatility_concerns(metrics['risk']))
+    
+    # Concentration hidden inside ETFs and funds
+    if metrics.get('lookthrough'):
+        concerns.extend(lookthrough_concerns(metrics['lookthrough']))
+    
     return concerns
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python calculate_portfolio_metrics.py <holdings_json>")
-        print("\nCalculates metrics from normalized holdings JSON.")
-        print("Input JSON should have format: {'holdings': [...]}")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(
+        description='Calculates metrics from normalized holdings JSON '
+                    '(input format: {"holdings": [...]}).'
+    )
+    parser.add_argument('holdings_json', help='Holdings JSON file')
+    parser.add_argument('--rollup', choices=ROLLUP_LEVELS + ('all',), default='position',
+                        help='Aggregate holdings by symbol, account or asset class before computing '
+                             'metrics (default: position, one row per holding). "all" adds a '
+                             '"rollups" section with metrics for every level.')
+    parser.add_argument('--flows', help='Transaction CSV/JSON of external cash flows; adds '
+                                        'money-weighted returns (XIRR) per account')
+    parser.add_argument('--as-of', help='Valuation date for --flows (default: the holdings '
+                                        'as_of_date, else today)')
+    parser.add_argument('--risk-panel', help='Price panel directory (see risk_metrics.py); adds '
+                                             'volatility, beta, risk contributions and VaR')
+    parser.add_argument('--benchmark', help='With --risk-panel, panel symbol for beta (e.g. SPY)')
+    parser.add_argument('--lookthrough', metavar='CONSTITUENTS',
+                        help='Fund constituent weights (see lookthrough.py); adds underlying '
+                             'exposures and fund overlap')
+    parser.add_argument('--lookthrough-units', choices=WEIGHT_UNITS, default='auto',
+                        help='Units of the --lookthrough weights (default auto, see lookthrough.py)')
+    args = parser.parse_args()
     
-    input_file = sys.argv[1]
+    input_file = args.holdings_json
     
     try:
         with open(input_file, 'r') as f:
@@ -189,17 +440,52 @@ def main():
         print("Error: No holdings found in input JSON", file=sys.stderr)
         sys.exit(1)
     
-    # Calculate metrics
-    metrics = calculate_portfolio_metrics(holdings)
+    rollup = HoldingsRollup(holdings)
+    level = 'position' if args.rollup == 'all' else args.rollup
+    
+    # Calculate metrics (a copy, so the cached per-level metrics stay untouched)
+    metrics = dict(rollup.metrics(level))
+    if level != 'position':
+        metrics['rollup'] = level
     
     # Analyze sectors if data available
     sector_allocation = analyze_sector_allocation(holdings)
     if sector_allocation:
         metrics['sector_allocation'] = sector_allocation
     
+    if args.risk_panel:
+        try:
+            metrics['risk'] = analyze_panel_risk(holdings, args.risk_panel, args.benchmark)
+        except (OSError, ValueError, ImportError) as e:
+            print(f"Error computing panel risk: {e}", file=sys.stderr)
+            sys.exit(1)
+    
+    if args.lookthrough:
+        try:
+            metrics['lookthrough'] = analyze_lookthrough(holdings, args.lookthrough,
+                                                           units=args.lookthrough_units)
+        except (OSError, ValueError, ImportError) as e:
+            print(f"Error computing look-through exposure: {e}", file=sys.stderr)
+            sys.exit(1)
+    
     # Identify risk factors
     metrics['risk_factors'] = identify_risk_factors(metrics)
     
+    if args.flows:
+        try:
+            metrics['money_weighted_returns'] = money_weighted_returns(
+                args.flows, holdings, args.as_of or data.get('as_of_date'))
+        except (OSError, ValueError, ImportError) as e:
+            print(f"Error reading flows: {e}", file=sys.stderr)
+            sys.exit(1)
+    
+    if args.rollup == 'all':
+        metrics['rollups'] = {}
+        for name in GROUP_LEVELS:
+            level_metrics = dict(rollup.metrics(name))
+            level_metrics['risk_factors'] = identify_risk_factors(level_metrics)
+            metrics['rollups'][name] = level_metrics
+    
     # Output results
     print(json.dumps(metrics, indent=2))
 
@@ -2,69 +2,324 @@
 """
 Extract portfolio holdings and transactions from PDF statements.
 Handles common brokerage statement formats (Fidelity, Schwab, Vanguard, etc.)
+
+Each page is opened once and its text and tables are extracted together.
+Long statements can be split into page ranges across processes with
+--workers; pages are always returned in document order.
+
+Table extraction is the expensive step, so by default it is skipped on pages
+whose raw text mentions none of the holdings-table keywords (disclosure and
+marketing pages). A holdings table always carries at least one of those
+column headings, so a page with even one keyword is still extracted.
+--stop-after-holdings ends the scan at the first holdings table.
+
+Extracted pages are cached under data/pdf_cache/, keyed by the file's SHA-256
+and EXTRACTOR_VERSION, so rerunning on an unchanged statement skips PDF
+parsing entirely.
 """
 
+import os
 import sys
 import re
+import gzip
 import json
+import zlib
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 try:
     import pdfplumber
 except ImportError:
-    print("Error: pdfplumber not installed. Install with: pip install pdfplumber --break-system-packages", file=sys.stderr)
-    sys.exit(1)
+    pdfplumber = None
 
+PDFPLUMBER_MISSING = "pdfplumber not installed. Install with: pip install pdfplumber --break-system-packages"
 
-def extract_tables_from_pdf(pdf_path):
-    """Extract all tables from PDF."""
-    tables = []
-    with pdfplumber.open(pdf_path) as pdf:
-        for page_num, page in enumerate(pdf.pages, 1):
-            page_tables = page.extract_tables()
-            for table in page_tables:
-                if table:  # Skip empty tables
-                    tables.append({
-                        'page': page_num,
-                        'data': table
-                    })
-    return tables
-
-
-def extract_text_from_pdf(pdf_path):
-    """Extract all text from PDF."""
-    text_content = []
+# Column headings that mark a holdings table (also used to prefilter pages)
+HOLDING_KEYWORDS = ['symbol', 'ticker', 'quantity', 'shares', 'market value',
+                    'current value', 'description', 'security']
+
+# Pages whose text matches fewer keywords than this skip table extraction.
+# 1 only skips pages with no holdings heading at all: a table headed
+# "Ticker / Qty / Value" matches a single keyword.
+MIN_PAGE_KEYWORD_SCORE = 1
+
+# Below this many pages per worker, process start-up outweighs the parallel gain
+MIN_PAGES_PER_WORKER = 8
+
+# Common patterns for account information, compiled once
+ACCOUNT_INFO_PATTERNS = {
+    'account_number': re.compile(r'Account\s*(?:Number|#)?\s*:?\s*([A-Z0-9-]+)', re.IGNORECASE),
+    'account_name': re.compile(r'Account\s*(?:Name|Owner)\s*:?\s*([A-Za-z\s\.]+)', re.IGNORECASE),
+    'statement_period': re.compile(
+        r'(?:Statement|Period)\s*(?:Date|Period)?\s*:?\s*([\d/\-\s]+(?:to|through|\-)[\d/\-\s]+)',
+        re.IGNORECASE),
+    'statement_date': re.compile(r'(?:Statement|As of)\s*Date\s*:?\s*([\d/\-]+)', re.IGNORECASE),
+}
+
+# Characters at the end of a page searched again with the next page, so an
+# account field split across a page break is still found
+ACCOUNT_INFO_OVERLAP = 200
+
+# Bump whenever page extraction output changes so stale cache entries are ignored
+EXTRACTOR_VERSION = 1
+
+PAGE_CACHE_DIR = Path('data/pdf_cache')
+PAGE_CACHE_MAX_MB = 256
+
+READ_CHUNK_SIZE = 1 << 16
+
+
+def require_pdfplumber():
+    """Raise ImportError with install instructions when pdfplumber is unavailable."""
+    if pdfplumber is None:
+        raise ImportError(PDFPLUMBER_MISSING)
+
+
+def holdings_keyword_score(text):
+    """Number of distinct holdings keywords in a page's raw text (whitespace-normalized)."""
+    if not text:
+        return 0
+    text = ' '.join(text.lower().split())
+    return sum(1 for keyword in HOLDING_KEYWORDS if keyword in text)
+
+
+def has_holdings_table(tables):
+    return identify_holdings_table([{'data': table} for table in tables]) is not None
+
+
+def file_sha256(path):
+    """Hash a file in fixed-size chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PageCache:
+    """
+    On-disk cache of extracted pages, one gzip-compressed JSON file per entry.
+
+    Entries are keyed by the PDF's SHA-256, EXTRACTOR_VERSION and the
+    prefilter settings, so editing a statement only misses its own entry.
+    Hits refresh the entry's mtime; once the directory grows past max_mb the
+    least recently used entries are deleted.
+    """
+
+    def __init__(self, path=PAGE_CACHE_DIR, max_mb=PAGE_CACHE_MAX_MB):
+        self.path = Path(path)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+
+    @staticmethod
+    def key(sha256, min_keyword_score, stop_after_holdings):
+        suffix = '-h' if stop_after_holdings else ''
+        return f"{sha256}-v{EXTRACTOR_VERSION}-k{min_keyword_score}{suffix}"
+
+    def _entry_path(self, key):
+        return self.path / f"{key}.json.gz"
+
+    def get(self, key):
+        entry = self._entry_path(key)
+        try:
+            with gzip.open(entry, 'rt', encoding='utf-8') as f:
+                pages = json.load(f)['pages']
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, zlib.error, ValueError, KeyError, TypeError) as e:
+            # Truncated or corrupt entries are a miss; the next put overwrites them
+            print(f"Warning: ignoring unreadable cache entry {entry}: {e}", file=sys.stderr)
+            return None
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        return pages
+
+    def put(self, key, pages, source=None):
+        self.path.mkdir(parents=True, exist_ok=True)
+        entry = self._entry_path(key)
+        tmp_path = entry.with_name(f"{entry.name}.{os.getpid()}.tmp")
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump({'version': EXTRACTOR_VERSION, 'source': source, 'pages': pages}, f,
+                      separators=(',', ':'))
+        os.replace(tmp_path, entry)
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        total = 0
+        for entry in self.path.glob('*.json.gz'):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:  # removed by a concurrent run
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+            total += stat.st_size
+        entries.sort()
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                entry.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+def extract_page_range(pdf_path, first_page=1, last_page=None,
+                       min_keyword_score=MIN_PAGE_KEYWORD_SCORE, stop_after_holdings=False,
+                       with_tables=True):
+    """
+    Extract text and tables from pages first_page..last_page (1-based,
+    inclusive) in a single pass over one open document.
+
+    Table extraction only runs on pages whose text scores at least
+    min_keyword_score (0 scans every page), and not at all without
+    with_tables. With stop_after_holdings the scan ends on the first page
+    that yields a holdings table.
+    """
+    require_pdfplumber()
+    pages = []
     with pdfplumber.open(pdf_path) as pdf:
-        for page_num, page in enumerate(pdf.pages, 1):
+        last_page = min(last_page or len(pdf.pages), len(pdf.pages))
+        for page_num in range(first_page, last_page + 1):
+            page = pdf.pages[page_num - 1]
             text = page.extract_text()
-            if text:
-                text_content.append({
-                    'page': page_num,
-                    'text': text
-                })
-    return text_content
+            scanned = with_tables and (min_keyword_score <= 0
+                                       or holdings_keyword_score(text) >= min_keyword_score)
+            tables = []
+            if scanned:
+                tables = [table for table in page.extract_tables() if table]  # Skip empty tables
+            pages.append({
+                'page': page_num,
+                'text': text,
+                'tables': tables,
+                'scanned': scanned,
+            })
+            if stop_after_holdings and tables and has_holdings_table(tables):
+                break
+    return pages
+
+
+def _extract_page_range_task(task):
+    return extract_page_range(*task)
+
+
+def page_count(pdf_path):
+    require_pdfplumber()
+    with pdfplumber.open(pdf_path) as pdf:
+        return len(pdf.pages)
+
+
+def split_page_ranges(total_pages, parts):
+    """Split 1..total_pages into at most `parts` contiguous, near-equal (first, last) ranges."""
+    parts = max(1, min(parts, total_pages))
+    size, extra = divmod(total_pages, parts)
+    ranges = []
+    first = 1
+    for i in range(parts):
+        last = first + size - 1 + (1 if i < extra else 0)
+        ranges.append((first, last))
+        first = last + 1
+    return ranges
+
+
+def extract_pages(pdf_path, workers=1, min_keyword_score=MIN_PAGE_KEYWORD_SCORE,
+                  stop_after_holdings=False, with_tables=True):
+    """
+    Extract text and tables for every page, in page order.
+
+    With workers > 1 the document is split into contiguous page ranges that
+    are extracted in separate processes (each opens the PDF itself). When
+    stopping after the holdings table, each range stops on its own and pages
+    past the first holdings page are dropped here.
+    """
+    workers = workers or os.cpu_count() or 1
+    total_pages = page_count(pdf_path) if workers > 1 else 0
+    if workers <= 1 or total_pages < MIN_PAGES_PER_WORKER * 2:
+        return extract_page_range(pdf_path, 1, None, min_keyword_score, stop_after_holdings,
+                                  with_tables)
+
+    workers = min(workers, total_pages // MIN_PAGES_PER_WORKER)
+    tasks = [(pdf_path, first, last, min_keyword_score, stop_after_holdings, with_tables)
+             for first, last in split_page_ranges(total_pages, workers)]
+    pages = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk in pool.map(_extract_page_range_task, tasks):  # map preserves range order
+            for page in chunk:
+                pages.append(page)
+                if stop_after_holdings and page['tables'] and has_holdings_table(page['tables']):
+                    return pages
+    return pages
+
+
+def split_page_content(pages):
+    """Split extracted pages into the (tables, text_content) lists used by the parsers."""
+    tables = [{'page': page['page'], 'data': table} for page in pages for table in page['tables']]
+    text_content = [{'page': page['page'], 'text': page['text']} for page in pages if page['text']]
+    return tables, text_content
+
+
+def extract_tables_from_pdf(pdf_path, pages=None):
+    """
+    Extract all tables from PDF.
+    Pass pages from extract_pages to reuse a pass already made over the file.
+    """
+    if pages is None:
+        pages = extract_pages(pdf_path, min_keyword_score=0)
+    return split_page_content(pages)[0]
+
+
+def extract_text_from_pdf(pdf_path, pages=None):
+    """
+    Extract all text from PDF.
+    Pass pages from extract_pages to reuse a pass already made over the file.
+    """
+    if pages is None:
+        pages = extract_pages(pdf_path, with_tables=False)
+    return split_page_content(pages)[1]
 
 
 def find_account_info(text_content):
-    """Extract account number, name, and statement period."""
+    """
+    Extract account number, name, and statement period.
+    Pages are scanned in order and each field keeps its first match; the
+    scan stops as soon as every field has been found.
+
+    Each page is searched after the tail of the page before it (the last
+    ACCOUNT_INFO_OVERLAP characters, joined with a space as the whole-text
+    scan did). A match inside that tail, or one running into the end of the
+    page, could read differently with the next page's text, so it is only
+    accepted on the last page; otherwise the field is searched again with the
+    next page, starting no later than that match. A field split across a page
+    break is therefore found as the whole-text scan finds it, unless the
+    pattern needs text more than ACCOUNT_INFO_OVERLAP characters before the
+    break.
+    """
     info = {}
+    pending = dict(ACCOUNT_INFO_PATTERNS)
+    carry = ''
+    last = len(text_content) - 1
     
-    # Common patterns for account information
-    patterns = {
-        'account_number': r'Account\s*(?:Number|#)?\s*:?\s*([A-Z0-9-]+)',
-        'account_name': r'Account\s*(?:Name|Owner)\s*:?\s*([A-Za-z\s\.]+)',
-        'statement_period': r'(?:Statement|Period)\s*(?:Date|Period)?\s*:?\s*([\d/\-\s]+(?:to|through|\-)[\d/\-\s]+)',
-        'statement_date': r'(?:Statement|As of)\s*Date\s*:?\s*([\d/\-]+)',
-    }
-    
-    full_text = ' '.join([item['text'] for item in text_content])
-    
-    for key, pattern in patterns.items():
-        match = re.search(pattern, full_text, re.IGNORECASE)
-        if match:
-            info[key] = match.group(1).strip()
+    for n, item in enumerate(text_content):
+        text = carry + item['text']
+        tail_start = max(0, len(text) - ACCOUNT_INFO_OVERLAP)
+        for key, pattern in list(pending.items()):
+            match = pattern.search(text)
+            if match and n < last and (match.end() == len(text) or match.start() >= tail_start):
+                # May read differently with the next page; keep it in the carried tail
+                tail_start = min(tail_start, match.start())
+            elif match:
+                info[key] = match.group(1).strip()
+                del pending[key]
+        if not pending:
+            break
+        carry = text[tail_start:] + ' '
     
-    return info
+    return {key: info[key] for key in ACCOUNT_INFO_PATTERNS if key in info}
 
 
 def identify_holdings_table(tables):
@@ -72,9 +327,6 @@ def identify_holdings_table(tables):
     Identify which table contains portfolio holdings.
     Look for tables with headers like Symbol, Quantity, Value, etc.
     """
-    holding_keywords = ['symbol', 'ticker', 'quantity', 'shares', 'market value', 
-                       'current value', 'description', 'security']
-    
     for table in tables:
         if not table['data'] or len(table['data']) < 2:
             continue
@@ -83,7 +335,7 @@ def identify_holdings_table(tables):
         header = [str(cell).lower() if cell else '' for cell in table['data'][0]]
         
         # Count how many holding-related keywords are in the header
-        keyword_matches = sum(1 for keyword in holding_keywords 
+        keyword_matches = sum(1 for keyword in HOLDING_KEYWORDS
                             if any(keyword in h for h in header))
         
         if keyword_matches >= 3:  # At least 3 relevant columns
@@ -151,21 +403,34 @@ def parse_holdings_table(table_data):
     return holdings
 
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: python extract_pdf_portfolio.py <pdf_file>")
-        print("\nExtracts portfolio holdings from brokerage PDF statements.")
-        sys.exit(1)
+def load_pages(pdf_path, workers=1, min_keyword_score=MIN_PAGE_KEYWORD_SCORE,
+               stop_after_holdings=False, cache=None):
+    """
+    Extracted pages for a PDF, served from the PageCache when possible.
+    Returns (pages, cache_hit); cache_hit is None when no cache is used.
+    """
+    if cache is None:
+        return extract_pages(pdf_path, workers, min_keyword_score, stop_after_holdings), None
     
-    pdf_path = sys.argv[1]
+    key = cache.key(file_sha256(pdf_path), min_keyword_score, stop_after_holdings)
+    pages = cache.get(key)
+    if pages is not None:
+        return pages, True
     
-    if not Path(pdf_path).exists():
-        print(f"Error: File not found: {pdf_path}", file=sys.stderr)
-        sys.exit(1)
-    
-    # Extract content
-    tables = extract_tables_from_pdf(pdf_path)
-    text_content = extract_text_from_pdf(pdf_path)
+    pages = extract_pages(pdf_path, workers, min_keyword_score, stop_after_holdings)
+    try:
+        cache.put(key, pages, source=str(pdf_path))
+    except OSError as e:
+        print(f"Warning: could not write page cache: {e}", file=sys.stderr)
+    return pages, False
+
+
+def extract_pdf_file(pdf_path, workers=1, min_keyword_score=MIN_PAGE_KEYWORD_SCORE,
+                     stop_after_holdings=False, cache=None):
+    """Extract account info and holdings from one PDF statement."""
+    pages, cache_hit = load_pages(pdf_path, workers, min_keyword_score, stop_after_holdings, cache)
+    tables, text_content = split_page_content(pages)
+    pages_scanned = sum(1 for page in pages if page['scanned'])
     
     # Find account information
     account_info = find_account_info(text_content)
@@ -176,14 +441,57 @@ def main():
     if holdings_table:
         holdings = parse_holdings_table(holdings_table['data'])
     
-    # Output structured JSON
-    result = {
+    return {
         'source_file': pdf_path,
         'account_info': account_info,
         'holdings': holdings,
         'total_tables_found': len(tables),
+        'pages_scanned': pages_scanned,
+        'pages_skipped': len(pages) - pages_scanned,
+        'pages_read': len(pages),
+        'cache_hit': cache_hit,
     }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Extracts portfolio holdings from brokerage PDF statements.'
+    )
+    parser.add_argument('pdf_file', help='PDF statement to extract')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Processes to spread page ranges across (0 = CPU count, default 1)')
+    parser.add_argument('--min-keyword-score', type=int, default=MIN_PAGE_KEYWORD_SCORE,
+                        help='Holdings keywords (symbol, quantity, market value, ...) a page\'s '
+                             'text needs before its tables are extracted. The default '
+                             f'{MIN_PAGE_KEYWORD_SCORE} skips only pages that mention none of them, '
+                             'such as disclosures; higher values skip more pages but can miss '
+                             'sparse holdings tables; 0 extracts tables from every page')
+    parser.add_argument('--stop-after-holdings', action='store_true',
+                        help='Stop reading pages once a holdings table has been found')
+    parser.add_argument('--cache-dir', default=str(PAGE_CACHE_DIR),
+                        help=f'Extracted-page cache directory (default {PAGE_CACHE_DIR})')
+    parser.add_argument('--cache-max-mb', type=float, default=PAGE_CACHE_MAX_MB,
+                        help=f'Evict least recently used entries beyond this size '
+                             f'(default {PAGE_CACHE_MAX_MB})')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always parse the PDF; do not read or write the page cache')
+    args = parser.parse_args()
+    
+    pdf_path = args.pdf_file
+    
+    if not Path(pdf_path).exists():
+        print(f"Error: File not found: {pdf_path}", file=sys.stderr)
+        sys.exit(1)
     
+    cache = None if args.no_cache else PageCache(args.cache_dir, args.cache_max_mb)
+    
+    # Output structured JSON (a cache hit does not need pdfplumber)
+    try:
+        result = extract_pdf_file(pdf_path, args.workers, args.min_keyword_score,
+                                  args.stop_after_holdings, cache)
+    except ImportError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
     print(json.dumps(result, indent=2))
 
 
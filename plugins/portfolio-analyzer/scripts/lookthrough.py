@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Look-through exposure for ETFs and mutual funds.
+
+Fund constituent weights are read from a local file (CSV with fund, symbol
+and weight columns, or JSON {fund: {symbol: weight}}) into a sparse
+fund x security matrix in CSR form (indptr / indices / weights arrays). The
+matrix is cached as .npz under data/lookthrough_cache/, keyed by the
+constituent file's SHA-256 and weight units, so it is built once and reused
+for every portfolio analyzed against the same file.
+
+Weights are percent or fractions for the whole file: taken from --weight-units
+or a JSON {"units": ..., "funds": {...}} wrapper, otherwise guessed once from
+every fund in the file (percent if any weight is above 1 or any fund adds up
+to more than PERCENT_WEIGHT_SUM). A file that lists only a few small percent
+weights per fund cannot be told apart from fractions and needs the units
+stated.
+
+Underlying exposure is one sparse matrix-vector product: the dollar value
+held in each fund is spread over its constituents with a single
+numpy.bincount, then added to directly held positions. Overlap between held
+funds is the sum of the smaller weight for every security they share.
+"""
+
+import os
+import csv
+import sys
+import json
+import argparse
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from parse_csv_portfolio import clean_numeric_value, normalize_header
+from extract_pdf_portfolio import file_sha256
+
+NUMPY_MISSING = "numpy not installed. Install with: pip install numpy --break-system-packages"
+
+CACHE_DIR = Path('data/lookthrough_cache')
+MATRIX_VERSION = 2
+
+CONSTITUENT_COLUMN_ALIASES = {
+    'fund': ['fund', 'etf', 'fund symbol', 'parent'],
+    'symbol': ['symbol', 'ticker', 'holding', 'constituent'],
+    'weight': ['weight', 'pct', '% of fund', 'allocation'],
+}
+
+# A file with a fund whose weights add up to more than this is assumed to be in percent
+PERCENT_WEIGHT_SUM = 1.5
+
+WEIGHT_UNITS = ('auto', 'percent', 'fraction')
+
+TOP_EXPOSURES = 25
+
+# Underlying exposure above this share of the portfolio is flagged
+LOOKTHROUGH_CONCENTRATION_PCT = 10
+
+
+def _json_constituents(path):
+    """({fund: {symbol: weight}}, units or None) from a JSON constituent file."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: expected a JSON object of funds, got {type(data).__name__}")
+    units = None
+    if 'funds' in data and set(data) <= {'funds', 'units'}:
+        units = data.get('units')
+        if units not in WEIGHT_UNITS[1:]:
+            raise ValueError(f"{path}: units must be 'percent' or 'fraction', got {units!r}")
+        data = data['funds']
+        if not isinstance(data, dict):
+            raise ValueError(f"{path}: expected 'funds' to be an object, got {type(data).__name__}")
+
+    funds = {}
+    for fund, weights in data.items():
+        if not isinstance(weights, dict):
+            raise ValueError(f"{path}: weights for {fund} must be an object of symbol: weight, "
+                             f"got {type(weights).__name__}")
+        holdings = funds.setdefault(str(fund).upper(), {})
+        for symbol, weight in weights.items():
+            if isinstance(weight, bool) or not isinstance(weight, (int, float)):
+                raise ValueError(f"{path}: weight of {symbol} in {fund} must be a number, "
+                                 f"got {weight!r}")
+            holdings[str(symbol).upper()] = float(weight)
+    return funds, units
+
+
+def weight_scale(constituents, units='auto'):
+    """Factor that turns the file's weights into fractions, decided once for the whole file."""
+    if units == 'percent':
+        return 0.01
+    if units == 'fraction':
+        return 1.0
+    percent = any(max(weights.values(), default=0) > 1 or sum(weights.values()) > PERCENT_WEIGHT_SUM
+                  for weights in constituents.values())
+    return 0.01 if percent else 1.0
+
+
+def load_constituents(path, units='auto'):
+    """
+    {fund: {symbol: weight}} from a CSV or JSON constituent file, with weights
+    as fractions. units is 'percent', 'fraction' or 'auto'; units stated in
+    the JSON file take precedence over 'auto'.
+    """
+    if units not in WEIGHT_UNITS:
+        raise ValueError(f"Unknown weight units {units!r} (expected one of {', '.join(WEIGHT_UNITS)})")
+    if Path(path).suffix.lower() != '.csv':
+        funds, file_units = _json_constituents(path)
+        if units == 'auto' and file_units:
+            units = file_units
+    else:
+        funds = _csv_constituents(path)
+    scale = weight_scale(funds, units)
+    if scale != 1.0:
+        funds = {fund: {symbol: weight * scale for symbol, weight in weights.items()}
+                 for fund, weights in funds.items()}
+    return funds
+
+
+def _csv_constituents(path):
+    """{fund: {symbol: weight}} from a CSV constituent file, weights as written."""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = normalize_header(next(reader, []))
+        col_map = {}
+        for field, variations in CONSTITUENT_COLUMN_ALIASES.items():
+            for i, column in enumerate(header):
+                if i not in col_map.values() and any(var in column for var in variations):
+                    col_map[field] = i
+                    break
+        if len(col_map) < 3:
+            raise ValueError("Constituent CSV needs fund, symbol and weight columns")
+        funds = {}
+        for row in reader:
+            if len(row) <= max(col_map.values()):
+                continue
+            weight = clean_numeric_value(row[col_map['weight']])
+            fund = row[col_map['fund']].strip().upper()
+            symbol = row[col_map['symbol']].strip().upper()
+            if weight is None or not fund or not symbol:
+                continue
+            holdings = funds.setdefault(fund, {})
+            holdings[symbol] = holdings.get(symbol, 0.0) + weight
+    return funds
+
+
+class FundMatrix:
+    """Sparse fund x security weight matrix in CSR form."""
+
+    def __init__(self, funds, securities, indptr, indices, weights):
+        self.funds = list(funds)
+        self.securities = list(securities)
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.fund_index = {fund: i for i, fund in enumerate(self.funds)}
+        self.security_index = {symbol: i for i, symbol in enumerate(self.securities)}
+
+    @classmethod
+    def from_constituents(cls, constituents):
+        """Build from {fund: {symbol: weight}} with weights as fractions (see load_constituents)."""
+        funds = sorted(constituents)
+        securities = sorted({symbol for weights in constituents.values() for symbol in weights})
+        security_index = {symbol: i for i, symbol in enumerate(securities)}
+        indptr = np.zeros(len(funds) + 1, dtype=np.int64)
+        indices = []
+        weights = []
+        for row, fund in enumerate(funds):
+            items = sorted(constituents[fund].items())
+            fund_weights = np.array([w for _, w in items], dtype=float)
+            indices.extend(security_index[symbol] for symbol, _ in items)
+            weights.append(fund_weights)
+            indptr[row + 1] = indptr[row] + len(items)
+        weights = np.concatenate(weights) if weights else np.zeros(0)
+        return cls(funds, securities, indptr, np.array(indices, dtype=np.int64), weights)
+
+    @classmethod
+    def load(cls, constituents_path, cache_dir=CACHE_DIR, units='auto'):
+        """Build from the constituent file, or reuse the cached matrix for the same content."""
+        cache_path = None
+        if cache_dir:
+            key = file_sha256(constituents_path)
+            cache_path = Path(cache_dir) / f"{key}-{units}-v{MATRIX_VERSION}.npz"
+            if cache_path.exists():
+                with np.load(cache_path) as data:
+                    return cls(data['funds'].tolist(), data['securities'].tolist(),
+                               data['indptr'], data['indices'], data['weights'])
+
+        matrix = cls.from_constituents(load_constituents(constituents_path, units))
+        if cache_path is not None:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_name(f"{cache_path.stem}.{os.getpid()}.tmp.npz")
+            np.savez_compressed(tmp_path, funds=np.array(matrix.funds, dtype=str),
+                                securities=np.array(matrix.securities, dtype=str),
+                                indptr=matrix.indptr, indices=matrix.indices,
+                                weights=matrix.weights)
+            os.replace(tmp_path, cache_path)
+        return matrix
+
+    def row_sums(self):
+        rows = np.repeat(np.arange(len(self.funds)), np.diff(self.indptr))
+        return np.bincount(rows, weights=self.weights, minlength=len(self.funds))
+
+    def transpose_dot(self, fund_values):
+        """Security exposure = A^T v for dollar values v held in each fund."""
+        row_lengths = np.diff(self.indptr)
+        spread = self.weights * np.repeat(fund_values, row_lengths)
+        return np.bincount(self.indices, weights=spread, minlength=len(self.securities))
+
+    def row(self, fund):
+        i = self.fund_index[fund]
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return self.indices[start:end], self.weights[start:end]
+
+    def overlap(self, funds):
+        """Pairwise overlap (sum of the smaller weight per shared security) between funds."""
+        rows = [self.row(fund) for fund in funds]
+        if not rows:
+            return []
+        columns = np.unique(np.concatenate([indices for indices, _ in rows]))
+        dense = np.zeros((len(funds), len(columns)))
+        for k, (indices, weights) in enumerate(rows):
+            dense[k, np.searchsorted(columns, indices)] = weights
+        pairs = []
+        for a in range(len(funds)):
+            shared = np.minimum(dense[a], dense[a + 1:])
+            for offset, total in enumerate(shared.sum(axis=1)):
+                b = a + 1 + offset
+                pairs.append({
+                    'funds': [funds[a], funds[b]],
+                    'overlap_pct': round(float(total) * 100, 2),
+                    'shared_holdings': int(np.count_nonzero(shared[offset])),
+                })
+        pairs.sort(key=lambda pair: pair['overlap_pct'], reverse=True)
+        return pairs
+
+
+def lookthrough_exposure(holdings, matrix, top=TOP_EXPOSURES):
+    """Underlying exposures (direct + through funds) and fund overlap for a portfolio."""
+    fund_values = np.zeros(len(matrix.funds))
+    direct = {}
+    total = 0.0
+    for holding in holdings:
+        value = holding.get('value')
+        if not isinstance(value, (int, float)) or value <= 0:
+            continue
+        total += value
+        symbol = str(holding.get('symbol') or '').strip().upper()
+        i = matrix.fund_index.get(symbol)
+        if i is None:
+            direct[symbol or 'Unknown'] = direct.get(symbol or 'Unknown', 0.0) + value
+        else:
+            fund_values[i] += value
+    if total <= 0:
+        raise ValueError("No positive-value holdings")
+
+    via_funds = matrix.transpose_dot(fund_values)
+    unmapped = float(fund_values @ (1 - np.minimum(matrix.row_sums(), 1.0)))
+
+    # Direct positions in securities that funds also hold share the security index
+    exposures = dict(direct)
+    for i in np.flatnonzero(via_funds):
+        symbol = matrix.securities[i]
+        exposures[symbol] = exposures.get(symbol, 0.0) + float(via_funds[i])
+
+    ranked = sorted(exposures.items(), key=lambda item: item[1], reverse=True)[:top]
+    held_funds = [matrix.funds[i] for i in np.flatnonzero(fund_values)]
+    return {
+        'total_value': round(total, 2),
+        'fund_value': round(float(fund_values.sum()), 2),
+        'funds_held': held_funds,
+        'unmapped_fund_value': round(unmapped, 2),
+        'top_exposures': [
+            {
+                'symbol': symbol,
+                'value': round(value, 2),
+                'exposure_pct': round(value / total * 100, 2),
+                'direct_value': round(direct.get(symbol, 0.0), 2),
+                'via_funds_value': round(value - direct.get(symbol, 0.0), 2),
+            }
+            for symbol, value in ranked
+        ],
+        'fund_overlap': matrix.overlap(held_funds),
+    }
+
+
+def analyze_lookthrough(holdings, constituents_path, cache_dir=CACHE_DIR, units='auto'):
+    """Entry point for calculate_portfolio_metrics."""
+    if np is None:
+        raise ImportError(NUMPY_MISSING)
+    return lookthrough_exposure(holdings, FundMatrix.load(constituents_path, cache_dir, units))
+
+
+def lookthrough_concerns(lookthrough):
+    """Risk-factor entries (identify_risk_factors format) for hidden concentration."""
+    concerns = []
+    for exposure in lookthrough.get('top_exposures', []):
+        if exposure['exposure_pct'] <= LOOKTHROUGH_CONCENTRATION_PCT:
+            break
+        if exposure['via_funds_value'] > 0:
+            concerns.append({
+                'type': 'lookthrough_concentration',
+                'severity': 'medium',
+                'message': f"{exposure['symbol']} is {exposure['exposure_pct']:.1f}% of the portfolio "
+                           f"including ${exposure['via_funds_value']:,.0f} held through funds"
+            })
+    return concerns
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Underlying security exposure and fund overlap through ETF/fund constituents.'
+    )
+    parser.add_argument('holdings_json', help='Holdings JSON ({"holdings": [...]})')
+    parser.add_argument('constituents', help='Constituent weights: CSV (fund,symbol,weight) or '
+                                             'JSON {fund: {symbol: weight}}')
+    parser.add_argument('--weight-units', choices=WEIGHT_UNITS, default='auto',
+                        help='Units of the constituent weights (default auto: percent if any '
+                             'fund in the file adds up to more than 1.5)')
+    parser.add_argument('--cache-dir', default=str(CACHE_DIR),
+                        help=f'Where the built sparse matrix is cached (default {CACHE_DIR})')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Rebuild the matrix and do not write the cache')
+    parser.add_argument('--top', type=int, default=TOP_EXPOSURES,
+                        help=f'Underlying exposures to report (default {TOP_EXPOSURES})')
+    args = parser.parse_args()
+
+    if np is None:
+        print(f"Error: {NUMPY_MISSING}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        with open(args.holdings_json, 'r') as f:
+            holdings = json.load(f).get('holdings', [])
+        matrix = FundMatrix.load(args.constituents, None if args.no_cache else args.cache_dir,
+                                 args.weight_units)
+        result = lookthrough_exposure(holdings, matrix, args.top)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    result['risk_factors'] = lookthrough_concerns(result)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
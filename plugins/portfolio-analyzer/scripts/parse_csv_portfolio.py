@@ -2,66 +2,261 @@
 """
 Parse CSV portfolio files into normalized format.
 Handles various CSV export formats from brokers and portfolio tracking tools.
+
+Numeric columns are cleaned a column at a time: each column's cells are
+passed through one str.translate table and converted with a single map(float),
+falling back to cell-by-cell conversion only for columns with blank or bad cells.
+
+Use --stream for very large exports: rows are normalized in blocks of
+COLUMN_CHUNK_ROWS and written as JSON Lines, so memory stays flat and output
+starts after the first block.
+
+Resolved header layouts are remembered in a local broker-profile registry
+(data/broker_profiles.json by default), keyed by a hash of the normalized
+header row. Known layouts skip alias detection entirely; new layouts can be
+pinned under a name with --pin-profile (and --map for explicit columns), and
+layouts found by alias detection are only saved with --learn-profiles. The
+registry is stamped with a hash of the alias tables, so changing them
+invalidates every stored profile.
 """
 
+import os
+import re
 import sys
 import csv
 import json
+import hashlib
+import argparse
+from itertools import islice
 from pathlib import Path
 
 
-def detect_csv_format(rows):
+NUMERIC_FIELDS = ('quantity', 'price', 'value', 'cost_basis', 'gain_loss', 'gain_loss_pct')
+
+TOTAL_ROW_WORDS = ('total', 'sum', 'subtotal', 'grand total')
+
+TOTAL_ROW_PATTERN = re.compile('|'.join(re.escape(word) for word in TOTAL_ROW_WORDS))
+
+# Common column name variations for standard fields
+COLUMN_ALIASES = {
+    'symbol': ['symbol', 'ticker', 'stock symbol', 'security symbol'],
+    'description': ['description', 'name', 'security name', 'security description', 'company'],
+    'quantity': ['quantity', 'shares', 'units', 'qty', 'number of shares'],
+    'price': ['price', 'current price', 'market price', 'last price', 'quote'],
+    'value': ['value', 'market value', 'current value', 'total value', 'market val'],
+    'cost_basis': ['cost basis', 'cost', 'total cost', 'purchase price', 'basis'],
+    'gain_loss': ['gain/loss', 'gain', 'total gain/loss', 'unrealized gain/loss', 'p&l'],
+    'gain_loss_pct': ['gain/loss %', 'gain %', '% gain/loss', 'return %'],
+    'account': ['account', 'account number', 'account #', 'acct'],
+    'asset_class': ['asset class', 'type', 'category', 'asset type'],
+}
+
+PROFILE_REGISTRY_PATH = Path('data/broker_profiles.json')
+PROFILE_REGISTRY_VERSION = 1
+
+# Currency symbols, thousands separators and percent signs are dropped;
+# accounting-style parentheses become a leading minus sign
+NUMERIC_CLEANUP = str.maketrans({'$': None, ',': None, '%': None, '(': '-', ')': None})
+
+CELL_SEPARATOR = '\x1f'
+
+_MISSING = object()
+
+# Data rows converted per column block when streaming
+COLUMN_CHUNK_ROWS = 4096
+
+
+def normalize_header(header_row):
+    """Lowercase and strip header cells for matching."""
+    return [str(cell).lower().strip() for cell in header_row]
+
+
+def header_signature(header_row):
+    """Stable hash of the normalized header row, used as the profile key."""
+    joined = '\x1f'.join(normalize_header(header_row))
+    return hashlib.sha256(joined.encode('utf-8')).hexdigest()[:16]
+
+
+def registry_stamp():
+    """Hash of the registry format and alias tables that stored profiles were resolved with."""
+    payload = json.dumps([PROFILE_REGISTRY_VERSION, COLUMN_ALIASES, NUMERIC_FIELDS], sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def classify_format(col_map):
+    """Determine format type based on which columns are present."""
+    if 'symbol' in col_map and 'quantity' in col_map:
+        return 'holdings'
+    elif 'symbol' in col_map and any(k in col_map for k in ['gain_loss', 'value']):
+        return 'performance'
+    return 'generic'
+
+
+def column_parsers(col_map):
+    """Parser name for each mapped column ('numeric' or 'text')."""
+    return {field: 'numeric' if field in NUMERIC_FIELDS else 'text' for field in col_map}
+
+
+class ProfileRegistry:
+    """
+    Broker-profile registry keyed by header signature.
+
+    Each profile stores the resolved col_map, format_type and per-column
+    parsers. Pinned profiles carry a name and are never overwritten by
+    detection. Profiles learned from alias detection are used for the rest of
+    the run but only written back when persist_learned is set. A registry file
+    stamped with different alias tables is ignored and replaced on save.
+    """
+
+    def __init__(self, path=PROFILE_REGISTRY_PATH, persist_learned=False):
+        self.path = Path(path)
+        self.persist_learned = persist_learned
+        self.profiles = {}
+        self.unsaved = set()
+        self.new = set()
+        self.dirty = False
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Warning: ignoring unreadable profile registry {self.path}: {e}",
+                      file=sys.stderr)
+            else:
+                if data.get('stamp') == registry_stamp():
+                    self.profiles = data.get('profiles', {})
+                else:
+                    print(f"Warning: ignoring profile registry {self.path} built with "
+                          f"different column aliases", file=sys.stderr)
+
+    def lookup(self, header_row):
+        return self.profiles.get(header_signature(header_row))
+
+    def _store(self, header_row, format_type, col_map, name=None, pinned=False):
+        signature = header_signature(header_row)
+        profile = {
+            'name': name,
+            'pinned': pinned,
+            'format_type': format_type,
+            'col_map': dict(col_map),
+            'parsers': column_parsers(col_map),
+            'columns': normalize_header(header_row),
+        }
+        self.profiles[signature] = profile
+        self.new.add(signature)
+        self._changed(signature, pinned)
+        return profile
+
+    def _changed(self, signature, pinned):
+        if pinned or self.persist_learned:
+            self.unsaved.discard(signature)
+            self.dirty = True
+        else:
+            self.unsaved.add(signature)
+
+    def learn(self, header_row, format_type, col_map):
+        """Record a layout resolved by alias detection (pinned profiles win)."""
+        existing = self.lookup(header_row)
+        if existing and existing.get('pinned'):
+            return existing
+        return self._store(header_row, format_type, col_map)
+
+    def pin(self, header_row, format_type, col_map, name):
+        """Explicitly pin a layout under a broker/profile name."""
+        return self._store(header_row, format_type, col_map, name=name, pinned=True)
+
+    def take_new(self):
+        """
+        Profiles stored since the last call, for handing layouts found in a
+        worker process to the registry that will be saved (see merge).
+        """
+        new = {signature: self.profiles[signature] for signature in self.new}
+        self.new.clear()
+        return new
+
+    def merge(self, profiles):
+        """Add profiles learned elsewhere (e.g. by worker processes) that are not yet known."""
+        for signature, profile in profiles.items():
+            if signature not in self.profiles:
+                self.profiles[signature] = profile
+                self._changed(signature, profile.get('pinned'))
+
+    def save(self):
+        if not self.dirty:
+            return
+        profiles = {signature: profile for signature, profile in self.profiles.items()
+                    if signature not in self.unsaved}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'stamp': registry_stamp(), 'profiles': profiles}, f, indent=2)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+
+def detect_csv_format(rows, registry=None):
     """
     Detect the CSV format by examining headers.
     Returns a format type and column mapping.
+
+    When a ProfileRegistry is given, a known header layout is resolved with a
+    single hash lookup; the alias scan only runs for unseen layouts, whose
+    result is then learned by the registry.
     """
     if not rows or len(rows) < 1:
         return None, {}
     
+    if registry is not None:
+        profile = registry.lookup(rows[0])
+        if profile:
+            return profile['format_type'], dict(profile['col_map'])
+    
     # Get header row (convert to lowercase for matching)
-    header = [str(cell).lower().strip() for cell in rows[0]]
-    
-    # Common column name variations for standard fields
-    mappings = {
-        'symbol': ['symbol', 'ticker', 'stock symbol', 'security symbol'],
-        'description': ['description', 'name', 'security name', 'security description', 'company'],
-        'quantity': ['quantity', 'shares', 'units', 'qty', 'number of shares'],
-        'price': ['price', 'current price', 'market price', 'last price', 'quote'],
-        'value': ['value', 'market value', 'current value', 'total value', 'market val'],
-        'cost_basis': ['cost basis', 'cost', 'total cost', 'purchase price', 'basis'],
-        'gain_loss': ['gain/loss', 'gain', 'total gain/loss', 'unrealized gain/loss', 'p&l'],
-        'gain_loss_pct': ['gain/loss %', 'gain %', '% gain/loss', 'return %'],
-        'account': ['account', 'account number', 'account #', 'acct'],
-        'asset_class': ['asset class', 'type', 'category', 'asset type'],
-    }
+    header = normalize_header(rows[0])
     
     # Find column indices for each field
     col_map = {}
-    for field, variations in mappings.items():
+    for field, variations in COLUMN_ALIASES.items():
         for i, col in enumerate(header):
             if any(var in col for var in variations):
                 col_map[field] = i
                 break
     
-    # Determine format type based on which columns are present
-    if 'symbol' in col_map and 'quantity' in col_map:
-        format_type = 'holdings'
-    elif 'symbol' in col_map and any(k in col_map for k in ['gain_loss', 'value']):
-        format_type = 'performance'
-    else:
-        format_type = 'generic'
+    format_type = classify_format(col_map)
+    
+    if registry is not None and col_map:
+        registry.learn(rows[0], format_type, col_map)
     
     return format_type, col_map
 
 
+def apply_column_overrides(header_row, col_map, overrides):
+    """
+    Apply explicit FIELD=Header Name mappings on top of a detected col_map.
+    Header names are matched exactly after normalization.
+    """
+    header = normalize_header(header_row)
+    col_map = dict(col_map)
+    for override in overrides:
+        field, sep, column = override.partition('=')
+        field = field.strip()
+        if not sep or field not in COLUMN_ALIASES:
+            raise ValueError(f"Invalid --map '{override}' (expected FIELD=Header, FIELD one of "
+                             f"{', '.join(COLUMN_ALIASES)})")
+        column = column.lower().strip()
+        if column not in header:
+            raise ValueError(f"Column '{column}' not found in header")
+        col_map[field] = header.index(column)
+    return col_map
+
+
 def clean_numeric_value(value):
     """Clean and convert numeric string to float."""
     if not value or value == '-' or value == '':
         return None
     
     # Remove currency symbols, commas, parentheses (negative numbers)
-    cleaned = str(value).replace('$', '').replace(',', '').replace('%', '')
-    cleaned = cleaned.replace('(', '-').replace(')', '').strip()
+    cleaned = str(value).translate(NUMERIC_CLEANUP).strip()
     
     try:
         return float(cleaned)
@@ -69,76 +264,221 @@ def clean_numeric_value(value):
         return None
 
 
-def parse_csv_rows(rows, col_map):
-    """Parse CSV rows into normalized holdings format."""
-    holdings = []
+def clean_numeric_column(values):
+    """
+    Clean and convert a whole column of numeric cells at once.
+
+    The column is joined and cleaned with one str.translate call and converted
+    with a single map(float); cells are only retried one by one when the column
+    holds empty or unparseable values. Returns (column, bad): column has the
+    same values clean_numeric_value gives cell by cell (None for empty, '-' and
+    unparseable cells) and bad lists the indices of non-empty cells that failed.
+    """
+    joined = CELL_SEPARATOR.join([str(v) if v else '' for v in values])
+    parts = joined.translate(NUMERIC_CLEANUP).split(CELL_SEPARATOR)
+    if len(parts) != len(values):
+        # A cell contained the separator itself; clean cell by cell instead
+        parts = [str(v).translate(NUMERIC_CLEANUP) if v else '' for v in values]
     
-    # Skip header row
-    for row in rows[1:]:
-        if not row or len(row) == 0:
-            continue
-        
-        # Skip empty rows or total rows
-        first_cell = str(row[0]).lower() if row and len(row) > 0 else ''
-        if not first_cell or any(word in first_cell for word in ['total', 'sum', 'subtotal', 'grand total']):
-            continue
-        
-        holding = {}
-        
-        # Extract each mapped field
-        for field, idx in col_map.items():
-            if idx < len(row):
-                value = row[idx]
-                
-                # Handle numeric fields
-                if field in ['quantity', 'price', 'value', 'cost_basis', 'gain_loss', 'gain_loss_pct']:
-                    holding[field] = clean_numeric_value(value)
-                else:
-                    # Text fields
-                    holding[field] = str(value).strip() if value else None
-        
-        # Only include if we have meaningful data (symbol or description)
-        if holding.get('symbol') or holding.get('description'):
-            holdings.append(holding)
+    try:
+        return list(map(float, parts)), []
+    except ValueError:
+        pass
     
-    return holdings
+    column = []
+    bad = []
+    for i, cell in enumerate(parts):
+        try:
+            column.append(float(cell))
+        except ValueError:
+            column.append(None)
+            if str(values[i]).strip() not in ('', '-'):
+                bad.append(i)
+    return column, bad
 
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: python parse_csv_portfolio.py <csv_file>")
-        print("\nParses portfolio CSV files into normalized JSON format.")
-        sys.exit(1)
+def clean_text_column(values):
+    """Strip a column of text cells, mapping empty values to None."""
+    return [str(v).strip() if v else None for v in values], []
+
+
+PARSERS = {
+    'numeric': clean_numeric_column,
+    'text': clean_text_column,
+}
+
+
+def is_data_row(row):
+    """False for empty rows and total/summary rows."""
+    if not row or len(row) == 0:
+        return False
+    first_cell = str(row[0]).lower()
+    return bool(first_cell) and TOTAL_ROW_PATTERN.search(first_cell) is None
+
+
+def normalize_block(rows, col_map, parsers=None, first_row_number=2, on_bad_cell=None):
+    """
+    Normalize a block of CSV data rows (no header) column by column.
+
+    Skips empty, total/summary and non-holding rows. Non-empty numeric cells
+    that do not parse are stored as None and passed to on_bad_cell, in row
+    order, as {'row': row_number, 'field': field, 'value': raw_value}.
+    """
+    parsers = parsers or column_parsers(col_map)
+    numbered = [(n, row) for n, row in enumerate(rows, first_row_number) if is_data_row(row)]
+    data = [row for _, row in numbered]
+    last_idx = max(col_map.values(), default=-1)
+    short = [i for i, row in enumerate(data) if len(row) <= last_idx]
+    fields = list(col_map)
+    columns = []
+    bad_cells = []
     
-    csv_path = sys.argv[1]
+    for position, (field, idx) in enumerate(col_map.items()):
+        raw = [row[idx] if idx < len(row) else '' for row in data] if short else [row[idx] for row in data]
+        column, bad = PARSERS[parsers.get(field, 'text')](raw)
+        for i in short:
+            if idx >= len(data[i]):
+                # No cell for this field; the key is dropped from the holding below
+                column[i] = _MISSING
+        columns.append(column)
+        for i in bad:
+            bad_cells.append((i, position, {'row': numbered[i][0], 'field': field, 'value': raw[i]}))
     
-    if not Path(csv_path).exists():
-        print(f"Error: File not found: {csv_path}", file=sys.stderr)
-        sys.exit(1)
+    holdings = [dict(zip(fields, values)) for values in zip(*columns)] if columns else [{} for _ in data]
+    for i in short:
+        holdings[i] = {k: v for k, v in holdings[i].items() if v is not _MISSING}
     
-    # Read CSV file
-    try:
-        with open(csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            rows = list(reader)
-    except Exception as e:
-        print(f"Error reading CSV: {e}", file=sys.stderr)
-        sys.exit(1)
+    if on_bad_cell is not None:
+        for _, _, bad_cell in sorted(bad_cells, key=lambda b: b[:2]):
+            on_bad_cell(bad_cell)
+    
+    # Only include if we have meaningful data (symbol or description)
+    return [h for h in holdings if h.get('symbol') or h.get('description')]
+
+
+class BadCellTally:
+    """Count of unparseable numeric cells and the first one seen, in constant memory."""
+
+    def __init__(self):
+        self.count = 0
+        self.first = None
+
+    def add(self, bad_row):
+        if self.first is None:
+            self.first = bad_row
+        self.count += 1
+
+
+def iter_holdings(rows, col_map, parsers=None, on_bad_cell=None, first_row_number=2,
+                  chunk_rows=COLUMN_CHUNK_ROWS):
+    """
+    Lazily yield normalized holdings from an iterable of data rows (no header).
+    Rows are converted in column blocks of chunk_rows; unparseable numeric
+    cells are passed to on_bad_cell (see normalize_block).
+    """
+    rows = iter(rows)
+    row_number = first_row_number
+    while True:
+        block = list(islice(rows, chunk_rows))
+        if not block:
+            return
+        yield from normalize_block(block, col_map, parsers, row_number, on_bad_cell)
+        row_number += len(block)
+
+
+def normalize_rows(rows, col_map, parsers=None):
+    """
+    Normalize data rows (no header) into (holdings, bad_rows), where bad_rows
+    lists every unparseable numeric cell with its CSV row number.
+    """
+    bad_rows = []
+    holdings = normalize_block(rows, col_map, parsers, on_bad_cell=bad_rows.append)
+    return holdings, bad_rows
+
+
+def parse_csv_rows(rows, col_map, parsers=None):
+    """Parse CSV rows into normalized holdings format."""
+    # Skip header row
+    holdings, _ = normalize_rows(rows[1:], col_map, parsers)
+    return holdings
+
+
+def profile_parsers(registry, header_row):
+    """Per-column parsers from the registry profile for this header, if any."""
+    if registry is None:
+        return None
+    profile = registry.lookup(header_row)
+    return profile.get('parsers') if profile else None
+
+
+def open_holdings_stream(f, registry=None, on_bad_cell=None):
+    """
+    Resolve the header of an open CSV file and return a lazy holdings iterator.
+
+    Returns (header, format_type, col_map, holdings_iter). Only the header row is
+    read up front; data rows are consumed as holdings_iter is advanced, so the
+    file must stay open while iterating.
+    """
+    reader = csv.reader(f)
+    header = next(reader, None)
+    if header is None:
+        return None, None, {}, iter(())
+    
+    format_type, col_map = detect_csv_format([header], registry)
+    parsers = profile_parsers(registry, header)
+    return header, format_type, col_map, iter_holdings(reader, col_map, parsers, on_bad_cell)
+
+
+def stream_csv(csv_path, out, batch_size=1, registry=None, on_bad_cell=None):
+    """
+    Stream normalized holdings from csv_path to out as JSON Lines.
+
+    With batch_size 1 each line is one holding; larger batch sizes write one
+    {"holdings": [...]} object per line. Output is flushed after every line so
+    downstream consumers see records before the file finishes reading.
+    Returns (format_type, col_map, total_holdings).
+    """
+    total = 0
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        header, format_type, col_map, holdings = open_holdings_stream(f, registry, on_bad_cell)
+        if not col_map:
+            return format_type, col_map, 0
+        
+        batch = []
+        for holding in holdings:
+            total += 1
+            if batch_size <= 1:
+                out.write(json.dumps(holding) + '\n')
+                out.flush()
+                continue
+            batch.append(holding)
+            if len(batch) >= batch_size:
+                out.write(json.dumps({'holdings': batch}) + '\n')
+                out.flush()
+                batch = []
+        if batch:
+            out.write(json.dumps({'holdings': batch}) + '\n')
+            out.flush()
     
+    return format_type, col_map, total
+
+
+def parse_csv_data(rows, csv_path, registry=None):
+    """
+    Build the normalized result document for already-read CSV rows.
+    Raises ValueError when the file is empty or no portfolio columns are found.
+    """
     if not rows:
-        print("Error: CSV file is empty", file=sys.stderr)
-        sys.exit(1)
+        raise ValueError("CSV file is empty")
     
     # Detect format and get column mapping
-    format_type, col_map = detect_csv_format(rows)
+    format_type, col_map = detect_csv_format(rows, registry)
     
     if not col_map:
-        print("Error: Could not identify portfolio data columns in CSV", file=sys.stderr)
-        print(f"Header found: {rows[0] if rows else 'None'}", file=sys.stderr)
-        sys.exit(1)
+        raise ValueError("Could not identify portfolio data columns in CSV")
     
     # Parse the rows
-    holdings = parse_csv_rows(rows, col_map)
+    holdings, bad_rows = normalize_rows(rows[1:], col_map, profile_parsers(registry, rows[0]))
     
     # Output structured JSON
     result = {
@@ -148,6 +488,106 @@ def main():
         'holdings': holdings,
         'total_holdings': len(holdings)
     }
+    if bad_rows:
+        result['bad_rows'] = bad_rows
+    return result
+
+
+def parse_csv_file(csv_path, registry=None):
+    """Read and normalize one CSV export; see parse_csv_data for errors raised."""
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    return parse_csv_data(rows, csv_path, registry)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Parses portfolio CSV files into normalized JSON format.'
+    )
+    parser.add_argument('csv_file', help='CSV export to parse')
+    parser.add_argument('--stream', action='store_true',
+                        help='Write holdings incrementally as JSON Lines (constant memory)')
+    parser.add_argument('--batch-size', type=int, default=1,
+                        help='With --stream, holdings per output line (default 1)')
+    parser.add_argument('--profile-registry', default=str(PROFILE_REGISTRY_PATH),
+                        help=f'Broker profile registry file (default {PROFILE_REGISTRY_PATH})')
+    parser.add_argument('--no-profile-cache', action='store_true',
+                        help='Always run alias detection; do not read or update the registry')
+    parser.add_argument('--learn-profiles', action='store_true',
+                        help='Save header layouts found by alias detection to the registry')
+    parser.add_argument('--pin-profile', metavar='NAME',
+                        help='Pin this file\'s header layout in the registry under NAME')
+    parser.add_argument('--map', action='append', default=[], metavar='FIELD=HEADER',
+                        help='Explicit column mapping (repeatable), e.g. --map symbol="Sec ID"')
+    args = parser.parse_args()
+    
+    csv_path = args.csv_file
+    
+    if not Path(csv_path).exists():
+        print(f"Error: File not found: {csv_path}", file=sys.stderr)
+        sys.exit(1)
+    
+    registry = None if args.no_profile_cache else ProfileRegistry(args.profile_registry,
+                                                                  args.learn_profiles)
+    
+    if args.pin_profile or args.map:
+        try:
+            with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+                header = next(csv.reader(f), None)
+            if header is None:
+                raise ValueError("CSV file is empty")
+            _, col_map = detect_csv_format([header], registry)
+            col_map = apply_column_overrides(header, col_map, args.map)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        if registry is None:
+            registry = ProfileRegistry(args.profile_registry)
+        name = args.pin_profile or f"custom-{header_signature(header)}"
+        registry.pin(header, classify_format(col_map), col_map, name)
+        print(f"Pinned profile '{name}' ({header_signature(header)})", file=sys.stderr)
+    
+    if args.stream:
+        bad_cells = BadCellTally()
+        try:
+            format_type, col_map, total = stream_csv(csv_path, sys.stdout, args.batch_size,
+                                                     registry, bad_cells.add)
+        except Exception as e:
+            print(f"Error reading CSV: {e}", file=sys.stderr)
+            sys.exit(1)
+        finally:
+            if registry is not None:
+                registry.save()
+        if not col_map:
+            print("Error: Could not identify portfolio data columns in CSV", file=sys.stderr)
+            sys.exit(1)
+        print(f"Streamed {total} holdings ({format_type} format; columns: "
+              f"{', '.join(col_map.keys())})", file=sys.stderr)
+        if bad_cells.count:
+            print(f"Warning: {bad_cells.count} unparseable numeric cells "
+                  f"(first at row {bad_cells.first['row']}, field '{bad_cells.first['field']}')",
+                  file=sys.stderr)
+        return
+    
+    # Read CSV file
+    try:
+        with open(csv_path, 'r', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            rows = list(reader)
+    except Exception as e:
+        print(f"Error reading CSV: {e}", file=sys.stderr)
+        sys.exit(1)
+    
+    try:
+        result = parse_csv_data(rows, csv_path, registry)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        if rows:
+            print(f"Header found: {rows[0]}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if registry is not None:
+            registry.save()
     
     print(json.dumps(result, indent=2))
 
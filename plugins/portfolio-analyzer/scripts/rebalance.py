@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Lot-aware rebalancing trades across a multi-account household.
+
+Targets are portfolio-wide weights per symbol, each with a tolerance band.
+Holdings are open lots (the lot file format of tax_loss_harvest.py) plus
+uninvested cash per account. The solver is greedy and trades only to the band
+edge, which keeps turnover to the minimum needed to get back inside:
+
+1. Every symbol above its upper band is sold down to the band edge. Lots are
+   taken from tax-advantaged accounts first (no realized gain), then from
+   taxable accounts highest cost basis per share first, so realized gains are
+   as small as the lot history allows.
+2. Every symbol below its lower band is bought up to the band edge, largest
+   shortfall first, with cash in the account that raised it: accounts that
+   already hold the symbol first, then the accounts with the most cash.
+3. When an account lacks the cash for a buy, it sells positions that are
+   still above target (but inside their band) down toward target, cheapest
+   lots in realized-gain terms first.
+
+Symbols held but absent from the targets have a target of zero.
+"""
+
+import sys
+import math
+import json
+import argparse
+from datetime import date
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from xirr import parse_flow_date
+from tax_loss_harvest import LONG_TERM_DAYS, load_lots, load_prices
+
+NUMPY_MISSING = "numpy not installed. Install with: pip install numpy --break-system-packages"
+
+DEFAULT_BAND = 0.02
+
+# A target set whose weights add up to more than this is assumed to be in percent
+PERCENT_WEIGHT_SUM = 1.5
+
+# Trades smaller than this many dollars are dropped
+MIN_TRADE = 1.0
+
+
+def _target_number(value, symbol, field):
+    """A weight or band from the target file: a finite, non-negative number."""
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"Target {field} for {symbol} must be a number, got {json.dumps(value)}")
+    try:
+        number = float(value)
+    except ValueError:
+        raise ValueError(f"Target {field} for {symbol} must be a number, got {value!r}")
+    if not math.isfinite(number) or number < 0:
+        raise ValueError(f"Target {field} for {symbol} must be finite and not negative, got {value!r}")
+    return number
+
+
+def load_targets(path, default_band=DEFAULT_BAND):
+    """
+    {symbol: (weight, band)} from JSON: {"VTI": 60, ...}, {"VTI": {"weight": 60,
+    "band": 5}, ...} or {"targets": {...}, "bands": {...}}. Percent or fraction.
+    Weights and bands must be finite, non-negative numbers (ValueError otherwise).
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError("Target file must be a JSON object of symbol weights")
+    bands = {}
+    if 'targets' in data:
+        if not isinstance(data['targets'], dict) or not isinstance(data.get('bands', {}), dict):
+            raise ValueError("Target file 'targets' and 'bands' must be JSON objects")
+        bands = {str(s).upper(): _target_number(b, str(s).upper(), 'band')
+                 for s, b in data.get('bands', {}).items()}
+        data = data['targets']
+
+    weights = {}
+    for symbol, spec in data.items():
+        symbol = str(symbol).upper()
+        if isinstance(spec, dict):
+            if 'weight' not in spec:
+                raise ValueError(f"Target for {symbol} has no weight")
+            weights[symbol] = _target_number(spec['weight'], symbol, 'weight')
+            if 'band' in spec:
+                bands[symbol] = _target_number(spec['band'], symbol, 'band')
+        else:
+            weights[symbol] = _target_number(spec, symbol, 'weight')
+    if not weights:
+        raise ValueError("Target file has no weights")
+
+    in_percent = sum(weights.values()) > PERCENT_WEIGHT_SUM
+    scale = 100.0 if in_percent else 1.0
+    if abs(sum(weights.values()) / scale - 1.0) > 0.01:
+        print(f"Warning: target weights sum to {sum(weights.values()) / scale:.1%}", file=sys.stderr)
+    return {symbol: (weight / scale, bands[symbol] / scale if symbol in bands else default_band)
+            for symbol, weight in weights.items()}
+
+
+def parse_cash(entries):
+    """{account: cash} from repeated ACCOUNT=AMOUNT arguments."""
+    cash = {}
+    for entry in entries:
+        account, sep, amount = entry.rpartition('=')
+        if not sep or not account:
+            raise ValueError(f"Expected ACCOUNT=AMOUNT, got '{entry}'")
+        cash[account] = cash.get(account, 0.0) + float(amount)
+    return cash
+
+
+class Rebalancer:
+    """Greedy band-edge rebalancing over lot arrays."""
+
+    def __init__(self, lots, prices, targets, cash=None, as_of=None, band=DEFAULT_BAND):
+        self.as_of = as_of or date.today()
+        self.lots = lots
+        self.targets = targets
+
+        symbols = sorted(set(lots['symbols']) | set(targets))
+        self.symbols = symbols
+        self.symbol_index = {symbol: i for i, symbol in enumerate(symbols)}
+        self.codes = np.array([self.symbol_index[s] for s in lots['symbols']], dtype=np.int64)
+
+        quoted = np.array([(prices or {}).get(symbol, np.nan) for symbol in symbols])
+        lot_price = np.where(np.isnan(lots['price']), quoted[self.codes], lots['price'])
+        missing = sorted(set(lots['symbols'][np.isnan(lot_price)]))
+        if missing:
+            raise ValueError(f"No price for held symbols: {', '.join(missing)}")
+        # Symbol price: quoted, else the (first) lot price
+        self.price = quoted.copy()
+        unquoted = np.isnan(self.price[self.codes])
+        self.price[self.codes[unquoted]] = lot_price[unquoted]
+        self.lot_price = lot_price
+
+        self.accounts = sorted(set(lots['accounts']) | set(cash or {}))
+        self.account_index = {account: i for i, account in enumerate(self.accounts)}
+        self.lot_accounts = np.array([self.account_index[a] for a in lots['accounts']],
+                                     dtype=np.int64)
+        self.cash = np.array([(cash or {}).get(account, 0.0) for account in self.accounts])
+
+        self.remaining = lots['quantity'].astype(float).copy()
+        self.unit_basis = lots['cost_basis'] / lots['quantity']
+        self.long_term = (self.as_of.toordinal() - lots['acquired']) > LONG_TERM_DAYS
+        self.sheltered = lots['tax_advantaged']
+
+        self.target = np.zeros(len(symbols))
+        self.band = np.full(len(symbols), band)
+        for symbol, (weight, symbol_band) in targets.items():
+            self.target[self.symbol_index[symbol]] = weight
+            self.band[self.symbol_index[symbol]] = symbol_band
+
+        self.total = float((lots['quantity'] * lot_price).sum() + self.cash.sum())
+        if self.total <= 0:
+            raise ValueError("Portfolio has no value to rebalance")
+        self.buys = np.zeros((len(self.accounts), len(symbols)))
+        self.sold = np.zeros(len(self.remaining))
+        self.unfunded = {}
+        self.start_weights = self.weights()
+
+    def values(self):
+        """Dollar value per symbol, after the trades so far."""
+        held = np.bincount(self.codes, weights=self.remaining * self.lot_price,
+                           minlength=len(self.symbols))
+        return held + self.buys.sum(axis=0)
+
+    def weights(self):
+        return self.values() / self.total
+
+    def _sell(self, lot_ids, amount):
+        """Sell up to amount dollars from lot_ids in the given order; returns dollars raised."""
+        if amount <= 0 or not len(lot_ids):
+            return 0.0
+        available = self.remaining[lot_ids] * self.lot_price[lot_ids]
+        before = np.concatenate(([0.0], np.cumsum(available)[:-1]))
+        take = np.clip(amount - before, 0.0, available)
+        shares = np.where(available > 0, take / np.where(available > 0, available, 1.0), 0.0)
+        shares = shares * self.remaining[lot_ids]
+        self.remaining[lot_ids] -= shares
+        self.sold[lot_ids] += shares
+        np.add.at(self.cash, self.lot_accounts[lot_ids], take)
+        return float(take.sum())
+
+    def _hifo_order(self, lot_ids):
+        """Tax-advantaged lots first, then highest basis per share first."""
+        return lot_ids[np.lexsort((lot_ids, -self.unit_basis[lot_ids], ~self.sheltered[lot_ids]))]
+
+    def sell_overweight(self):
+        weights = self.weights()
+        excess = (weights - self.target - self.band) * self.total
+        for s in np.flatnonzero(excess > MIN_TRADE):
+            lot_ids = np.flatnonzero((self.codes == s) & (self.remaining > 0))
+            self._sell(self._hifo_order(lot_ids), excess[s])
+
+    def _fund(self, account, amount):
+        """Raise cash in one account from positions above target, least realized gain first."""
+        excess = np.maximum(self.values() - self.target * self.total, 0.0)
+        lot_ids = np.flatnonzero((self.lot_accounts == account) & (self.remaining > 0)
+                                 & (excess[self.codes] > MIN_TRADE))
+        if not len(lot_ids):
+            return 0.0
+        gain_ratio = np.where(self.sheltered[lot_ids], -np.inf,
+                              1.0 - self.unit_basis[lot_ids] / self.lot_price[lot_ids])
+        raised = 0.0
+        for lot in lot_ids[np.lexsort((lot_ids, gain_ratio))]:
+            s = self.codes[lot]
+            got = self._sell(np.array([lot]), min(amount - raised, excess[s]))
+            excess[s] -= got
+            raised += got
+            if amount - raised <= MIN_TRADE:
+                break
+        return raised
+
+    def buy_underweight(self):
+        weights = self.weights()
+        shortfall = (self.target - self.band - weights) * self.total
+        for s in np.flatnonzero(shortfall > MIN_TRADE)[np.argsort(-shortfall[shortfall > MIN_TRADE],
+                                                                  kind='stable')]:
+            if np.isnan(self.price[s]):
+                self.unfunded[self.symbols[s]] = round(float(shortfall[s]), 2)
+                continue
+            holding = np.bincount(self.lot_accounts[self.codes == s],
+                                  weights=self.remaining[self.codes == s],
+                                  minlength=len(self.accounts))
+            order = np.lexsort((np.arange(len(self.accounts)), -self.cash, -holding))
+            need = shortfall[s]
+            for account in order:
+                spend = min(self.cash[account], need)
+                self.cash[account] -= spend
+                self.buys[account, s] += spend
+                need -= spend
+                if need <= MIN_TRADE:
+                    break
+            for account in order:
+                if need <= MIN_TRADE:
+                    break
+                spend = min(self._fund(account, need), need)
+                self.cash[account] -= spend
+                self.buys[account, s] += spend
+                need -= spend
+            if need > MIN_TRADE:
+                self.unfunded[self.symbols[s]] = round(float(need), 2)
+
+    def run(self):
+        self.sell_overweight()
+        self.buy_underweight()
+        return self.report()
+
+    def _sell_trades(self):
+        trades = []
+        sold = np.flatnonzero(self.sold > 0)
+        for account, s in sorted({(self.lot_accounts[i], self.codes[i]) for i in sold}):
+            lot_ids = sold[(self.lot_accounts[sold] == account) & (self.codes[sold] == s)]
+            shares = self.sold[lot_ids]
+            proceeds = shares * self.lot_price[lot_ids]
+            gains = shares * (self.lot_price[lot_ids] - self.unit_basis[lot_ids])
+            taxable = ~self.sheltered[lot_ids]
+            if proceeds.sum() < MIN_TRADE:
+                continue
+            trades.append({
+                'account': self.accounts[account],
+                'symbol': self.symbols[s],
+                'action': 'sell',
+                'quantity': round(float(shares.sum()), 6),
+                'price': round(float(self.price[s]), 4),
+                'amount': round(float(proceeds.sum()), 2),
+                'realized_gain': round(float(gains[taxable].sum()), 2),
+                'lots': [
+                    {
+                        'acquired_date': date.fromordinal(int(self.lots['acquired'][i])).isoformat(),
+                        'quantity': round(float(self.sold[i]), 6),
+                        'cost_basis': round(float(self.sold[i] * self.unit_basis[i]), 2),
+                        'realized_gain': round(float(gain), 2) if not self.sheltered[i] else 0.0,
+                        'term': 'long' if self.long_term[i] else 'short',
+                    }
+                    for i, gain in zip(lot_ids, gains)
+                ],
+            })
+        return trades
+
+    def report(self):
+        trades = self._sell_trades()
+        for account, s in zip(*np.nonzero(self.buys >= MIN_TRADE)):
+            amount = self.buys[account, s]
+            trades.append({
+                'account': self.accounts[account],
+                'symbol': self.symbols[s],
+                'action': 'buy',
+                'quantity': round(float(amount / self.price[s]), 6),
+                'price': round(float(self.price[s]), 4),
+                'amount': round(float(amount), 2),
+            })
+
+        taxable_sold = (self.sold > 0) & ~self.sheltered
+        gains = self.sold * (self.lot_price - self.unit_basis)
+        after = self.weights()
+        turnover = sum(trade['amount'] for trade in trades)
+        return {
+            'as_of': self.as_of.isoformat(),
+            'total_value': round(self.total, 2),
+            'trades': trades,
+            'summary': {
+                'trades': len(trades),
+                'turnover': round(turnover, 2),
+                'turnover_pct': round(turnover / self.total * 100, 2),
+                'realized_gain_short_term': round(float(gains[taxable_sold & ~self.long_term].sum()), 2),
+                'realized_gain_long_term': round(float(gains[taxable_sold & self.long_term].sum()), 2),
+                'realized_gain_total': round(float(gains[taxable_sold].sum()), 2),
+            },
+            'allocation': [
+                {
+                    'symbol': symbol,
+                    'target_pct': round(float(self.target[s]) * 100, 2),
+                    'band_pct': round(float(self.band[s]) * 100, 2),
+                    'current_pct': round(float(self.start_weights[s]) * 100, 2),
+                    'after_pct': round(float(after[s]) * 100, 2),
+                    'in_band': bool(abs(after[s] - self.target[s]) <= self.band[s] + 1e-9),
+                }
+                for s, symbol in enumerate(self.symbols)
+            ],
+            'cash_after': {account: round(float(self.cash[a]), 2)
+                           for a, account in enumerate(self.accounts)},
+            'unfunded_buys': self.unfunded,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Lot-aware trades that bring a household back inside its target bands.'
+    )
+    parser.add_argument('lots', help='Open lots CSV or JSON (see tax_loss_harvest.py), with '
+                                     'account type to identify tax-advantaged accounts')
+    parser.add_argument('targets', help='Target weights JSON {symbol: weight} (percent or fraction)')
+    parser.add_argument('--prices', help='Current prices: holdings JSON, {symbol: price} JSON '
+                                         'or CSV with symbol and price columns')
+    parser.add_argument('--cash', action='append', default=[], metavar='ACCOUNT=AMOUNT',
+                        help='Uninvested cash in an account (repeatable)')
+    parser.add_argument('--band', type=float, default=DEFAULT_BAND * 100,
+                        help=f'Default tolerance band in percentage points '
+                             f'(default {DEFAULT_BAND * 100:g})')
+    parser.add_argument('--as-of', help='Trade date for holding periods YYYY-MM-DD (default today)')
+    args = parser.parse_args()
+
+    if np is None:
+        print(f"Error: {NUMPY_MISSING}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        lots = load_lots(args.lots)
+        prices = load_prices(args.prices) if args.prices else None
+        targets = load_targets(args.targets, args.band / 100)
+        as_of = parse_flow_date(args.as_of) if args.as_of else None
+        result = Rebalancer(lots, prices, targets, parse_cash(args.cash), as_of,
+                            args.band / 100).run()
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
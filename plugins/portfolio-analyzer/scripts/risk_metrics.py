@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+"""
+Covariance-based risk metrics from a local price panel.
+
+The panel lives in a directory (data/price_panel/ by default):
+- prices.f64   raw float64 matrix, one row per date and one column per symbol,
+               opened with numpy.memmap so only the rows needed are read
+- panel.json   sidecar with the symbol and date labels
+- ewma.npz     EWMA covariance state: the covariance matrix of daily returns,
+               the last prices, the decay factor and the date it is as of
+
+Rows are dates so that adding a trading day is a single append to the end of
+prices.f64. The EWMA covariance (RiskMetrics, zero-mean returns) is updated
+from that one day's returns: cov = lambda * cov + (1 - lambda) * r r^T.
+A missing price is carried forward from the last known one, both in the EWMA
+state and in the return windows used for historical VaR, so the two see the
+same return series. The update command saves the state before appending to
+the panel; the state's date lets a re-run after a crash finish the append
+without folding the day in twice.
+
+Portfolio volatility, beta to a benchmark, marginal and component risk
+contributions, and parametric / historical VaR are then a few matrix
+products against the current covariance and a window of recent returns.
+"""
+
+import os
+import csv
+import sys
+import json
+import argparse
+from pathlib import Path
+from statistics import NormalDist
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from parse_csv_portfolio import clean_numeric_value, normalize_header
+from xirr import parse_flow_date
+
+NUMPY_MISSING = "numpy not installed. Install with: pip install numpy --break-system-packages"
+
+PANEL_DIR = Path('data/price_panel')
+PRICES_NAME = 'prices.f64'
+SIDECAR_NAME = 'panel.json'
+STATE_NAME = 'ewma.npz'
+
+EWMA_LAMBDA = 0.94
+TRADING_DAYS = 252
+VAR_CONFIDENCE = 0.95
+HISTORICAL_WINDOW = 250
+
+# Annualized volatility above these levels is flagged by identify_risk_factors
+VOLATILITY_THRESHOLDS = {'high': 0.30, 'medium': 0.20}
+
+
+def _atomic_json(path, data):
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_price_csv(path):
+    """
+    Prices from a CSV in long (date, symbol, price/close) or wide (date, then
+    one column per symbol) layout. Returns (dates, symbols, matrix), with
+    rows in date order and dates as ISO strings whatever the input format.
+    """
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        rows = list(csv.reader(f))
+    if len(rows) < 2:
+        raise ValueError("Price CSV has no data rows")
+    header = normalize_header(rows[0])
+    if 'date' not in header:
+        raise ValueError("Price CSV needs a date column")
+    date_col = header.index('date')
+
+    if 'symbol' in header:
+        symbol_col = header.index('symbol')
+        price_col = next((header.index(name) for name in ('close', 'adj close', 'price')
+                          if name in header), None)
+        if price_col is None:
+            raise ValueError("Long-format price CSV needs a close or price column")
+        prices = {}
+        for row in rows[1:]:
+            value = clean_numeric_value(row[price_col]) if price_col < len(row) else None
+            if value is not None:
+                day = parse_flow_date(row[date_col])
+                prices.setdefault(day, {})[row[symbol_col].strip().upper()] = value
+        dates = sorted(prices)
+        symbols = sorted({symbol for day in prices.values() for symbol in day})
+        index = {symbol: i for i, symbol in enumerate(symbols)}
+        matrix = np.full((len(dates), len(symbols)), np.nan)
+        for row, day in enumerate(dates):
+            for symbol, value in prices[day].items():
+                matrix[row, index[symbol]] = value
+        return [day.isoformat() for day in dates], symbols, matrix
+
+    symbols = [cell.strip().upper() for i, cell in enumerate(rows[0]) if i != date_col]
+    data = sorted(((parse_flow_date(row[date_col]), row) for row in rows[1:]
+                   if row and row[date_col].strip()), key=lambda item: item[0])
+    matrix = np.array([[clean_numeric_value(cell) if cell else None
+                        for i, cell in enumerate(row) if i != date_col] for _, row in data],
+                      dtype=float)
+    return [day.isoformat() for day, _ in data], symbols, matrix
+
+
+def carry_forward(prices):
+    """Fill each missing price with the last known price above it in its column."""
+    prices = np.asarray(prices, dtype=float)
+    rows = np.where(np.isnan(prices), 0, np.arange(len(prices))[:, None])
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return prices[rows, np.arange(prices.shape[1])]
+
+
+def daily_returns(prices):
+    """
+    Simple returns between consecutive rows, with missing prices carried
+    forward: a gap gives a zero return and the next price is measured against
+    the last known one. Symbols not yet priced give a zero return.
+    """
+    prices = carry_forward(prices)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = prices[1:] / prices[:-1] - 1
+    returns[~np.isfinite(returns)] = 0.0
+    return returns
+
+
+class PricePanel:
+    """Memory-mapped dates x symbols price matrix plus its JSON sidecar."""
+
+    def __init__(self, path=PANEL_DIR):
+        self.path = Path(path)
+        sidecar = self.path / SIDECAR_NAME
+        if not sidecar.exists():
+            raise ValueError(f"No price panel in {self.path} (run 'build' first)")
+        with open(sidecar, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        self.symbols = meta['symbols']
+        self.dates = meta['dates']
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+    @property
+    def prices(self):
+        return np.memmap(self.path / PRICES_NAME, dtype=np.float64, mode='r',
+                         shape=(len(self.dates), len(self.symbols)))
+
+    @classmethod
+    def create(cls, path, dates, symbols, matrix):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        np.ascontiguousarray(matrix, dtype=np.float64).tofile(path / PRICES_NAME)
+        _atomic_json(path / SIDECAR_NAME, {'symbols': list(symbols), 'dates': list(dates)})
+        return cls(path)
+
+    def day_row(self, day, prices):
+        """
+        Check that `day` comes after the last panel date and lay out its prices
+        ({symbol: price}) as a panel row; unknown symbols are ignored. The day
+        may be in any format parse_flow_date accepts. Returns (ISO day, row).
+        """
+        day = parse_flow_date(day)
+        if self.dates and day <= parse_flow_date(self.dates[-1]):
+            raise ValueError(f"Date {day.isoformat()} is not after the last panel date "
+                             f"({self.dates[-1]})")
+        row = np.full(len(self.symbols), np.nan)
+        for symbol, value in prices.items():
+            i = self.index.get(symbol.upper())
+            if i is not None:
+                row[i] = value
+        return day.isoformat(), row
+
+    def append_day(self, day, prices):
+        """Append one date's prices ({symbol: price}); see day_row. Returns the row."""
+        day, row = self.day_row(day, prices)
+        size = len(self.dates) * len(self.symbols) * row.itemsize
+        with open(self.path / PRICES_NAME, 'r+b') as f:
+            # Drop a row written by an append that crashed before the sidecar
+            f.truncate(size)
+            f.seek(size)
+            row.tofile(f)
+        self.dates.append(day)
+        _atomic_json(self.path / SIDECAR_NAME, {'symbols': self.symbols, 'dates': self.dates})
+        return row
+
+    def recent_returns(self, window):
+        """
+        Daily returns for the last `window` days. Reads only those rows, plus
+        earlier blocks of rows for symbols unpriced at the start of the window,
+        so that their last known price is carried into it as the EWMA state does.
+        """
+        prices = self.prices
+        start = max(0, len(self.dates) - window - 1)
+        block = np.array(prices[start:])
+        missing = np.isnan(block[0]) if len(block) else np.zeros(0, dtype=bool)
+        end = start
+        while end > 0 and missing.any():
+            begin = max(0, end - window - 1)
+            last_known = carry_forward(prices[begin:end])[-1]
+            found = missing & ~np.isnan(last_known)
+            block[0, found] = last_known[found]
+            missing &= ~found
+            end = begin
+        return daily_returns(block)
+
+
+class EwmaCovariance:
+    """Exponentially weighted covariance of daily returns, updated one day at a time."""
+
+    def __init__(self, n_symbols, lam=EWMA_LAMBDA):
+        self.lam = lam
+        self.cov = np.zeros((n_symbols, n_symbols))
+        self.last_prices = np.full(n_symbols, np.nan)
+        self.days = 0
+        self.as_of = None
+
+    def update(self, prices, day=None):
+        """Fold in one day's prices; the first call only records them."""
+        prices = np.asarray(prices, dtype=float)
+        if self.days or not np.isnan(self.last_prices).all():
+            returns = daily_returns(np.vstack([self.last_prices, prices]))[0]
+            self.cov *= self.lam
+            self.cov += (1 - self.lam) * np.outer(returns, returns)
+            self.days += 1
+        # Carry the last known price forward through gaps
+        self.last_prices = np.where(np.isnan(prices), self.last_prices, prices)
+        if day is not None:
+            self.as_of = day
+
+    def fit(self, prices, dates=None):
+        """Run the recursion over a price history, one row at a time."""
+        for row in prices:
+            self.update(row)
+        if dates:
+            self.as_of = dates[-1]
+        return self
+
+    def save(self, path):
+        tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npz")
+        np.savez(tmp_path, cov=self.cov, last_prices=self.last_prices,
+                 lam=self.lam, days=self.days, as_of=self.as_of or '')
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            state = cls(len(data['last_prices']), float(data['lam']))
+            state.cov = data['cov']
+            state.last_prices = data['last_prices']
+            state.days = int(data['days'])
+            # States saved before the date was recorded have no as_of
+            state.as_of = (str(data['as_of']) or None) if 'as_of' in data else None
+        return state
+
+
+def update_panel(panel, state, day, prices):
+    """
+    Add one day to the EWMA state and the panel. The state is saved first; a
+    state already at this date means an earlier run stopped before its append,
+    so only the append is redone. Returns the appended row.
+    """
+    day, row = panel.day_row(day, prices)
+    last_date = panel.dates[-1] if panel.dates else None
+    if state.as_of is not None and state.as_of not in (day, last_date):
+        fix = (f"re-run update for {state.as_of}" if last_date is None or state.as_of > last_date
+               else "rebuild it with 'build'")
+        raise ValueError(f"EWMA state is as of {state.as_of} but the panel ends at "
+                         f"{last_date}; {fix}")
+    if state.as_of != day:
+        state.update(row, day)
+        state.save(panel.path / STATE_NAME)
+    return panel.append_day(day, prices)
+
+
+def portfolio_weights(holdings, panel):
+    """Value weights over panel symbols, plus the value not covered by the panel."""
+    weights = np.zeros(len(panel.symbols))
+    uncovered = {}
+    for holding in holdings:
+        value = holding.get('value')
+        if not isinstance(value, (int, float)) or value <= 0:
+            continue
+        symbol = str(holding.get('symbol') or '').strip().upper()
+        i = panel.index.get(symbol)
+        if i is None:
+            uncovered[symbol or 'Unknown'] = uncovered.get(symbol or 'Unknown', 0) + value
+        else:
+            weights[i] += value
+    return weights, uncovered
+
+
+def portfolio_risk(holdings, panel, state, benchmark=None, confidence=VAR_CONFIDENCE,
+                   window=HISTORICAL_WINDOW):
+    """
+    Volatility, beta, risk contributions and one-day VaR for the covered part
+    of a portfolio, using the EWMA covariance and the last `window` days.
+    """
+    values, uncovered = portfolio_weights(holdings, panel)
+    covered_value = values.sum()
+    if covered_value <= 0:
+        raise ValueError("No holdings match symbols in the price panel")
+    w = values / covered_value
+
+    cov_w = state.cov @ w
+    variance = float(w @ cov_w)
+    sigma = np.sqrt(variance)
+    z = NormalDist().inv_cdf(confidence)
+
+    returns = panel.recent_returns(window)
+    portfolio_returns = returns @ w
+    historical_var = None
+    if len(portfolio_returns):
+        historical_var = -float(np.quantile(portfolio_returns, 1 - confidence)) * covered_value
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        marginal = cov_w / sigma if sigma > 0 else np.zeros_like(w)
+    component = w * marginal
+    held = np.flatnonzero(w)
+    order = held[np.argsort(-component[held], kind='stable')]
+
+    risk = {
+        'covered_value': round(float(covered_value), 2),
+        'uncovered_value': round(sum(uncovered.values()), 2),
+        'uncovered_symbols': sorted(uncovered),
+        'daily_volatility': round(float(sigma), 6),
+        'annualized_volatility': round(float(sigma * np.sqrt(TRADING_DAYS)), 6),
+        'confidence': confidence,
+        'parametric_var': round(float(z * sigma * covered_value), 2),
+        'historical_var': round(historical_var, 2) if historical_var is not None else None,
+        'historical_days': int(len(portfolio_returns)),
+        'risk_contributions': [
+            {
+                'symbol': panel.symbols[i],
+                'weight': round(float(w[i]), 6),
+                'marginal_contribution': round(float(marginal[i]), 6),
+                'risk_contribution_pct': round(float(component[i] / sigma * 100), 2) if sigma > 0 else 0,
+            }
+            for i in order
+        ],
+        'ewma_lambda': state.lam,
+        'as_of': panel.dates[-1] if panel.dates else None,
+    }
+
+    if benchmark:
+        b = panel.index.get(benchmark.upper())
+        if b is None:
+            raise ValueError(f"Benchmark {benchmark} is not in the price panel")
+        bench_var = state.cov[b, b]
+        risk['benchmark'] = benchmark.upper()
+        risk['beta'] = round(float(cov_w[b] / bench_var), 4) if bench_var > 0 else None
+    return risk
+
+
+def analyze_panel_risk(holdings, panel_dir=PANEL_DIR, benchmark=None, confidence=VAR_CONFIDENCE):
+    """Entry point for calculate_portfolio_metrics: load the panel and state, then portfolio_risk."""
+    if np is None:
+        raise ImportError(NUMPY_MISSING)
+    panel = PricePanel(panel_dir)
+    state = EwmaCovariance.load(panel.path / STATE_NAME)
+    return portfolio_risk(holdings, panel, state, benchmark, confidence)
+
+
+def volatility_concerns(risk):
+    """Risk-factor entries (identify_risk_factors format) from a risk section."""
+    concerns = []
+    volatility = risk.get('annualized_volatility')
+    if volatility is None:
+        return concerns
+    for severity in ('high', 'medium'):
+        if volatility > VOLATILITY_THRESHOLDS[severity]:
+            concerns.append({
+                'type': 'volatility',
+                'severity': severity,
+                'message': f"Estimated annualized volatility is {volatility:.1%} "
+                           f"(>{VOLATILITY_THRESHOLDS[severity]:.0%} threshold)"
+            })
+            break
+    contributions = risk.get('risk_contributions') or []
+    if contributions and contributions[0]['risk_contribution_pct'] > 40:
+        top = contributions[0]
+        concerns.append({
+            'type': 'risk_concentration',
+            'severity': 'medium',
+            'message': f"{top['symbol']} contributes {top['risk_contribution_pct']:.1f}% of "
+                       f"portfolio volatility at {top['weight']:.1%} weight"
+        })
+    return concerns
+
+
+def load_day_prices(path):
+    """One day's prices from JSON {symbol: price} or a CSV with symbol and price columns."""
+    if Path(path).suffix.lower() != '.csv':
+        with open(path, 'r', encoding='utf-8') as f:
+            return {str(k).upper(): float(v) for k, v in json.load(f).items()}
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        rows = list(csv.reader(f))
+    header = normalize_header(rows[0]) if rows else []
+    if 'symbol' not in header:
+        raise ValueError("Price CSV needs a symbol column")
+    symbol_col = header.index('symbol')
+    price_col = next((header.index(name) for name in ('close', 'adj close', 'price') if name in header),
+                     None)
+    if price_col is None:
+        raise ValueError("Price CSV needs a close or price column")
+    prices = {}
+    for row in rows[1:]:
+        value = clean_numeric_value(row[price_col]) if price_col < len(row) else None
+        if value is not None:
+            prices[row[symbol_col].strip().upper()] = value
+    return prices
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Covariance-based portfolio risk from a local memory-mapped price panel.'
+    )
+    parser.add_argument('--panel', default=str(PANEL_DIR),
+                        help=f'Price panel directory (default {PANEL_DIR})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help='Create the panel and EWMA state from a price history CSV')
+    build.add_argument('prices_csv', help='Long (date,symbol,close) or wide (date,SYM1,SYM2,...) CSV')
+    build.add_argument('--lambda', dest='lam', type=float, default=EWMA_LAMBDA,
+                       help=f'EWMA decay factor (default {EWMA_LAMBDA})')
+
+    update = commands.add_parser('update', help='Append one day of prices and update the covariance')
+    update.add_argument('prices', help='JSON {symbol: price} or CSV with symbol and price columns')
+    update.add_argument('--date', required=True, help='Trading date (YYYY-MM-DD or MM/DD/YYYY)')
+
+    analyze = commands.add_parser('analyze', help='Risk metrics for a holdings file')
+    analyze.add_argument('holdings_json', help='Holdings JSON ({"holdings": [...]})')
+    analyze.add_argument('--benchmark', help='Panel symbol to compute beta against (e.g. SPY)')
+    analyze.add_argument('--confidence', type=float, default=VAR_CONFIDENCE,
+                         help=f'VaR confidence level (default {VAR_CONFIDENCE})')
+    analyze.add_argument('--window', type=int, default=HISTORICAL_WINDOW,
+                         help=f'Days of history for historical VaR (default {HISTORICAL_WINDOW})')
+    args = parser.parse_args()
+
+    if np is None:
+        print(f"Error: {NUMPY_MISSING}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        if args.command == 'build':
+            dates, symbols, matrix = load_price_csv(args.prices_csv)
+            panel = PricePanel.create(args.panel, dates, symbols, matrix)
+            state = EwmaCovariance(len(symbols), args.lam).fit(panel.prices, dates)
+            state.save(panel.path / STATE_NAME)
+            result = {'symbols': len(symbols), 'dates': len(dates),
+                      'first_date': dates[0], 'last_date': dates[-1]}
+        elif args.command == 'update':
+            panel = PricePanel(args.panel)
+            state = EwmaCovariance.load(panel.path / STATE_NAME)
+            row = update_panel(panel, state, args.date, load_day_prices(args.prices))
+            result = {'date': panel.dates[-1], 'symbols_priced': int(np.count_nonzero(~np.isnan(row))),
+                      'days': len(panel.dates)}
+        else:
+            with open(args.holdings_json, 'r') as f:
+                holdings = json.load(f).get('holdings', [])
+            panel = PricePanel(args.panel)
+            state = EwmaCovariance.load(panel.path / STATE_NAME)
+            result = portfolio_risk(holdings, panel, state, args.benchmark, args.confidence,
+                                    args.window)
+            result['risk_factors'] = volatility_concerns(result)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
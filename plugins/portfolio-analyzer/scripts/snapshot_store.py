@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Append-only store of dated holdings snapshots with incremental performance metrics.
+
+Each appended snapshot is written once as a compressed columnar file
+(<date>.npz: account, symbol, value, cost_basis, quantity) and listed in
+index.json. Alongside the index the store keeps a small state file with, for
+the whole portfolio and for every account: the last value, the time-weighted
+growth index, its running peak and maximum drawdown, and a ring buffer of the
+most recent period returns. Appending a snapshot updates that state from the
+new snapshot alone, so the cost of a daily update does not grow with history.
+
+Period returns are time-weighted: r = (V_t - V_{t-1} - F_t) / V_{t-1}, where
+F_t is the net external flow (contributions positive) supplied with --flows.
+The portfolio return only covers accounts reported in both the previous
+and the current snapshot, so an account that appears, disappears or comes
+back moves the portfolio value like an external flow rather than a return;
+accounts missing from a snapshot, or with no valued holding in it, are
+treated as not reported for that period (listed as unpriced_accounts).
+"""
+
+import os
+import sys
+import json
+import argparse
+from datetime import date
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+NUMPY_MISSING = "numpy not installed. Install with: pip install numpy --break-system-packages"
+
+STORE_DIR = Path('history/store')
+INDEX_NAME = 'index.json'
+STORE_VERSION = 1
+
+# Period returns kept for rolling volatility
+ROLLING_WINDOW = 20
+
+# State row holding portfolio-level figures
+PORTFOLIO_LABEL = '__portfolio__'
+
+UNASSIGNED_ACCOUNT = 'Unassigned'
+
+
+def _as_float(value):
+    if isinstance(value, (int, float)):
+        return float(value)
+    return float('nan')
+
+
+def snapshot_columns(holdings):
+    """Columnar arrays for one snapshot's holdings."""
+    return {
+        'account': np.array([str(h.get('account') or UNASSIGNED_ACCOUNT) for h in holdings], dtype=str),
+        'symbol': np.array([str(h.get('symbol') or h.get('description') or '') for h in holdings],
+                           dtype=str),
+        'value': np.array([_as_float(h.get('value')) for h in holdings], dtype=float),
+        'cost_basis': np.array([_as_float(h.get('cost_basis')) for h in holdings], dtype=float),
+        'quantity': np.array([_as_float(h.get('quantity')) for h in holdings], dtype=float),
+    }
+
+
+def account_values(columns):
+    """
+    Total value per account (sorted labels). Holdings without a value are
+    skipped; an account with no valued holding at all gets NaN, not zero.
+    """
+    labels, inverse = np.unique(columns['account'], return_inverse=True)
+    values = columns['value']
+    priced = ~np.isnan(values)
+    totals = np.bincount(inverse, weights=np.where(priced, values, 0.0), minlength=len(labels))
+    totals[np.bincount(inverse[priced], minlength=len(labels)) == 0] = np.nan
+    return labels, totals
+
+
+def _atomic_savez(path, **arrays):
+    tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npz")
+    np.savez_compressed(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+
+
+def _atomic_json(path, data):
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+class PerformanceState:
+    """
+    Running per-label performance state (label 0 is the whole portfolio).
+
+    All fields are arrays aligned with `labels`; `returns` is a ring buffer of
+    shape (labels, window) filled with NaN where no return was observed, and
+    `reported` marks the accounts present in the latest snapshot.
+    """
+
+    FIELDS = ('last_value', 'growth', 'peak', 'max_drawdown', 'returns', 'gaps', 'reported')
+
+    def __init__(self, window=ROLLING_WINDOW):
+        self.window = window
+        self.labels = np.array([PORTFOLIO_LABEL], dtype=str)
+        self.last_value = np.full(1, np.nan)
+        self.growth = np.ones(1)
+        self.peak = np.ones(1)
+        self.max_drawdown = np.zeros(1)
+        self.returns = np.full((1, window), np.nan)
+        self.gaps = np.full(window, np.nan)  # days between snapshots, same ring positions
+        self.reported = np.ones(1, dtype=bool)
+        self.slot = 0
+        self.last_date = None
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            state = cls(int(data['window']))
+            state.labels = data['labels']
+            for field in cls.FIELDS:
+                if field in data.files:
+                    setattr(state, field, data[field])
+            if 'reported' not in data.files:  # state written before reported was tracked
+                state.reported = ~np.isnan(state.last_value)
+            state.slot = int(data['slot'])
+            state.last_date = str(data['last_date']) or None
+        return state
+
+    def save(self, path):
+        _atomic_savez(path, labels=self.labels, window=self.window, slot=self.slot,
+                      last_date=self.last_date or '',
+                      **{field: getattr(self, field) for field in self.FIELDS})
+
+    def _align(self, labels):
+        """Row index for each label, adding rows for accounts seen for the first time."""
+        new = np.setdiff1d(labels, self.labels[1:], assume_unique=True)
+        if len(new):
+            n = len(new)
+            self.labels = np.concatenate([self.labels, new])
+            self.last_value = np.concatenate([self.last_value, np.full(n, np.nan)])
+            self.growth = np.concatenate([self.growth, np.ones(n)])
+            self.peak = np.concatenate([self.peak, np.ones(n)])
+            self.max_drawdown = np.concatenate([self.max_drawdown, np.zeros(n)])
+            self.returns = np.vstack([self.returns, np.full((n, self.window), np.nan)])
+            self.reported = np.concatenate([self.reported, np.zeros(n, dtype=bool)])
+        order = np.argsort(self.labels[1:], kind='stable')
+        positions = np.searchsorted(self.labels[1:], labels, sorter=order)
+        return order[positions] + 1
+
+    def update(self, snapshot_date, labels, values, flows):
+        """
+        Apply one snapshot: per-account values (and flows) for `labels`, plus
+        the portfolio total in row 0. Touches only the rows being reported.
+        """
+        account_rows = self._align(labels)
+        # The portfolio return covers accounts reported last time and now: an
+        # account that is new or back enters like a contribution, and one that
+        # is missing leaves like a withdrawal of its last value
+        continuing = self.reported[account_rows]
+        rows = np.concatenate([[0], account_rows])
+        current = np.concatenate([[values.sum()], values])
+        flow = np.concatenate([[flows[continuing].sum() + values[~continuing].sum()], flows])
+
+        previous = self.last_value[rows]
+        previous[0] = self.last_value[account_rows[continuing]].sum()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            period_return = (current - previous - flow) / previous
+        period_return[~(previous > 0)] = np.nan  # first or empty period: no return
+
+        observed = ~np.isnan(period_return)
+        self.growth[rows[observed]] *= 1 + period_return[observed]
+        self.peak[rows] = np.maximum(self.peak[rows], self.growth[rows])
+        drawdown = self.growth[rows] / self.peak[rows] - 1
+        self.max_drawdown[rows] = np.minimum(self.max_drawdown[rows], drawdown)
+        self.last_value[rows] = current
+        self.reported[:] = False
+        self.reported[rows] = True
+
+        # Every row gets the new slot: NaN for accounts not reported this period
+        self.returns[:, self.slot] = np.nan
+        self.returns[rows, self.slot] = period_return
+        if self.last_date:
+            self.gaps[self.slot] = (date.fromisoformat(snapshot_date)
+                                    - date.fromisoformat(self.last_date)).days
+        self.slot = (self.slot + 1) % self.window
+        self.last_date = snapshot_date
+        return period_return
+
+    def metrics(self, rows=None):
+        """TWR, annualized rolling volatility and max drawdown for the given rows."""
+        rows = np.arange(len(self.labels)) if rows is None else np.asarray(rows)
+        returns = self.returns[rows]
+        counts = np.count_nonzero(~np.isnan(returns), axis=1)
+        volatility = np.full(len(rows), np.nan)
+        enough = counts >= 2
+        if enough.any():
+            with np.errstate(invalid='ignore'):
+                volatility[enough] = np.nanstd(returns[enough], axis=1, ddof=1)
+        gaps = self.gaps[~np.isnan(self.gaps)]
+        periods_per_year = 365.25 / gaps.mean() if len(gaps) and gaps.mean() > 0 else np.nan
+        return {
+            'twr': self.growth[rows] - 1,
+            'volatility': volatility * np.sqrt(periods_per_year),
+            'max_drawdown': self.max_drawdown[rows],
+            'last_value': self.last_value[rows],
+        }
+
+
+def _rounded(value, digits=6):
+    value = float(value)
+    return None if np.isnan(value) else round(value, digits)
+
+
+class SnapshotStore:
+    """Directory of dated snapshot files plus index.json and the running state."""
+
+    def __init__(self, path=STORE_DIR, window=ROLLING_WINDOW):
+        self.path = Path(path)
+        self.index_path = self.path / INDEX_NAME
+        if self.index_path.exists():
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+        else:
+            self.index = {'version': STORE_VERSION, 'window': window, 'state_file': None,
+                          'snapshots': []}
+
+    def state(self):
+        if self.index['state_file']:
+            return PerformanceState.load(self.path / self.index['state_file'])
+        return PerformanceState(self.index['window'])
+
+    @property
+    def last_date(self):
+        return self.index['snapshots'][-1]['date'] if self.index['snapshots'] else None
+
+    def append(self, snapshot_date, holdings, flows=None):
+        """
+        Store one snapshot and update the running metrics. Dates must be ISO
+        (YYYY-MM-DD, or any form date.fromisoformat accepts, stored as
+        YYYY-MM-DD) and strictly later than the last stored snapshot.
+        """
+        parsed = date.fromisoformat(str(snapshot_date))
+        snapshot_date = parsed.isoformat()
+        if self.last_date and parsed <= date.fromisoformat(self.last_date):
+            raise ValueError(f"Snapshot date {snapshot_date} is not after the last stored "
+                             f"snapshot ({self.last_date}); the store is append-only")
+
+        columns = snapshot_columns(holdings)
+        labels, values = account_values(columns)
+        flows = flows or {}
+        unknown = set(flows) - set(labels.tolist())
+        if unknown:
+            raise ValueError(f"Flows given for accounts not in the snapshot: {', '.join(sorted(unknown))}")
+        account_flows = np.array([float(flows.get(label, 0.0)) for label in labels.tolist()])
+
+        # Accounts with no valued holding are left out of the period like
+        # missing accounts, rather than counted as worthless
+        priced = ~np.isnan(values)
+        state = self.state()
+        period_return = state.update(snapshot_date, labels[priced], values[priced],
+                                     account_flows[priced])
+        portfolio = state.metrics([0])
+
+        # Data files first; the index write is the commit point
+        self.path.mkdir(parents=True, exist_ok=True)
+        snapshot_file = f"{snapshot_date}.npz"
+        state_file = f"state-{snapshot_date}.npz"
+        _atomic_savez(self.path / snapshot_file, **columns)
+        state.save(self.path / state_file)
+
+        entry = {
+            'date': snapshot_date,
+            'file': snapshot_file,
+            'positions': len(holdings),
+            'accounts': len(labels),
+            'total_value': round(float(values[priced].sum()), 2),
+            'net_flow': round(float(account_flows[priced].sum()), 2),
+            'period_return': _rounded(period_return[0]),
+            'twr': _rounded(portfolio['twr'][0]),
+            'rolling_volatility': _rounded(portfolio['volatility'][0]),
+            'max_drawdown': _rounded(portfolio['max_drawdown'][0]),
+        }
+        if not priced.all():
+            entry['unpriced_accounts'] = labels[~priced].tolist()
+        previous_state = self.index['state_file']
+        self.index['snapshots'].append(entry)
+        self.index['state_file'] = state_file
+        _atomic_json(self.index_path, self.index)
+        if previous_state:
+            try:
+                (self.path / previous_state).unlink()
+            except FileNotFoundError:
+                pass
+        return entry
+
+    def load_snapshot(self, snapshot_date):
+        """Columns of one stored snapshot."""
+        snapshot_date = date.fromisoformat(str(snapshot_date)).isoformat()
+        with np.load(self.path / f"{snapshot_date}.npz") as data:
+            return {name: data[name] for name in data.files}
+
+    def account_metrics(self, accounts=None):
+        """Latest per-account metrics from the running state (no history scan)."""
+        state = self.state()
+        labels = state.labels[1:].tolist()
+        rows = [i + 1 for i, label in enumerate(labels) if accounts is None or label in accounts]
+        metrics = state.metrics(rows)
+        return [
+            {
+                'account': str(state.labels[row]),
+                'last_value': _rounded(metrics['last_value'][i], 2),
+                'twr': _rounded(metrics['twr'][i]),
+                'rolling_volatility': _rounded(metrics['volatility'][i]),
+                'max_drawdown': _rounded(metrics['max_drawdown'][i]),
+            }
+            for i, row in enumerate(rows)
+        ]
+
+
+def load_flows(path):
+    """Net external flows per account from a JSON object {account: amount}."""
+    if not path:
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        flows = json.load(f)
+    if not isinstance(flows, dict):
+        raise ValueError("Flows file must be a JSON object mapping account to net flow")
+    return {str(account): float(amount) for account, amount in flows.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Append dated holdings snapshots to a local store and track TWR, '
+                    'rolling volatility and max drawdown incrementally.'
+    )
+    parser.add_argument('--store', default=str(STORE_DIR),
+                        help=f'Snapshot store directory (default {STORE_DIR})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    append = commands.add_parser('append', help='Append one holdings snapshot')
+    append.add_argument('holdings_json', help='Holdings JSON ({"holdings": [...]})')
+    append.add_argument('--date', help='Snapshot date YYYY-MM-DD (default: the file\'s as_of_date)')
+    append.add_argument('--flows', help='JSON object of net external flow per account for the period')
+    append.add_argument('--window', type=int, default=ROLLING_WINDOW,
+                        help=f'Rolling volatility window in periods, fixed when the store is '
+                             f'created (default {ROLLING_WINDOW})')
+
+    report = commands.add_parser('report', help='Show stored history and per-account metrics')
+    report.add_argument('--account', action='append',
+                        help='Limit per-account metrics to this account (repeatable)')
+    args = parser.parse_args()
+
+    if np is None:
+        print(f"Error: {NUMPY_MISSING}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.command == 'append':
+        try:
+            with open(args.holdings_json, 'r') as f:
+                data = json.load(f)
+            snapshot_date = args.date or data.get('as_of_date')
+            if not snapshot_date:
+                raise ValueError("No snapshot date: pass --date or include as_of_date in the input")
+            holdings = data.get('holdings', [])
+            if not holdings:
+                raise ValueError("No holdings found in input JSON")
+            store = SnapshotStore(args.store, args.window)
+            entry = store.append(snapshot_date, holdings, load_flows(args.flows))
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(json.dumps(entry, indent=2))
+        return
+
+    store = SnapshotStore(args.store)
+    if not store.index['snapshots']:
+        print(f"Error: No snapshots stored in {store.path}", file=sys.stderr)
+        sys.exit(1)
+    result = {
+        'snapshots': store.index['snapshots'],
+        'accounts': store.account_metrics(set(args.account) if args.account else None),
+    }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
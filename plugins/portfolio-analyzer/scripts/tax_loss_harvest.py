@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Tax-loss harvesting candidates from lot-level holdings.
+
+Open lots (symbol, account, acquisition date, quantity, cost basis) are read
+from a CSV or JSON file into column arrays and valued against current prices
+in one vectorized pass. Lots whose account type is tax-advantaged (IRA,
+Roth, 401(k), HSA, ...) are never candidates, but their purchases still count
+as replacement shares.
+
+Wash-sale checks use a sorted acquisition index instead of comparing lots
+pairwise: every acquisition (open lots plus any purchases, reinvestments or
+vests from a transactions file, including ones scheduled after the sale date)
+is keyed by (symbol, day) and sorted once, with a running quantity total. For
+each lot, two binary searches give the acquisitions of the same symbol within
+30 days either side of the sale date, and the replacement quantity is the
+difference of the running totals, less the lot itself.
+
+Transactions on the day an open lot of the same symbol was acquired include
+the purchase that created it. The open lots absorb up to their own quantity
+from those transactions, so only shares beyond the open lots (for example the
+part of a partially sold lot that is no longer held) count as replacements.
+
+Candidates are ranked by tax benefit: the loss not disallowed by replacement
+shares, times the short- or long-term rate (long-term after 365 days, as in
+the tax-preparation plugin).
+"""
+
+import re
+import csv
+import sys
+import json
+import argparse
+from collections import defaultdict
+from datetime import date
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from parse_csv_portfolio import clean_numeric_value, normalize_header
+from xirr import parse_flow_date
+
+NUMPY_MISSING = "numpy not installed. Install with: pip install numpy --break-system-packages"
+
+LOT_COLUMN_ALIASES = {
+    'symbol': ['symbol', 'ticker'],
+    'account': ['account', 'account number', 'acct'],
+    'account_type': ['account type', 'registration'],
+    'acquired': ['acquired', 'date acquired', 'acquisition date', 'purchase date', 'open date',
+                 'vest date', 'vesting date', 'trade date'],
+    'quantity': ['quantity', 'shares', 'qty'],
+    'cost_basis': ['cost basis', 'total cost', 'basis'],
+    'unit_cost': ['unit cost', 'cost per share', 'cost/share', 'avg cost'],
+    'price': ['price', 'last price', 'current price'],
+}
+
+TRANSACTION_COLUMN_ALIASES = {
+    'date': ['date', 'trade date', 'settlement date', 'vest date', 'release date'],
+    'symbol': ['symbol', 'ticker'],
+    'quantity': ['quantity', 'shares', 'qty'],
+    'type': ['type', 'action', 'transaction type', 'activity'],
+}
+
+# With a type column, only these transactions acquire shares
+ACQUISITION_TERMS = ('buy', 'bought', 'purchase', 'reinvest', 'vest', 'release', 'espp')
+
+TAX_ADVANTAGED_PATTERN = re.compile(r'\b(ira|roth|401\(?k\)?|403\(?b\)?|457|hsa|529)\b',
+                                    re.IGNORECASE)
+
+WASH_SALE_DAYS = 30
+LONG_TERM_DAYS = 365
+
+SHORT_TERM_RATE = 0.24
+LONG_TERM_RATE = 0.15
+
+TOP_CANDIDATES = 50
+
+# Share quantities below this are rounding residue
+QUANTITY_EPSILON = 1e-9
+
+# Sort key stride for (symbol, day): date ordinals stay well below 2**22
+DAY_STRIDE = 1 << 22
+
+
+def is_tax_advantaged(account_type):
+    return bool(account_type) and TAX_ADVANTAGED_PATTERN.search(str(account_type)) is not None
+
+
+def _column_map(header, aliases):
+    columns = [column.replace('_', ' ') for column in normalize_header(header)]
+    col_map = {}
+    for field, variations in aliases.items():
+        for i, column in enumerate(columns):
+            if i not in col_map.values() and column in variations:
+                col_map[field] = i
+                break
+    # Looser substring match for fields an exact header did not claim
+    for field, variations in aliases.items():
+        if field in col_map:
+            continue
+        for i, column in enumerate(columns):
+            if i not in col_map.values() and any(var in column for var in variations):
+                col_map[field] = i
+                break
+    return col_map
+
+
+def _read_records(path, aliases, list_key):
+    """Dicts keyed by alias field name from a CSV, or the list_key list of a JSON file."""
+    if Path(path).suffix.lower() == '.csv':
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                raise ValueError(f"{path} is empty")
+            col_map = _column_map(header, aliases)
+            return [{field: row[i] for field, i in col_map.items() if i < len(row)}
+                    for row in reader]
+
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    defaults = {}
+    if isinstance(data, dict):
+        defaults = {'account_type': data.get('account_type'), 'account': data.get('account')}
+        data = data.get(list_key, data.get('holdings', []))
+    records = []
+    col_maps = {}
+    for item in data:
+        keys = tuple(item)
+        col_map = col_maps.get(keys)
+        if col_map is None:
+            col_map = col_maps[keys] = _column_map(keys, aliases)
+        values = list(item.values())
+        record = {field: values[i] for field, i in col_map.items()}
+        for field, value in defaults.items():
+            if value and field in aliases and not record.get(field):
+                record[field] = value
+        records.append(record)
+    return records
+
+
+def _number(value):
+    if isinstance(value, (int, float)):
+        return float(value)
+    return clean_numeric_value(value) if value is not None else None
+
+
+def load_lots(path):
+    """
+    Open lots as column arrays: symbols, accounts, acquired (date ordinals),
+    quantity, cost_basis, price (NaN when the file has none) and a
+    tax_advantaged mask. Lots without a symbol, date or positive quantity are
+    dropped.
+    """
+    symbols, accounts, acquired, quantity, basis, price, sheltered = [], [], [], [], [], [], []
+    for record in _read_records(path, LOT_COLUMN_ALIASES, 'lots'):
+        symbol = str(record.get('symbol') or '').strip().upper()
+        qty = _number(record.get('quantity'))
+        if not symbol or not record.get('acquired') or not qty or qty <= 0:
+            continue
+        cost = _number(record.get('cost_basis'))
+        if cost is None:
+            unit_cost = _number(record.get('unit_cost'))
+            if unit_cost is None:
+                continue
+            cost = unit_cost * qty
+        lot_price = _number(record.get('price'))
+        symbols.append(symbol)
+        accounts.append(str(record.get('account') or 'Unassigned'))
+        acquired.append(parse_flow_date(record['acquired']).toordinal())
+        quantity.append(qty)
+        basis.append(cost)
+        price.append(np.nan if lot_price is None else lot_price)
+        sheltered.append(is_tax_advantaged(record.get('account_type')))
+
+    if not symbols:
+        raise ValueError("No lots with symbol, acquisition date, quantity and cost basis found")
+    return {
+        'symbols': np.array(symbols, dtype=object),
+        'accounts': np.array(accounts, dtype=object),
+        'acquired': np.array(acquired, dtype=np.int64),
+        'quantity': np.array(quantity),
+        'cost_basis': np.array(basis),
+        'price': np.array(price),
+        'tax_advantaged': np.array(sheltered, dtype=bool),
+    }
+
+
+def load_acquisitions(path):
+    """
+    (symbol, date ordinal, quantity) purchases, reinvestments and vests from
+    transactions. Rows typed as acquisitions count whatever the sign of their
+    quantity; without a type, only positive quantities are taken as purchases.
+    """
+    acquisitions = []
+    for record in _read_records(path, TRANSACTION_COLUMN_ALIASES, 'transactions'):
+        flow_type = record.get('type')
+        if flow_type and not any(term in str(flow_type).lower() for term in ACQUISITION_TERMS):
+            continue
+        symbol = str(record.get('symbol') or '').strip().upper()
+        qty = _number(record.get('quantity'))
+        if not symbol or not record.get('date') or not qty:
+            continue
+        if not flow_type and qty < 0:
+            continue  # an untyped negative quantity is a sale
+        acquisitions.append((symbol, parse_flow_date(record['date']).toordinal(), abs(qty)))
+    return acquisitions
+
+
+def load_prices(path):
+    """
+    {symbol: price} from a holdings JSON (price, or value / quantity), a JSON
+    {symbol: price} mapping, or a CSV with symbol and price columns.
+    """
+    prices = {}
+    if Path(path).suffix.lower() == '.csv':
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            col_map = _column_map(next(reader, []), {'symbol': ['symbol', 'ticker'],
+                                                     'price': ['price', 'close', 'last']})
+            if len(col_map) < 2:
+                raise ValueError("Price CSV needs symbol and price columns")
+            for row in reader:
+                if len(row) > max(col_map.values()):
+                    value = clean_numeric_value(row[col_map['price']])
+                    if value is not None:
+                        prices[row[col_map['symbol']].strip().upper()] = value
+        return prices
+
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict) and 'holdings' not in data:
+        return {str(symbol).upper(): float(price) for symbol, price in data.items()}
+    for holding in data.get('holdings', []) if isinstance(data, dict) else data:
+        symbol = str(holding.get('symbol') or '').strip().upper()
+        price = holding.get('price')
+        if not isinstance(price, (int, float)):
+            value, qty = holding.get('value'), holding.get('quantity')
+            if not (isinstance(value, (int, float)) and isinstance(qty, (int, float)) and qty):
+                continue
+            price = value / qty
+        if symbol:
+            prices[symbol] = float(price)
+    return prices
+
+
+def drop_lot_purchases(lots, acquisitions):
+    """
+    Acquisitions less the purchases of open lots. The open lots of a symbol
+    acquired on a day absorb up to their combined quantity from that day's
+    transactions; only the excess is kept. Returns (remaining, matched_count),
+    where matched_count is the number of transactions absorbed in whole or in
+    part.
+    """
+    open_qty = defaultdict(float)
+    for symbol, day, qty in zip(lots['symbols'].tolist(), lots['acquired'].tolist(),
+                                lots['quantity'].tolist()):
+        open_qty[(symbol, day)] += qty
+    remaining = []
+    matched = 0
+    for symbol, day, qty in acquisitions:
+        absorbed = min(qty, open_qty.get((symbol, day), 0.0))
+        if absorbed > 0:
+            open_qty[(symbol, day)] -= absorbed
+            qty -= absorbed
+            matched += 1
+        if qty > QUANTITY_EPSILON:
+            remaining.append((symbol, day, qty))
+    return remaining, matched
+
+
+def replacement_index(symbol_codes, days, quantities):
+    """Acquisitions sorted by (symbol, day) with running quantity totals."""
+    keys = symbol_codes * DAY_STRIDE + days
+    order = np.argsort(keys, kind='stable')
+    running = np.concatenate(([0.0], np.cumsum(quantities[order])))
+    return keys[order], order, running
+
+
+def scan_lots(lots, prices=None, acquisitions=(), sale_date=None,
+              short_term_rate=SHORT_TERM_RATE, long_term_rate=LONG_TERM_RATE,
+              min_loss=0.0, top=TOP_CANDIDATES):
+    """Rank harvestable losses in lots (see load_lots) for a sale on sale_date."""
+    sale_date = sale_date or date.today()
+    sale_day = sale_date.toordinal()
+    n = len(lots['symbols'])
+    acquisitions, matched = drop_lot_purchases(lots, acquisitions)
+
+    # One symbol code space for lots and transactions
+    event_symbols = np.array([symbol for symbol, _, _ in acquisitions], dtype=object)
+    all_symbols, codes = np.unique(np.concatenate((lots['symbols'], event_symbols)),
+                                   return_inverse=True)
+    codes = codes.astype(np.int64)
+    lot_codes = codes[:n]
+
+    price = lots['price'].copy()
+    if prices:
+        quoted = np.array([prices.get(symbol, np.nan) for symbol in all_symbols])
+        price = np.where(np.isnan(price), quoted[lot_codes], price)
+    priced = ~np.isnan(price)
+
+    value = lots['quantity'] * np.where(priced, price, 0.0)
+    loss = np.where(priced, lots['cost_basis'] - value, 0.0)
+    holding_days = sale_day - lots['acquired']
+    long_term = holding_days > LONG_TERM_DAYS
+
+    # Acquisitions of the same symbol within the wash-sale window of the sale
+    days = np.concatenate((lots['acquired'],
+                           np.array([day for _, day, _ in acquisitions], dtype=np.int64)))
+    quantities = np.concatenate((lots['quantity'],
+                                 np.array([qty for _, _, qty in acquisitions], dtype=float)))
+    keys, order, running = replacement_index(codes, days, quantities)
+    lo = np.searchsorted(keys, lot_codes * DAY_STRIDE + sale_day - WASH_SALE_DAYS, side='left')
+    hi = np.searchsorted(keys, lot_codes * DAY_STRIDE + sale_day + WASH_SALE_DAYS, side='right')
+    own_in_window = np.abs(holding_days) <= WASH_SALE_DAYS
+    conflicts = hi - lo - own_in_window
+    replacement_qty = running[hi] - running[lo] - np.where(own_in_window, lots['quantity'], 0.0)
+
+    candidate = priced & ~lots['tax_advantaged'] & (loss > max(min_loss, 0.0)) & (holding_days >= 0)
+    disallowed = loss * np.minimum(np.clip(replacement_qty, 0.0, None) / lots['quantity'], 1.0)
+    rate = np.where(long_term, long_term_rate, short_term_rate)
+    benefit = np.where(candidate, (loss - disallowed) * rate, 0.0)
+    wash_sale = candidate & (conflicts > 0)
+
+    ranked = np.flatnonzero(candidate)
+    ranked = ranked[np.lexsort((ranked, -benefit[ranked]))]
+
+    # Position of each lot in the sorted index, to skip it when naming the first conflict
+    position = np.empty(len(order), dtype=np.int64)
+    position[order] = np.arange(len(order))
+
+    candidates = []
+    for i in ranked[:top]:
+        first_conflict = None
+        if wash_sale[i]:
+            first = lo[i] + 1 if own_in_window[i] and position[i] == lo[i] else lo[i]
+            first_conflict = date.fromordinal(int(keys[first] % DAY_STRIDE)).isoformat()
+        candidates.append({
+            'symbol': lots['symbols'][i],
+            'account': lots['accounts'][i],
+            'acquired_date': date.fromordinal(int(lots['acquired'][i])).isoformat(),
+            'quantity': float(lots['quantity'][i]),
+            'cost_basis': round(float(lots['cost_basis'][i]), 2),
+            'price': round(float(price[i]), 4),
+            'value': round(float(value[i]), 2),
+            'unrealized_loss': round(float(loss[i]), 2),
+            'term': 'long' if long_term[i] else 'short',
+            'tax_rate': float(rate[i]),
+            'wash_sale': bool(wash_sale[i]),
+            'replacement_quantity': round(float(max(replacement_qty[i], 0.0)), 6),
+            'first_conflict_date': first_conflict,
+            'disallowed_loss': round(float(disallowed[i]), 2),
+            'tax_benefit': round(float(benefit[i]), 2),
+        })
+
+    missing = sorted(set(lots['symbols'][~priced]))
+    return {
+        'sale_date': sale_date.isoformat(),
+        'wash_sale_window_days': WASH_SALE_DAYS,
+        'lots_scanned': n,
+        'lots_tax_advantaged': int(lots['tax_advantaged'].sum()),
+        'lots_unpriced': int((~priced).sum()),
+        'transactions_matched_to_lots': matched,
+        'missing_prices': missing,
+        'candidates_total': len(ranked),
+        'wash_sale_conflicts': int(wash_sale.sum()),
+        'total_harvestable_loss': round(float(loss[candidate].sum()), 2),
+        'total_disallowed_loss': round(float(disallowed[candidate].sum()), 2),
+        'total_tax_benefit': round(float(benefit.sum()), 2),
+        'candidates': candidates,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Rank tax-loss harvesting candidates across open lots, flagging wash sales.'
+    )
+    parser.add_argument('lots', help='Open lots CSV or JSON (symbol, account, acquired date, '
+                                     'quantity, cost basis; optional price, account type)')
+    parser.add_argument('--prices', help='Current prices: holdings JSON, {symbol: price} JSON '
+                                         'or CSV with symbol and price columns')
+    parser.add_argument('--transactions', help='Purchases, reinvestments and vests (past or '
+                                               'scheduled) that can trigger wash sales')
+    parser.add_argument('--sale-date', help='Assumed sale date YYYY-MM-DD (default today)')
+    parser.add_argument('--short-term-rate', type=float, default=SHORT_TERM_RATE,
+                        help=f'Tax rate on short-term losses (default {SHORT_TERM_RATE})')
+    parser.add_argument('--long-term-rate', type=float, default=LONG_TERM_RATE,
+                        help=f'Tax rate on long-term losses (default {LONG_TERM_RATE})')
+    parser.add_argument('--min-loss', type=float, default=0.0,
+                        help='Ignore lots with a smaller unrealized loss in dollars')
+    parser.add_argument('--top', type=int, default=TOP_CANDIDATES,
+                        help=f'Candidates to list (default {TOP_CANDIDATES})')
+    args = parser.parse_args()
+
+    if np is None:
+        print(f"Error: {NUMPY_MISSING}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        lots = load_lots(args.lots)
+        prices = load_prices(args.prices) if args.prices else None
+        acquisitions = load_acquisitions(args.transactions) if args.transactions else []
+        sale_date = parse_flow_date(args.sale_date) if args.sale_date else None
+        result = scan_lots(lots, prices, acquisitions, sale_date, args.short_term_rate,
+                           args.long_term_rate, args.min_loss, args.top)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Money-weighted returns (XIRR) for many accounts in one batched solve.
+
+External cash flows (contributions positive, withdrawals negative, as seen
+by the account) are read from a transaction CSV or JSON file. Each account's
+stream is closed with its ending market value from a holdings file, and all
+accounts are solved together: the streams are packed into one padded
+(accounts x flows) matrix and a safeguarded Newton/bisection iteration runs
+on every unconverged row at once.
+
+The solver works in continuously compounded form, x = ln(1 + r), where the
+net present value sum(F * exp(-t * x)) is smooth for any x; every account
+keeps a sign-changing bracket and falls back to bisection whenever a Newton
+step leaves it or is not converging fast enough. Streams whose NPV has the
+same sign at both ends of the search range (an even number of roots inside
+it) are bracketed from a coarse rate grid, taking the sign change nearest
+the 10% starting guess.
+"""
+
+import csv
+import sys
+import json
+import argparse
+from datetime import date, datetime
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from parse_csv_portfolio import clean_numeric_value, normalize_header
+
+NUMPY_MISSING = "numpy not installed. Install with: pip install numpy --break-system-packages"
+
+FLOW_COLUMN_ALIASES = {
+    'date': ['date', 'trade date', 'settlement date', 'transaction date'],
+    'account': ['account', 'account number', 'account #', 'acct'],
+    'amount': ['amount', 'net amount', 'cash flow', 'flow'],
+    'type': ['type', 'action', 'transaction type', 'activity'],
+}
+
+# With a type column, only these transactions are external cash flows
+EXTERNAL_FLOW_TERMS = ('contribution', 'deposit', 'withdrawal', 'distribution', 'transfer',
+                       'rollover', 'journal')
+
+# Income a fund pays into the account stays invested and is part of the return,
+# even when the broker labels it a distribution ("Capital Gain Distribution")
+INTERNAL_FLOW_TERMS = ('dividend', 'capital gain', 'cap gain', 'interest', 'reinvest')
+
+FLOW_DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%m/%d/%y', '%m-%d-%Y')
+
+DAYS_PER_YEAR = 365.0
+
+# Search range for x = ln(1 + r): r from about -99.3% to +14,700%
+X_BOUND = 5.0
+MAX_ITERATIONS = 100
+X_TOLERANCE = 1e-10
+NPV_TOLERANCE = 1e-9  # relative to the stream's gross flows
+
+# Points in the coarse x grid scanned for a bracket when the range ends agree
+BRACKET_GRID_POINTS = 201
+
+INITIAL_RATE = 0.1
+
+PORTFOLIO_LABEL = 'portfolio'
+
+
+def parse_flow_date(value):
+    if isinstance(value, date):
+        return value
+    text = str(value).strip()
+    for fmt in FLOW_DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognized date '{value}'")
+
+
+def is_external_flow(flow_type):
+    if flow_type is None:
+        return True
+    flow_type = str(flow_type).lower()
+    if any(term in flow_type for term in INTERNAL_FLOW_TERMS):
+        return False
+    return any(term in flow_type for term in EXTERNAL_FLOW_TERMS)
+
+
+def _flow_record(date_value, account, amount, flow_type=None):
+    if not is_external_flow(flow_type):
+        return None
+    amount = amount if isinstance(amount, (int, float)) else clean_numeric_value(amount)
+    if amount is None or not date_value:
+        return None
+    return parse_flow_date(date_value), str(account or 'Unassigned'), float(amount)
+
+
+def load_flows_csv(path):
+    """(date, account, amount) records from a transaction CSV export."""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            raise ValueError("Flows CSV is empty")
+        columns = normalize_header(header)
+        col_map = {}
+        for field, variations in FLOW_COLUMN_ALIASES.items():
+            for i, column in enumerate(columns):
+                if any(var in column for var in variations):
+                    col_map[field] = i
+                    break
+        if 'date' not in col_map or 'amount' not in col_map:
+            raise ValueError("Flows CSV needs date and amount columns")
+
+        def cell(row, field):
+            i = col_map.get(field)
+            return row[i] if i is not None and i < len(row) else None
+
+        flows = []
+        for row in reader:
+            record = _flow_record(cell(row, 'date'), cell(row, 'account'), cell(row, 'amount'),
+                                  cell(row, 'type'))
+            if record:
+                flows.append(record)
+    return flows
+
+
+def load_flows_json(path):
+    """(date, account, amount) records from [{"date", "account", "amount", "type"?}, ...]."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get('flows', [])
+    flows = []
+    for item in data:
+        record = _flow_record(item.get('date'), item.get('account'), item.get('amount'),
+                              item.get('type'))
+        if record:
+            flows.append(record)
+    return flows
+
+
+def load_flows(path):
+    if Path(path).suffix.lower() == '.csv':
+        return load_flows_csv(path)
+    return load_flows_json(path)
+
+
+def ending_values(holdings):
+    """Market value per account from normalized holdings."""
+    values = {}
+    for holding in holdings:
+        value = holding.get('value')
+        if isinstance(value, (int, float)):
+            account = str(holding.get('account') or 'Unassigned')
+            values[account] = values.get(account, 0.0) + value
+    return values
+
+
+def _net_by_date(cash_flows):
+    totals = {}
+    for flow_date, amount in cash_flows:
+        totals[flow_date] = totals.get(flow_date, 0.0) + amount
+    return sorted(totals.items())
+
+
+def build_streams(flows, end_values, as_of):
+    """
+    Investor-perspective cash-flow streams per account, netted by date:
+    contributions become outflows, withdrawals inflows, and the ending value
+    is received on as_of. Returns {account: [(date, amount), ...]}.
+    """
+    streams = {}
+    for flow_date, account, amount in flows:
+        if flow_date <= as_of:
+            streams.setdefault(account, []).append((flow_date, -amount))
+    for account, value in end_values.items():
+        streams.setdefault(account, []).append((as_of, value))
+    return {account: _net_by_date(stream) for account, stream in streams.items()}
+
+
+def pack_streams(streams):
+    """Pad streams into (accounts x flows) amount and year-offset matrices."""
+    labels = list(streams)
+    width = max((len(stream) for stream in streams.values()), default=0)
+    amounts = np.zeros((len(labels), width))
+    years = np.zeros((len(labels), width))
+    for row, label in enumerate(labels):
+        stream = streams[label]
+        start = min(flow_date for flow_date, _ in stream)
+        amounts[row, :len(stream)] = [amount for _, amount in stream]
+        years[row, :len(stream)] = [(flow_date - start).days / DAYS_PER_YEAR
+                                    for flow_date, _ in stream]
+    return labels, amounts, years
+
+
+def _npv(amounts, years, x):
+    discounted = amounts * np.exp(-years * x[:, None])
+    return discounted.sum(axis=1), -(years * discounted).sum(axis=1)
+
+
+def _grid_bracket(amounts, years, rows, lo, hi, f_lo):
+    """
+    Scan a coarse x grid for rows whose NPV does not change sign between the
+    range ends. Where it changes sign between grid points, the interval
+    nearest the starting guess becomes that row's bracket (lo, hi and f_lo
+    are updated in place). Returns which rows were bracketed.
+    """
+    grid = np.linspace(-X_BOUND, X_BOUND, BRACKET_GRID_POINTS)
+    f_grid = np.empty((len(rows), len(grid)))
+    for k, point in enumerate(grid):
+        f_grid[:, k], _ = _npv(amounts, years, np.full(len(rows), point))
+    signs = np.sign(f_grid)
+    changes = signs[:, :-1] * signs[:, 1:] <= 0
+    midpoints = (grid[:-1] + grid[1:]) / 2
+    distance = np.where(changes, np.abs(midpoints - np.log1p(INITIAL_RATE)), np.inf)
+    nearest = np.argmin(distance, axis=1)
+    found = changes[np.arange(len(rows)), nearest]
+    lo[rows[found]] = grid[nearest[found]]
+    hi[rows[found]] = grid[nearest[found] + 1]
+    f_lo[rows[found]] = f_grid[found, nearest[found]]
+    return found
+
+
+def solve_xirr(amounts, years, max_iterations=MAX_ITERATIONS):
+    """
+    Solve sum(F * (1 + r) ** -t) = 0 for every row at once.
+
+    Returns (rates, converged, iterations, status): status is 'converged',
+    'no_sign_change' (all flows one direction, or the root is out of range),
+    'insufficient_flows' or 'max_iterations'.
+    """
+    n = len(amounts)
+    x = np.zeros(n)
+    converged = np.zeros(n, dtype=bool)
+    iterations = np.zeros(n, dtype=int)
+    status = np.full(n, 'max_iterations', dtype=object)
+    scale = np.abs(amounts).sum(axis=1)
+
+    nonzero = np.count_nonzero(amounts, axis=1)
+    lo = np.full(n, -X_BOUND)
+    hi = np.full(n, X_BOUND)
+    f_lo, _ = _npv(amounts, years, lo)
+    f_hi, _ = _npv(amounts, years, hi)
+    bracketed = np.sign(f_lo) != np.sign(f_hi)
+    unbracketed = np.flatnonzero(~bracketed & (nonzero >= 2))
+    if len(unbracketed):
+        bracketed[unbracketed] = _grid_bracket(amounts[unbracketed], years[unbracketed],
+                                               unbracketed, lo, hi, f_lo)
+    status[~bracketed] = 'no_sign_change'
+    status[nonzero < 2] = 'insufficient_flows'
+    active = np.flatnonzero(bracketed & (nonzero >= 2))
+
+    x[active] = np.clip(np.log1p(INITIAL_RATE), lo[active], hi[active])
+    last_step = np.full(n, np.inf)
+    for _ in range(max_iterations):
+        if not len(active):
+            break
+        a, t = amounts[active], years[active]
+        xa = x[active]
+        f, df = _npv(a, t, xa)
+        iterations[active] += 1
+
+        done = ((np.abs(f) <= NPV_TOLERANCE * scale[active])
+                | (last_step[active] <= X_TOLERANCE)
+                | (hi[active] - lo[active] <= X_TOLERANCE))
+        converged[active[done]] = True
+        status[active[done]] = 'converged'
+
+        # Shrink each bracket around the root
+        same_as_lo = np.sign(f) == np.sign(f_lo[active])
+        lo[active] = np.where(same_as_lo, xa, lo[active])
+        f_lo[active] = np.where(same_as_lo, f, f_lo[active])
+        hi[active] = np.where(same_as_lo, hi[active], xa)
+
+        # Newton step when it stays inside the bracket and is shrinking fast
+        # enough (|2f| <= |previous step * f'|); otherwise bisect
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton = xa - f / df
+        midpoint = (lo[active] + hi[active]) / 2
+        use_newton = ((newton > lo[active]) & (newton < hi[active]) & np.isfinite(newton)
+                      & (np.abs(2 * f) <= np.abs(last_step[active] * df)))
+        x_next = np.where(done, xa, np.where(use_newton, newton, midpoint))
+        last_step[active] = np.abs(x_next - xa)
+        x[active] = x_next
+        active = active[~done]
+
+    return np.expm1(x), converged, iterations, status
+
+
+def _solve_streams(streams, ending):
+    labels, amounts, years = pack_streams(streams)
+    rates, converged, iterations, status = solve_xirr(amounts, years)
+    results = []
+    for row, label in enumerate(labels):
+        stream = streams[label]
+        results.append({
+            'account': label,
+            'xirr': round(float(rates[row]), 6) if converged[row] else None,
+            'converged': bool(converged[row]),
+            'iterations': int(iterations[row]),
+            'status': status[row],
+            'flows': len(stream),
+            'start_date': stream[0][0].isoformat(),
+            'end_date': stream[-1][0].isoformat(),
+            'ending_value': round(ending.get(label, 0.0), 2),
+        })
+    return results
+
+
+def compute_xirr(flows, end_values, as_of, include_portfolio=True):
+    """
+    Per-account XIRR results for flows closed by end_values on as_of, plus a
+    portfolio-wide row when there is more than one account. Accounts are
+    solved in one batch; the portfolio stream (all flows netted by date) is
+    solved separately so it does not widen the account matrix.
+    """
+    streams = build_streams(flows, end_values, as_of)
+    if not streams:
+        return []
+    results = _solve_streams(streams, end_values)
+    if include_portfolio and len(streams) > 1:
+        combined = [cf for stream in streams.values() for cf in stream]
+        portfolio = {PORTFOLIO_LABEL: _net_by_date(combined)}
+        results += _solve_streams(portfolio, {PORTFOLIO_LABEL: sum(end_values.values())})
+    return results
+
+
+def money_weighted_returns(flows_path, holdings, as_of=None):
+    """
+    XIRR section for calculate_portfolio_metrics: flows from flows_path,
+    ending values from holdings, valued on as_of (default: today).
+    """
+    if np is None:
+        raise ImportError(NUMPY_MISSING)
+    as_of = parse_flow_date(as_of) if as_of else date.today()
+    results = compute_xirr(load_flows(flows_path), ending_values(holdings), as_of)
+    portfolio = next((r for r in results if r['account'] == PORTFOLIO_LABEL), None)
+    accounts = [r for r in results if r['account'] != PORTFOLIO_LABEL]
+    if portfolio is None and len(accounts) == 1:
+        portfolio = accounts[0]
+    return {
+        'as_of': as_of.isoformat(),
+        'portfolio': portfolio,
+        'accounts': accounts,
+        'unconverged': [r['account'] for r in results if not r['converged']],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Money-weighted returns (XIRR) per account from external cash flows.'
+    )
+    parser.add_argument('flows', help='Transaction CSV or JSON of external flows '
+                                      '(contributions positive)')
+    parser.add_argument('--holdings', help='Holdings JSON supplying ending values per account')
+    parser.add_argument('--as-of', help='Valuation date YYYY-MM-DD (default: holdings as_of_date, '
+                                        'else today)')
+    args = parser.parse_args()
+
+    if np is None:
+        print(f"Error: {NUMPY_MISSING}", file=sys.stderr)
+        sys.exit(1)
+
+    holdings = []
+    as_of = args.as_of
+    try:
+        if args.holdings:
+            with open(args.holdings, 'r') as f:
+                data = json.load(f)
+            holdings = data.get('holdings', [])
+            as_of = as_of or data.get('as_of_date')
+        result = money_weighted_returns(args.flows, holdings, as_of)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
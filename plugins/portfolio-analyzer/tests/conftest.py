@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The scripts are standalone CLIs; import them from their directory
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
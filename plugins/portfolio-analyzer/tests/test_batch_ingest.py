@@ -0,0 +1,81 @@
+import batch_ingest
+from batch_ingest import batch_ingest as run_batch, ingest_file, merge_holdings
+from parse_csv_portfolio import ProfileRegistry
+
+STATEMENT_CSV = "Symbol,Description,Quantity,Price,Market Value,Account\nVTI,Total Stock,10,$250,$2500,A1\n"
+
+
+class PdfParserError(Exception):
+    """Stands in for pdfminer's own exception types, which do not subclass ValueError."""
+
+
+def test_parser_exception_from_a_pdf_is_returned_as_a_file_error(tmp_path, monkeypatch):
+    def corrupt(path, cache=None):
+        raise PdfParserError('No /Root object! - Is this really a PDF?')
+
+    monkeypatch.setattr(batch_ingest, 'extract_pdf_file', corrupt)
+    source, holdings, _ = ingest_file(str(tmp_path / 'statement.pdf'))
+    assert holdings == []
+    assert source['error'] == 'Could not parse PDF (PdfParserError): No /Root object! - Is this really a PDF?'
+
+
+def test_corrupt_pdf_does_not_abort_the_batch(tmp_path):
+    good = tmp_path / 'brokerage_2025-01-31.csv'
+    good.write_text(STATEMENT_CSV)
+    bad = tmp_path / 'brokerage_2025-02-28.pdf'
+    bad.write_bytes(b'%PDF-1.4\nnot really a pdf\n')
+
+    result = run_batch([str(good), str(bad)], workers=2)
+    assert result['failed_sources'] == 1
+    assert 'error' in result['sources'][1]
+    assert [h['symbol'] for h in result['holdings']] == ['VTI']
+
+
+def holding(symbol, source_file, statement_date='2025-01-31', account='A1', value=100.0):
+    return {'symbol': symbol, 'value': value, 'account': account,
+            'statement_date': statement_date, 'source_file': source_file}
+
+
+def test_merge_keeps_every_file_from_the_latest_statement_date():
+    results = [
+        holding('VTI', 'jan.csv', '2024-12-31'),
+        holding('VTI', 'a.csv', value=300.0),
+        holding('BND', 'b.csv', value=200.0),
+        holding('VXUS', 'a.csv'),
+    ]
+    holdings, collapsed, duplicates = merge_holdings(results)
+    assert [(h['symbol'], h['source_file']) for h in holdings] == [
+        ('VTI', 'a.csv'), ('BND', 'b.csv'), ('VXUS', 'a.csv')]
+    assert collapsed == 1
+    assert duplicates == []
+
+
+def test_merge_counts_a_repeated_statement_once_and_reports_it():
+    results = [holding('VTI', 'statement (1).csv'), holding('BND', 'statement (1).csv'),
+               holding('BND', 'statement.csv'), holding('VTI', 'statement.csv')]
+    holdings, collapsed, duplicates = merge_holdings(results)
+    assert [h['source_file'] for h in holdings] == ['statement (1).csv'] * 2
+    assert collapsed == 0
+    assert duplicates == [{'account': 'A1', 'statement_date': '2025-01-31',
+                           'file': 'statement.csv', 'duplicate_of': 'statement (1).csv'}]
+
+
+def test_account_less_files_with_the_same_label_and_date_are_both_kept(tmp_path):
+    first = tmp_path / 'brokerage_2025-01-31.csv'
+    first.write_text(STATEMENT_CSV.replace(',Account', '').replace(',A1', ''))
+    other = tmp_path / 'brokerage-2025-01-31.csv'
+    other.write_text(STATEMENT_CSV.replace(',Account', '').replace(',A1', '').replace('VTI', 'BND'))
+
+    result = run_batch([str(first), str(other)], workers=1)
+    assert sorted(h['symbol'] for h in result['holdings']) == ['BND', 'VTI']
+    assert {h['account'] for h in result['holdings']} == {'brokerage'}
+    assert result['duplicate_statements'] == []
+
+
+def test_registry_hands_new_profiles_over_once(tmp_path):
+    registry = ProfileRegistry(tmp_path / 'profiles.json')
+    registry.learn(['Symbol', 'Quantity', 'Value'], 'generic', {'symbol': 0, 'quantity': 1, 'value': 2})
+    new = registry.take_new()
+    assert list(new.values())[0]['col_map'] == {'symbol': 0, 'quantity': 1, 'value': 2}
+    assert registry.take_new() == {}
+    assert not registry.dirty
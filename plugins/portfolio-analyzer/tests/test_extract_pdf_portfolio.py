@@ -0,0 +1,174 @@
+import os
+import gzip
+import random
+
+import pytest
+
+import extract_pdf_portfolio as pdf
+
+PAGES = [
+    {'page': 1, 'text': 'Account Number: X-123', 'tables': [], 'scanned': False},
+    {'page': 2, 'text': 'Symbol Quantity Market Value', 'tables': [[['Symbol', 'Quantity'], ['VTI', '10']]],
+     'scanned': True},
+]
+
+
+def test_wrappers_split_pages_passed_in_without_extracting_again(monkeypatch):
+    def extract_pages(*args, **kwargs):
+        raise AssertionError('pages were passed in; the PDF must not be read again')
+
+    monkeypatch.setattr(pdf, 'extract_pages', extract_pages)
+    assert pdf.extract_tables_from_pdf('statement.pdf', PAGES) == [
+        {'page': 2, 'data': [['Symbol', 'Quantity'], ['VTI', '10']]}]
+    assert [page['page'] for page in pdf.extract_text_from_pdf('statement.pdf', PAGES)] == [1, 2]
+
+
+def test_each_wrapper_call_without_pages_reads_the_file(monkeypatch):
+    calls = []
+
+    def extract_pages(pdf_path, **kwargs):
+        calls.append((pdf_path, kwargs))
+        return PAGES
+
+    monkeypatch.setattr(pdf, 'extract_pages', extract_pages)
+    pdf.extract_tables_from_pdf('statement.pdf')
+    pdf.extract_text_from_pdf('statement.pdf')
+    assert calls == [('statement.pdf', {'min_keyword_score': 0}),
+                     ('statement.pdf', {'with_tables': False})]
+
+
+class FakePage:
+    def __init__(self, text, tables=()):
+        self.text = text
+        self.tables = list(tables)
+        self.table_calls = 0
+
+    def extract_text(self):
+        return self.text
+
+    def extract_tables(self):
+        self.table_calls += 1
+        return self.tables
+
+
+class FakePdfplumber:
+    def __init__(self, pages):
+        self.pages = pages
+
+    def open(self, path):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def sparse_holdings_page():
+    return FakePage('Ticker    Qty    Value\nVTI 10 2,500.00\nBND 20 1,400.00',
+                    [[['Ticker', 'Qty', 'Value'], ['VTI', '10', '2,500.00']]])
+
+
+def disclosure_page():
+    return FakePage('Important information. Past performance does not guarantee future results. '
+                    'Member SIPC.', [[['Footnote', 'Text']]])
+
+
+def test_sparse_holdings_page_is_extracted_and_prose_page_is_skipped(monkeypatch):
+    holdings, prose = sparse_holdings_page(), disclosure_page()
+    monkeypatch.setattr(pdf, 'pdfplumber', FakePdfplumber([holdings, prose]))
+    assert pdf.holdings_keyword_score(holdings.text) == 1
+
+    pages = pdf.extract_page_range('statement.pdf')
+    assert [(page['page'], page['scanned']) for page in pages] == [(1, True), (2, False)]
+    assert pages[0]['tables'] == holdings.tables
+    assert pages[1]['tables'] == []
+    assert (holdings.table_calls, prose.table_calls) == (1, 0)
+
+
+def test_keyword_score_zero_extracts_every_page(monkeypatch):
+    monkeypatch.setattr(pdf, 'pdfplumber', FakePdfplumber([sparse_holdings_page(), disclosure_page()]))
+    pages = pdf.extract_page_range('statement.pdf', min_keyword_score=0)
+    assert [page['scanned'] for page in pages] == [True, True]
+    assert pages[1]['tables'] == [[['Footnote', 'Text']]]
+
+
+def test_cache_key_changes_with_page_content_and_extractor_version(tmp_path, monkeypatch):
+    statement = tmp_path / 'statement.pdf'
+    statement.write_bytes(b'%PDF-1.4 holdings')
+    key = pdf.PageCache.key(pdf.file_sha256(statement), 1, False)
+    assert pdf.PageCache.key(pdf.file_sha256(statement), 1, False) == key
+
+    statement.write_bytes(b'%PDF-1.4 holdings, edited')
+    edited = pdf.PageCache.key(pdf.file_sha256(statement), 1, False)
+    assert edited != key
+
+    monkeypatch.setattr(pdf, 'EXTRACTOR_VERSION', pdf.EXTRACTOR_VERSION + 1)
+    assert pdf.PageCache.key(pdf.file_sha256(statement), 1, False) not in (key, edited)
+
+
+def test_cache_evicts_least_recently_used_entries_to_fit_the_limit(tmp_path):
+    cache = pdf.PageCache(tmp_path, max_mb=0.5)
+    pages = [{'page': 1, 'text': os.urandom(200_000).hex(), 'tables': [], 'scanned': False}]
+    for n, key in enumerate(['a', 'b']):
+        cache.put(key, pages)
+        os.utime(cache._entry_path(key), (1000 + n, 1000 + n))
+    size = cache._entry_path('a').stat().st_size
+    assert 2 * size <= cache.max_bytes < 3 * size
+
+    assert cache.get('a') == pages  # a hit makes 'a' the most recently used
+    cache.put('c', pages)
+    assert sorted(entry.name.split('.')[0] for entry in tmp_path.glob('*.json.gz')) == ['a', 'c']
+    assert sum(entry.stat().st_size for entry in tmp_path.glob('*.json.gz')) <= cache.max_bytes
+
+
+def flip_middle_byte(data):
+    middle = len(data) // 2
+    return data[:middle] + bytes([data[middle] ^ 0xFF]) + data[middle + 1:]
+
+
+@pytest.mark.parametrize('corrupt', [
+    lambda data: data[:len(data) // 2],                           # truncated
+    lambda data: flip_middle_byte(data),
+    lambda data: b'not gzip at all',
+    lambda data: gzip.compress(b'[1, 2, 3]'),                     # wrong JSON shape
+])
+def test_corrupt_cache_entry_is_a_miss(tmp_path, corrupt):
+    cache = pdf.PageCache(tmp_path)
+    pages = [{'page': 1, 'text': 'Symbol Quantity ' * 500, 'tables': [], 'scanned': True}]
+    cache.put('key', pages)
+    entry = cache._entry_path('key')
+    entry.write_bytes(corrupt(entry.read_bytes()))
+    assert cache.get('key') is None
+    cache.put('key', pages)
+    assert cache.get('key') == pages
+
+
+STATEMENT_TEXT = ("Brokerage Statement\nAccount Number: X-1234-99 Account Name: Jane Q. Public\n"
+                  "Statement Period: 01/01/2025 to 01/31/2025\nStatement Date: 01/31/2025\n"
+                  + "Disclosures apply. " * 30)
+
+
+def whole_text_account_info(text_content):
+    full_text = ' '.join(item['text'] for item in text_content)
+    matches = {key: pattern.search(full_text) for key, pattern in pdf.ACCOUNT_INFO_PATTERNS.items()}
+    return {key: match.group(1).strip() for key, match in matches.items() if match}
+
+
+def test_account_number_split_across_a_page_break_is_found():
+    split = STATEMENT_TEXT.index('X-1234')
+    text_content = [{'page': 1, 'text': STATEMENT_TEXT[:split]},
+                    {'page': 2, 'text': STATEMENT_TEXT[split:]}]
+    info = pdf.find_account_info(text_content)
+    assert info['account_number'] == 'X-1234-99'
+    assert info['statement_date'] == '01/31/2025'
+
+
+def test_page_by_page_scan_matches_the_whole_text_scan():
+    rng = random.Random(7)
+    for _ in range(500):
+        cuts = sorted(rng.sample(range(1, len(STATEMENT_TEXT)), rng.randint(1, 5)))
+        text_content = [{'page': n, 'text': STATEMENT_TEXT[start:end]}
+                        for n, (start, end) in enumerate(zip([0] + cuts, cuts + [None]), 1)]
+        assert pdf.find_account_info(text_content) == whole_text_account_info(text_content)
@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from lookthrough import FundMatrix, load_constituents
+
+
+def write_json(tmp_path, data):
+    path = tmp_path / 'constituents.json'
+    path.write_text(json.dumps(data))
+    return path
+
+
+@pytest.mark.parametrize('data, message', [
+    ([{'fund': 'VTI'}], 'expected a JSON object of funds, got list'),
+    ({'VTI': [['AAPL', 6.1]]}, 'weights for VTI must be an object'),
+    ({'VTI': {'AAPL': None}}, 'weight of AAPL in VTI must be a number'),
+    ({'units': 'basis points', 'funds': {}}, "units must be 'percent' or 'fraction'"),
+])
+def test_malformed_json_is_a_value_error_naming_the_file(tmp_path, data, message):
+    path = write_json(tmp_path, data)
+    with pytest.raises(ValueError, match=message) as error:
+        load_constituents(path)
+    assert str(path) in str(error.value)
+
+
+def test_units_are_decided_once_for_the_whole_file(tmp_path):
+    # QQQ lists only its top two holdings; VTI shows the file is in percent
+    path = write_json(tmp_path, {'QQQ': {'AAPL': 0.8, 'MSFT': 0.6}, 'VTI': {'AAPL': 6.0, 'MSFT': 5.5}})
+    constituents = load_constituents(path)
+    assert constituents['QQQ'] == pytest.approx({'AAPL': 0.008, 'MSFT': 0.006})
+    assert constituents['VTI'] == pytest.approx({'AAPL': 0.06, 'MSFT': 0.055})
+
+
+def test_stated_units_override_the_guess(tmp_path):
+    top_holdings = {'QQQ': {'AAPL': 0.8, 'MSFT': 0.6}}
+    assert load_constituents(write_json(tmp_path, top_holdings))['QQQ']['AAPL'] == 0.8
+
+    wrapped = write_json(tmp_path, {'units': 'percent', 'funds': top_holdings})
+    assert load_constituents(wrapped)['QQQ']['AAPL'] == pytest.approx(0.008)
+
+    path = tmp_path / 'constituents.csv'
+    path.write_text('Fund,Symbol,Weight\nQQQ,AAPL,0.8\nQQQ,MSFT,0.6\n')
+    assert load_constituents(path)['QQQ']['AAPL'] == 0.8
+    assert load_constituents(path, 'percent')['QQQ']['AAPL'] == pytest.approx(0.008)
+
+    matrix = FundMatrix.load(path, tmp_path / 'cache', 'percent')
+    assert matrix.row_sums().tolist() == pytest.approx([0.014])
+    assert FundMatrix.load(path, tmp_path / 'cache').row_sums().tolist() == pytest.approx([1.4])
@@ -0,0 +1,54 @@
+import math
+
+from parse_csv_portfolio import (clean_numeric_column, clean_numeric_value, iter_holdings,
+                                 normalize_rows)
+
+CELLS = ['$1,234.50', '(12.5)', '($3,000)', '7%', ' 42 ', '', '-', ' - ', 'N/A', '$', '1e3',
+         'nan', '1\x1f2', '(1', '--5']
+
+HEADER_MAP = {'symbol': 0, 'quantity': 1, 'price': 2, 'value': 3}
+
+
+def same_values(a, b):
+    return len(a) == len(b) and all(
+        (x is None and y is None) or (isinstance(x, float) and isinstance(y, float)
+                                      and (x == y or math.isnan(x) and math.isnan(y)))
+        for x, y in zip(a, b))
+
+
+def test_numeric_column_matches_per_cell_cleaning():
+    column, bad = clean_numeric_column(CELLS)
+    assert same_values(column, [clean_numeric_value(cell) for cell in CELLS])
+    assert [CELLS[i] for i in bad] == ['N/A', '$', '1\x1f2', '--5']
+
+
+def test_clean_column_takes_the_bulk_path():
+    assert clean_numeric_column(['$1,000', '(2.5)', '10%']) == ([1000.0, -2.5, 10.0], [])
+
+
+def test_blocks_match_whole_file_and_report_bad_cells_in_row_order():
+    rows = [
+        ['VTI', '10', '$250.00', 'N/A'],
+        ['Total', '', '', '$2,500'],
+        ['BND', 'x', '$70'],
+        [],
+        ['VXUS', '5', 'y', '$300'],
+        ['', '1', '2', '3'],
+    ]
+    holdings, bad_rows = normalize_rows(rows, HEADER_MAP)
+    assert holdings == [
+        {'symbol': 'VTI', 'quantity': 10.0, 'price': 250.0, 'value': None},
+        {'symbol': 'BND', 'quantity': None, 'price': 70.0},
+        {'symbol': 'VXUS', 'quantity': 5.0, 'price': None, 'value': 300.0},
+    ]
+    assert list(holdings[0]) == ['symbol', 'quantity', 'price', 'value']
+    assert bad_rows == [
+        {'row': 2, 'field': 'value', 'value': 'N/A'},
+        {'row': 4, 'field': 'quantity', 'value': 'x'},
+        {'row': 6, 'field': 'price', 'value': 'y'},
+    ]
+
+    streamed_bad = []
+    streamed = list(iter_holdings(rows, HEADER_MAP, on_bad_cell=streamed_bad.append, chunk_rows=2))
+    assert streamed == holdings
+    assert streamed_bad == bad_rows
@@ -0,0 +1,87 @@
+import json
+from datetime import date
+
+import pytest
+
+from rebalance import Rebalancer, load_targets
+from tax_loss_harvest import load_lots
+
+AS_OF = date(2025, 6, 30)
+
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text)
+    return path
+
+
+def trades_by(result, action):
+    return [t for t in result['trades'] if t['action'] == action]
+
+
+def test_load_targets_rejects_a_json_list(tmp_path):
+    path = write(tmp_path, 'targets.json', json.dumps([{'VTI': 60}]))
+    with pytest.raises(ValueError, match='JSON object'):
+        load_targets(path)
+
+
+@pytest.mark.parametrize('text, message', [
+    ('{"VTI": null}', 'weight for VTI must be a number'),
+    ('{"VTI": {"weight": [60]}}', 'weight for VTI must be a number'),
+    ('{"VTI": true}', 'weight for VTI must be a number'),
+    ('{"VTI": "sixty"}', 'weight for VTI must be a number'),
+    ('{"VTI": NaN}', 'weight for VTI must be finite'),
+    ('{"VTI": -60}', 'weight for VTI must be finite and not negative'),
+    ('{"VTI": {"weight": 60, "band": {"pct": 5}}}', 'band for VTI must be a number'),
+    ('{"targets": {"VTI": 60}, "bands": {"VTI": Infinity}}', 'band for VTI must be finite'),
+])
+def test_load_targets_rejects_bad_weights_and_bands(tmp_path, text, message):
+    path = write(tmp_path, 'targets.json', text)
+    with pytest.raises(ValueError, match=message):
+        load_targets(path)
+
+
+def test_load_targets_reads_percent_weights_and_bands(tmp_path):
+    path = write(tmp_path, 'targets.json',
+                 json.dumps({'VTI': {'weight': 60, 'band': 5}, 'BND': 40}))
+    assert load_targets(path) == {'VTI': (0.6, 0.05), 'BND': (0.4, 0.02)}
+
+
+def test_trades_only_to_the_band_edge(tmp_path):
+    lots = load_lots(write(tmp_path, 'lots.csv',
+                           'symbol,account,account type,acquired,quantity,cost basis,price\n'
+                           'VTI,Taxable,Individual,2020-01-02,70,7000,100\n'
+                           'BND,Taxable,Individual,2020-01-02,30,3000,100\n'))
+    result = Rebalancer(lots, None, {'VTI': (0.6, 0.05), 'BND': (0.4, 0.05)},
+                        as_of=AS_OF).run()
+    # 70% VTI is 5 points above its upper band edge of 65%; sell $500, buy $500 BND
+    assert [(t['symbol'], t['amount']) for t in trades_by(result, 'sell')] == [('VTI', 500.0)]
+    assert [(t['symbol'], t['amount']) for t in trades_by(result, 'buy')] == [('BND', 500.0)]
+    after = {a['symbol']: a['after_pct'] for a in result['allocation']}
+    assert after == {'BND': 35.0, 'VTI': 65.0}
+
+
+def test_no_trades_inside_the_band(tmp_path):
+    lots = load_lots(write(tmp_path, 'lots.csv',
+                           'symbol,account,acquired,quantity,cost basis,price\n'
+                           'VTI,Taxable,2020-01-02,63,6300,100\n'
+                           'BND,Taxable,2020-01-02,37,3700,100\n'))
+    result = Rebalancer(lots, None, {'VTI': (0.6, 0.05), 'BND': (0.4, 0.05)},
+                        as_of=AS_OF).run()
+    assert result['trades'] == []
+
+
+def test_sells_sheltered_lots_before_taxable_ones(tmp_path):
+    lots = load_lots(write(tmp_path, 'lots.csv',
+                           'symbol,account,account type,acquired,quantity,cost basis,price\n'
+                           'VTI,Brokerage,Individual,2020-01-02,40,2000,100\n'
+                           'VTI,Rollover,Traditional IRA,2020-01-02,40,2000,100\n'
+                           'BND,Brokerage,Individual,2020-01-02,10,1000,100\n'
+                           'BND,Rollover,Traditional IRA,2020-01-02,10,1000,100\n'))
+    result = Rebalancer(lots, None, {'VTI': (0.6, 0.0), 'BND': (0.4, 0.0)},
+                        as_of=AS_OF).run()
+    sells = trades_by(result, 'sell')
+    assert [(t['account'], t['symbol'], t['amount']) for t in sells] == [('Rollover', 'VTI', 2000.0)]
+    assert sells[0]['realized_gain'] == 0.0
+    assert result['summary']['realized_gain_total'] == 0.0
+    assert [(t['account'], t['symbol']) for t in trades_by(result, 'buy')] == [('Rollover', 'BND')]
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from risk_metrics import (PRICES_NAME, STATE_NAME, EwmaCovariance, PricePanel, daily_returns,
+                          load_price_csv, update_panel)
+
+
+def test_long_csv_sorts_broker_dates_chronologically(tmp_path):
+    path = tmp_path / 'prices.csv'
+    path.write_text('Date,Symbol,Close\n'
+                    '12/31/2024,VTI,100\n'
+                    '01/02/2025,VTI,102\n'
+                    '11/29/2024,VTI,98\n')
+    dates, symbols, matrix = load_price_csv(path)
+    assert dates == ['2024-11-29', '2024-12-31', '2025-01-02']
+    assert symbols == ['VTI']
+    assert matrix[:, 0].tolist() == [98.0, 100.0, 102.0]
+
+
+def test_wide_csv_sorts_broker_dates_chronologically(tmp_path):
+    path = tmp_path / 'prices.csv'
+    path.write_text('Date,VTI,BND\n'
+                    '01/02/2025,102,71\n'
+                    '12/31/2024,100,70\n')
+    dates, symbols, matrix = load_price_csv(path)
+    assert dates == ['2024-12-31', '2025-01-02']
+    assert matrix.tolist() == [[100.0, 70.0], [102.0, 71.0]]
+
+
+def test_append_day_compares_dates(tmp_path):
+    dates, symbols, matrix = ['2024-12-31'], ['VTI'], [[100.0]]
+    panel = PricePanel.create(tmp_path, dates, symbols, matrix)
+    panel.append_day('01/02/2025', {'VTI': 101.0})
+    assert panel.dates == ['2024-12-31', '2025-01-02']
+    with pytest.raises(ValueError, match='not after'):
+        panel.append_day('12/31/2024', {'VTI': 99.0})
+    assert PricePanel(tmp_path).prices[:, 0].tolist() == [100.0, 101.0]
+
+
+def test_historical_window_and_ewma_carry_prices_over_the_same_gap(tmp_path):
+    dates = ['2025-01-02', '2025-01-03', '2025-01-06', '2025-01-07', '2025-01-08']
+    matrix = np.array([[100.0, 50.0], [np.nan, 51.0], [np.nan, 52.0], [110.0, np.nan],
+                       [121.0, 53.0]])
+    panel = PricePanel.create(tmp_path, dates, ['VTI', 'BND'], matrix)
+
+    state = EwmaCovariance(2)
+    returns = []
+    for row in matrix:
+        last_prices = state.last_prices
+        state.update(row)
+        if state.days:
+            returns.append(daily_returns(np.vstack([last_prices, row]))[0])
+
+    # The window starts inside the VTI gap, so its price comes from before it
+    window = panel.recent_returns(2)
+    assert window[:, 0].tolist() == pytest.approx([0.1, 0.1])
+    assert window == pytest.approx(np.array(returns[-2:]))
+    assert panel.recent_returns(10) == pytest.approx(np.array(returns))
+
+
+def test_update_rerun_after_a_crash_does_not_fold_the_day_in_twice(tmp_path, monkeypatch):
+    matrix = [[100.0], [101.0]]
+    panel = PricePanel.create(tmp_path, ['2024-12-30', '2024-12-31'], ['VTI'], matrix)
+    EwmaCovariance(1).fit(panel.prices, panel.dates).save(tmp_path / STATE_NAME)
+
+    def crash(self, day, prices):
+        raise OSError('disk full')
+
+    with monkeypatch.context() as m:
+        m.setattr(PricePanel, 'append_day', crash)
+        with pytest.raises(OSError):
+            update_panel(panel, EwmaCovariance.load(tmp_path / STATE_NAME), '01/02/2025',
+                         {'VTI': 110.0})
+    assert EwmaCovariance.load(tmp_path / STATE_NAME).as_of == '2025-01-02'
+
+    panel = PricePanel(tmp_path)
+    state = EwmaCovariance.load(tmp_path / STATE_NAME)
+    update_panel(panel, state, '01/02/2025', {'VTI': 110.0})
+    expected = EwmaCovariance(1).fit([[100.0], [101.0], [110.0]])
+    assert state.days == expected.days == 2
+    assert state.cov == pytest.approx(expected.cov)
+    assert PricePanel(tmp_path).dates[-1] == '2025-01-02'
+
+
+def test_append_day_drops_a_row_left_by_an_interrupted_append(tmp_path):
+    panel = PricePanel.create(tmp_path, ['2024-12-31'], ['VTI'], [[100.0]])
+    with open(tmp_path / PRICES_NAME, 'ab') as f:
+        np.array([999.0]).tofile(f)
+    panel.append_day('01/02/2025', {'VTI': 101.0})
+    assert PricePanel(tmp_path).prices[:, 0].tolist() == [100.0, 101.0]
+    assert (tmp_path / PRICES_NAME).stat().st_size == 16
@@ -0,0 +1,44 @@
+import pytest
+
+from snapshot_store import SnapshotStore
+
+HOLDINGS = [{'account': 'A', 'symbol': 'VTI', 'value': 1000.0, 'quantity': 4}]
+
+
+def test_append_stores_normalized_iso_dates(tmp_path):
+    store = SnapshotStore(tmp_path)
+    store.append('2025-01-30', HOLDINGS)
+    entry = store.append('20250131', HOLDINGS)
+    assert entry['date'] == '2025-01-31'
+    assert (tmp_path / '2025-01-31.npz').exists()
+    assert store.load_snapshot('20250131')['symbol'].tolist() == ['VTI']
+
+
+def test_append_orders_by_date_not_by_string(tmp_path):
+    store = SnapshotStore(tmp_path)
+    store.append('2025-01-30', HOLDINGS)
+    # "20250129" sorts after "2025-01-30" as a string but is an earlier date
+    with pytest.raises(ValueError, match='append-only'):
+        store.append('20250129', HOLDINGS)
+    with pytest.raises(ValueError, match='append-only'):
+        store.append('2025-01-30', HOLDINGS)
+    assert [s['date'] for s in SnapshotStore(tmp_path).index['snapshots']] == ['2025-01-30']
+
+
+def test_unpriced_account_is_left_out_of_the_period_not_counted_as_zero(tmp_path):
+    store = SnapshotStore(tmp_path)
+    priced = [{'account': 'A', 'symbol': 'VTI', 'value': 1000.0},
+              {'account': 'B', 'symbol': 'BND', 'value': 1000.0}]
+    store.append('2025-01-01', priced)
+    entry = store.append('2025-01-02', [{'account': 'A', 'symbol': 'VTI', 'value': 1100.0},
+                                        {'account': 'B', 'symbol': 'BND', 'value': 'N/A'}])
+    assert entry['unpriced_accounts'] == ['B']
+    assert entry['total_value'] == 1100.0
+    assert entry['period_return'] == pytest.approx(0.1)
+
+    store.append('2025-01-03', [{'account': 'A', 'symbol': 'VTI', 'value': 1100.0},
+                                {'account': 'B', 'symbol': 'BND', 'value': 1000.0}])
+    accounts = {m['account']: m for m in store.account_metrics()}
+    assert accounts['B']['twr'] == 0.0
+    assert accounts['B']['max_drawdown'] == 0.0
+    assert accounts['A']['twr'] == pytest.approx(0.1)
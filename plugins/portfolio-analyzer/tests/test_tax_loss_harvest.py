@@ -0,0 +1,68 @@
+from datetime import date
+
+import pytest
+
+from tax_loss_harvest import load_acquisitions, load_lots, scan_lots
+
+SALE_DATE = date(2025, 3, 20)
+
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text)
+    return path
+
+
+@pytest.fixture
+def vti_lot(tmp_path):
+    # 100 shares still open from a 140-share purchase; $5,000 unrealized loss
+    return load_lots(write(tmp_path, 'lots.csv',
+                           'symbol,account,account type,acquired,quantity,cost basis,price\n'
+                           'VTI,Z401-77,Individual,2025-03-01,100,30000,250\n'))
+
+
+def scan(lots, acquisitions):
+    return scan_lots(lots, acquisitions=acquisitions, sale_date=SALE_DATE)['candidates'][0]
+
+
+def test_untyped_sell_is_not_a_replacement_purchase(tmp_path, vti_lot):
+    acquisitions = load_acquisitions(write(tmp_path, 'activity.csv',
+                                           'date,symbol,quantity\n'
+                                           '2025-03-08,VTI,-40\n'))
+    assert acquisitions == []
+    candidate = scan(vti_lot, acquisitions)
+    assert not candidate['wash_sale']
+    assert candidate['disallowed_loss'] == 0.0
+
+
+def test_typed_buy_counts_whatever_its_sign(tmp_path):
+    acquisitions = load_acquisitions(write(tmp_path, 'activity.csv',
+                                           'date,symbol,quantity,type\n'
+                                           '2025-03-08,VTI,-40,Buy\n'
+                                           '2025-03-09,VTI,-40,Sell\n'))
+    assert acquisitions == [('VTI', date(2025, 3, 8).toordinal(), 40.0)]
+
+
+def test_partially_sold_lot_absorbs_its_own_purchase(tmp_path, vti_lot):
+    acquisitions = load_acquisitions(write(tmp_path, 'activity.csv',
+                                           'date,symbol,quantity,type\n'
+                                           '2025-03-01,VTI,140,Buy\n'
+                                           '2025-03-10,VTI,40,Sell\n'))
+    candidate = scan(vti_lot, acquisitions)
+    assert candidate['unrealized_loss'] == 5000.0
+    assert candidate['replacement_quantity'] == 40.0
+    assert candidate['disallowed_loss'] == 2000.0
+    assert candidate['tax_benefit'] == pytest.approx(3000.0 * candidate['tax_rate'])
+
+
+def test_lot_purchase_alone_is_not_a_wash_sale(tmp_path, vti_lot):
+    acquisitions = load_acquisitions(write(tmp_path, 'activity.csv',
+                                           'date,symbol,quantity,type\n'
+                                           '2025-03-01,VTI,100,Buy\n'))
+    candidate = scan(vti_lot, acquisitions)
+    assert not candidate['wash_sale']
+    assert candidate['replacement_quantity'] == 0.0
+
+
+def test_account_number_does_not_mark_a_lot_sheltered(vti_lot):
+    assert not vti_lot['tax_advantaged'][0]
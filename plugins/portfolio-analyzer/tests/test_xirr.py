@@ -0,0 +1,31 @@
+import pytest
+
+from xirr import is_external_flow, load_flows_csv
+
+
+@pytest.mark.parametrize('flow_type, external', [
+    ('IRA Distribution', True),
+    ('Normal Distribution', True),
+    ('Withdrawal', True),
+    ('Contribution', True),
+    (None, True),
+    ('Dividend Distribution', False),
+    ('Capital Gain Distribution', False),
+    ('Long-Term Cap Gain Distribution', False),
+    ('Reinvestment', False),
+    ('Interest', False),
+    ('Buy', False),
+])
+def test_fund_income_distributions_are_not_external_flows(flow_type, external):
+    assert is_external_flow(flow_type) is external
+
+
+def test_flows_csv_keeps_ira_distributions_and_drops_fund_distributions(tmp_path):
+    path = tmp_path / 'flows.csv'
+    path.write_text('Date,Account,Amount,Type\n'
+                    '2025-01-02,IRA,-5000,IRA Distribution\n'
+                    '2025-03-28,IRA,120.50,Dividend Distribution\n'
+                    '2025-12-15,IRA,800,Capital Gain Distribution\n'
+                    '2025-06-30,IRA,1000,Contribution\n')
+    assert [(d.isoformat(), amount) for d, _, amount in load_flows_csv(path)] == [
+        ('2025-01-02', -5000.0), ('2025-06-30', 1000.0)]
@@ -10,46 +10,55 @@ Usage:
 """
 
 import argparse
+import bisect
+import hashlib
+import heapq
 import json
+import math
 import os
 import re
 import sys
+import zlib
 from collections import defaultdict
 from pathlib import Path
 from typing import Dict, List, Set
 
+# Common stopwords to ignore
+STOPWORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+    'of', 'with', 'by', 'from', 'as', 'is', 'was', 'are', 'were', 'been',
+    'be', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would',
+    'could', 'should', 'may', 'might', 'must', 'that', 'this', 'these',
+    'those', 'it', 'its', 'they', 'their', 'them', 'we', 'our', 'you',
+    'your', 'which', 'what', 'who', 'whom', 'when', 'where', 'why', 'how'
+})
+
+PUNCTUATION_RE = re.compile(r'[^\w\s]')
+WHITESPACE_RE = re.compile(r'\s+')
+
+# Slack for floating-point rounding in the Jaccard bounds used to prune
+# candidates; the final comparison is always the exact one
+BOUND_EPSILON = 1e-9
+
 
 def normalize_text(text: str) -> str:
     """Normalize text for comparison."""
     text = text.lower()
-    text = re.sub(r'[^\w\s]', ' ', text)
-    text = re.sub(r'\s+', ' ', text).strip()
+    text = PUNCTUATION_RE.sub(' ', text)
+    text = WHITESPACE_RE.sub(' ', text).strip()
     return text
 
 
 def extract_keywords(text: str) -> Set[str]:
     """Extract keywords from text for matching."""
-    # Common stopwords to ignore
-    stopwords = {
-        'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
-        'of', 'with', 'by', 'from', 'as', 'is', 'was', 'are', 'were', 'been',
-        'be', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would',
-        'could', 'should', 'may', 'might', 'must', 'that', 'this', 'these',
-        'those', 'it', 'its', 'they', 'their', 'them', 'we', 'our', 'you',
-        'your', 'which', 'what', 'who', 'whom', 'when', 'where', 'why', 'how'
-    }
-
     normalized = normalize_text(text)
     words = normalized.split()
-    keywords = {w for w in words if len(w) > 2 and w not in stopwords}
+    keywords = {w for w in words if len(w) > 2 and w not in STOPWORDS}
     return keywords
 
 
-def calculate_similarity(text1: str, text2: str) -> float:
-    """Calculate similarity between two texts using keyword overlap."""
-    keywords1 = extract_keywords(text1)
-    keywords2 = extract_keywords(text2)
-
+def keyword_similarity(keywords1: Set[str], keywords2: Set[str]) -> float:
+    """Jaccard similarity of two keyword sets."""
     if not keywords1 or not keywords2:
         return 0.0
 
@@ -59,14 +68,80 @@ def calculate_similarity(text1: str, text2: str) -> float:
     return len(intersection) / len(union) if union else 0.0
 
 
+def calculate_similarity(text1: str, text2: str) -> float:
+    """Calculate similarity between two texts using keyword overlap."""
+    return keyword_similarity(extract_keywords(text1), extract_keywords(text2))
+
+
+def min_overlap(size: int, threshold: float) -> int:
+    """Fewest shared keywords a set of this size needs to reach the threshold."""
+    return max(math.ceil(threshold * size - BOUND_EPSILON), 1)
+
+
+class KeywordIndex:
+    """
+    Inverted index from keyword to claims, over prefix tokens only.
+
+    Keywords are ordered rarest first. A pair with Jaccard >= t shares at
+    least ceil(t * |A|) keywords, so it must share one of the first
+    |A| - ceil(t * |A|) + 1 keywords of each set (prefix filtering). Only
+    those prefix keywords are indexed, and candidates outside the size
+    window t * |A| <= |B| <= |A| / t are skipped before the exact check.
+    """
+
+    def __init__(self, keyword_sets: List[Set[str]], threshold: float):
+        self.keyword_sets = keyword_sets
+        self.threshold = threshold
+        self.sizes = [len(keywords) for keywords in keyword_sets]
+
+        frequency = defaultdict(int)
+        for keywords in keyword_sets:
+            for word in keywords:
+                frequency[word] += 1
+        rank = {word: r for r, word in enumerate(sorted(frequency, key=lambda w: (frequency[w], w)))}
+
+        self.prefixes = []
+        self.postings = defaultdict(list)
+        for i, keywords in enumerate(keyword_sets):
+            ordered = sorted(keywords, key=rank.__getitem__)
+            prefix = ordered[:len(ordered) - min_overlap(len(ordered), threshold) + 1]
+            self.prefixes.append(prefix)
+            for word in prefix:
+                self.postings[word].append(i)  # claim ids arrive in increasing order
+
+    def candidates(self, i: int) -> List[int]:
+        """Claims after i that pass the prefix and size filters, in order."""
+        size = self.sizes[i]
+        if not size:
+            return []
+        low = self.threshold * size - BOUND_EPSILON
+        high = size / self.threshold + BOUND_EPSILON
+        found = set()
+        for word in self.prefixes[i]:
+            posting = self.postings[word]
+            for j in posting[bisect.bisect_right(posting, i):]:
+                if low <= self.sizes[j] <= high:
+                    found.add(j)
+        return sorted(found)
+
+
 def cluster_claims(all_claims: List[dict], similarity_threshold: float = 0.3) -> List[dict]:
     """
     Cluster similar claims together.
 
+    Each unassigned claim, in input order, seeds a cluster and takes every
+    later unassigned claim whose keyword similarity to it reaches the
+    threshold. Keyword sets are computed once per claim and candidates come
+    from a KeywordIndex, so only pairs sharing enough keywords are compared.
+
     Returns list of claim groups with their sources.
     """
     clusters = []
     assigned = set()
+    keyword_sets = [extract_keywords(claim["text"]) for claim in all_claims]
+
+    # A non-positive threshold also matches pairs with no keywords in common
+    index = KeywordIndex(keyword_sets, similarity_threshold) if similarity_threshold > 0 else None
 
     for i, claim1 in enumerate(all_claims):
         if i in assigned:
@@ -75,18 +150,20 @@ def cluster_claims(all_claims: List[dict], similarity_threshold: float = 0.3) ->
         cluster = {
             "theme": "",
             "claims": [claim1],
-            "sources": {claim1["source_id"]},
+            "sources": set(claim_sources(claim1)),
             "categories": {claim1.get("category", "general")}
         }
 
-        for j, claim2 in enumerate(all_claims[i + 1:], start=i + 1):
+        candidates = index.candidates(i) if index else range(i + 1, len(all_claims))
+        for j in candidates:
             if j in assigned:
                 continue
 
-            similarity = calculate_similarity(claim1["text"], claim2["text"])
+            similarity = keyword_similarity(keyword_sets[i], keyword_sets[j])
             if similarity >= similarity_threshold:
+                claim2 = all_claims[j]
                 cluster["claims"].append(claim2)
-                cluster["sources"].add(claim2["source_id"])
+                cluster["sources"].update(claim_sources(claim2))
                 cluster["categories"].add(claim2.get("category", "general"))
                 assigned.add(j)
 
@@ -104,6 +181,557 @@ def cluster_claims(all_claims: List[dict], similarity_threshold: float = 0.3) ->
     return clusters
 
 
+def make_cluster(claims: List[dict]) -> dict:
+    """
+    Cluster record (theme, claims, sources, categories) for a group of claims.
+    Sources and categories are sorted, and theme ties go to the first
+    category alphabetically, so the record does not depend on hash order.
+    """
+    sources = sorted({source for claim in claims for source in claim_sources(claim)})
+    categories = sorted({claim.get("category", "general") for claim in claims})
+    theme = max(categories, key=lambda c: sum(1 for cl in claims if cl.get("category") == c))
+    return {
+        "theme": theme,
+        "claims": list(claims),
+        "sources": sources,
+        "categories": categories
+    }
+
+
+class UnionFind:
+    """Disjoint sets over 0..n-1 with path halving and union by size."""
+
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+        self.size = [1] * n
+
+    def find(self, x: int) -> int:
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, a: int, b: int) -> bool:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return False
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+        return True
+
+    def groups(self) -> List[List[int]]:
+        """Members of each set, sets ordered by their smallest member."""
+        members = defaultdict(list)
+        for x in range(len(self.parent)):
+            members[self.find(x)].append(x)
+        return sorted(members.values(), key=lambda group: group[0])
+
+
+# Near-duplicate collapse (--dedupe)
+SIMHASH_BITS = 64
+SIMHASH_MASK = (1 << SIMHASH_BITS) - 1
+DEFAULT_DEDUPE_DISTANCE = 3
+# Keyword hashes unpacked to bits per pass (64 bytes each), to bound memory
+SIMHASH_CHUNK_TOKENS = 1 << 16
+
+
+def feature_hash(word: str) -> int:
+    """Stable 64-bit hash of a keyword (Python's hash() is randomized per process)."""
+    return int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash_fingerprints(keyword_sets: List[Set[str]]) -> List[int]:
+    """
+    64-bit SimHash per keyword set: bit b is set when more than half of the
+    keywords' hashes have bit b set. Keyword sets ignore case, punctuation,
+    stopwords and word order, so rephrasings at that level hash identically.
+    Uses numpy for the bit counts when it is installed, a chunk of about
+    SIMHASH_CHUNK_TOKENS keyword hashes at a time.
+    """
+    hashes = [[feature_hash(word) for word in sorted(keywords)] for keywords in keyword_sets]
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+
+    if np is None:
+        fingerprints = []
+        for features in hashes:
+            fingerprint = 0
+            for bit in range(SIMHASH_BITS):
+                if 2 * sum((h >> bit) & 1 for h in features) > len(features):
+                    fingerprint |= 1 << bit
+            fingerprints.append(fingerprint)
+        return fingerprints
+
+    fingerprints = []
+    start = 0
+    while start < len(hashes):
+        stop, tokens = start + 1, len(hashes[start])
+        while stop < len(hashes) and tokens + len(hashes[stop]) <= SIMHASH_CHUNK_TOKENS:
+            tokens += len(hashes[stop])
+            stop += 1
+        fingerprints.extend(_simhash_chunk(np, hashes[start:stop]))
+        start = stop
+    return fingerprints
+
+
+def _simhash_chunk(np, hashes: List[List[int]]) -> List[int]:
+    """SimHash for a chunk of per-claim keyword hash lists, with uint8 bit columns."""
+    counts = np.array([len(features) for features in hashes], dtype=np.int64)
+    fingerprints = np.zeros(len(hashes), dtype="<u8")
+    nonempty = np.flatnonzero(counts)
+    if not len(nonempty):
+        return fingerprints.tolist()
+    flat = np.fromiter((h for features in hashes for h in features), dtype="<u8",
+                       count=int(counts.sum()))
+    # Bit b of each hash, least significant first: (tokens x 64) uint8
+    bits = np.unpackbits(flat.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    starts = (np.cumsum(counts) - counts)[nonempty]
+    ones = np.add.reduceat(bits, starts, axis=0, dtype=np.int64)
+    majority = 2 * ones > counts[nonempty, None]
+    fingerprints[nonempty] = np.packbits(majority, axis=1, bitorder="little").view("<u8").ravel()
+    return fingerprints.tolist()
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def near_duplicate_groups(fingerprints: List[int], max_distance: int = DEFAULT_DEDUPE_DISTANCE) -> List[List[int]]:
+    """
+    Groups of positions whose fingerprints are within max_distance bits,
+    joined transitively with union-find.
+
+    Identical fingerprints are grouped first. The distinct fingerprints are
+    then split into max_distance + 1 blocks; two fingerprints within
+    max_distance bits agree exactly on at least one block (pigeonhole), so
+    one lookup table per block finds every candidate pair without comparing
+    all pairs.
+    """
+    forest = UnionFind(len(fingerprints))
+    first_seen = {}
+    for i, fingerprint in enumerate(fingerprints):
+        if fingerprint in first_seen:
+            forest.union(first_seen[fingerprint], i)
+        else:
+            first_seen[fingerprint] = i
+
+    if max_distance > 0:
+        blocks = max_distance + 1
+        edges = [SIMHASH_BITS * k // blocks for k in range(blocks + 1)]
+        distinct = list(first_seen.items())
+        for k in range(blocks):
+            shift, width = edges[k], edges[k + 1] - edges[k]
+            table = defaultdict(list)
+            for fingerprint, i in distinct:
+                table[(fingerprint >> shift) & ((1 << width) - 1)].append((fingerprint, i))
+            for bucket in table.values():
+                for a in range(len(bucket)):
+                    for b in range(a + 1, len(bucket)):
+                        if hamming_distance(bucket[a][0], bucket[b][0]) <= max_distance:
+                            forest.union(bucket[a][1], bucket[b][1])
+
+    return forest.groups()
+
+
+def collapse_near_duplicates(all_claims: List[dict],
+                             max_distance: int = DEFAULT_DEDUPE_DISTANCE) -> List[dict]:
+    """
+    Replace each group of near-duplicate claims with one representative.
+
+    The representative is the group's first claim in canonical order (so
+    the choice does not depend on the order of the sources), with
+    "duplicates" (source_id and claim_id of every collapsed claim) and
+    "duplicate_sources" added so clustering and agreement still count every
+    source that made the claim. Claims without keywords are never collapsed.
+    """
+    keyword_sets = [extract_keywords(claim["text"]) for claim in all_claims]
+    with_keywords = [i for i, keywords in enumerate(keyword_sets) if keywords]
+    fingerprints = simhash_fingerprints([keyword_sets[i] for i in with_keywords])
+
+    rank = {i: r for r, i in enumerate(canonical_order(all_claims))}
+    representative = {}
+    for group in near_duplicate_groups(fingerprints, max_distance):
+        positions = sorted((with_keywords[k] for k in group), key=rank.__getitem__)
+        representative[positions[0]] = positions
+    collapsed = {i for positions in representative.values() for i in positions[1:]}
+
+    claims = []
+    for i, claim in enumerate(all_claims):
+        if i in collapsed:
+            continue
+        members = representative.get(i, [i])
+        if len(members) > 1:
+            claim = dict(claim)
+            duplicates = [all_claims[j] for j in members[1:]]
+            claim["duplicates"] = [{"source_id": d["source_id"], "claim_id": d.get("claim_id")}
+                                   for d in duplicates]
+            claim["duplicate_sources"] = sorted({d["source_id"] for d in duplicates})
+        claims.append(claim)
+    return claims
+
+
+def claim_sources(claim: dict) -> List[str]:
+    """Every source behind a claim, including those of collapsed near-duplicates."""
+    return [claim["source_id"]] + claim.get("duplicate_sources", [])
+
+
+# MinHash-LSH settings for --approximate
+MINHASH_PERMUTATIONS = 128  # permutations filled when only one of --bands/--rows is given
+MAX_MINHASH_PERMUTATIONS = 512  # bands x rows cap; signatures take 4 bytes each per claim
+MIN_LSH_ROWS = 3  # fewer rows per band lets through too many low-similarity pairs
+MINHASH_SEED = 1
+TARGET_RECALL = 0.95
+MAX_BUCKET_SIZE = 100  # larger LSH buckets are chained instead of fully paired
+SIGNATURE_FILTER_SD = 3.0  # candidates this many standard deviations below the threshold are dropped
+EMPTY_SIGNATURE = 2 ** 32 - 1  # signature of claims without keywords (real values are < 2**31)
+
+NUMPY_MISSING = "--approximate requires numpy. Install with: pip install numpy --break-system-packages"
+
+
+def require_numpy():
+    """Import numpy on first use so exact clustering stays standard-library only."""
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError(NUMPY_MISSING)
+    return numpy
+
+
+def lsh_recall(similarity: float, bands: int, rows: int) -> float:
+    """Probability that a pair with this Jaccard similarity shares at least one band."""
+    return 1.0 - (1.0 - similarity ** rows) ** bands
+
+
+def bands_for_recall(threshold: float, rows: int, target: float = TARGET_RECALL):
+    """Fewest bands of `rows` rows giving `target` recall at the threshold (None if none can)."""
+    hit = threshold ** rows
+    if hit >= 1.0:
+        return 1
+    if hit <= 0.0:
+        return None
+    bands = max(math.ceil(math.log(1.0 - target) / math.log(1.0 - hit)), 1)
+    while lsh_recall(threshold, bands, rows) < target:  # guard against rounding in the log
+        bands += 1
+    return bands
+
+
+def choose_lsh_bands(threshold: float, max_permutations: int = MAX_MINHASH_PERMUTATIONS) -> tuple:
+    """
+    (bands, rows) reaching TARGET_RECALL at the threshold with the fewest
+    permutations, using at least MIN_LSH_ROWS rows per band. With two rows
+    the S-curve midpoint (1/bands) ** (1/rows) sits far below the threshold
+    and most low-similarity pairs become candidates; three rows need more
+    permutations but let far fewer through. When even three rows would need
+    more than max_permutations (thresholds below about 0.25), the most rows
+    that fit are used instead.
+    """
+    best = None
+    for rows in range(1, max_permutations + 1):
+        bands = bands_for_recall(threshold, rows)
+        if bands is None or bands * rows > max_permutations:
+            break
+        best = (bands, rows)
+        if rows >= MIN_LSH_ROWS:
+            break
+    return best or (max_permutations, 1)
+
+
+def signature_cutoff(threshold: float, permutations: int) -> int:
+    """
+    Fewest matching MinHash positions a candidate pair needs before its exact
+    Jaccard is computed: SIGNATURE_FILTER_SD binomial standard deviations
+    below the count expected at the threshold.
+    """
+    expected = threshold * permutations
+    spread = math.sqrt(permutations * threshold * (1.0 - threshold))
+    return max(math.floor(expected - SIGNATURE_FILTER_SD * spread), 0)
+
+
+def signature_filter_recall(threshold: float, permutations: int, cutoff: int) -> float:
+    """Probability that a pair at the threshold has at least `cutoff` matching positions."""
+    if cutoff <= 0:
+        return 1.0
+    return sum(math.comb(permutations, k) * threshold ** k * (1.0 - threshold) ** (permutations - k)
+               for k in range(cutoff, permutations + 1))
+
+
+def minhash_signatures(keyword_sets: List[Set[str]], permutations: int):
+    """
+    (claims x permutations) uint32 MinHash signature matrix. Keywords are
+    hashed with CRC-32 (stable across runs) and each permutation is a
+    multiply-shift hash of that value to 31 bits, computed for all keywords
+    at once. Claims without keywords get EMPTY_SIGNATURE rows that match
+    nothing else.
+    """
+    np = require_numpy()
+    counts = np.array([len(keywords) for keywords in keyword_sets], dtype=np.int64)
+    tokens = np.fromiter((zlib.crc32(word.encode("utf-8")) for keywords in keyword_sets
+                          for word in keywords), dtype=np.uint64, count=int(counts.sum()))
+    rng = np.random.default_rng(MINHASH_SEED)
+    multipliers = rng.integers(1, 2 ** 63, size=permutations, dtype=np.uint64) * 2 + 1
+    offsets = rng.integers(0, 2 ** 63, size=permutations, dtype=np.uint64)
+
+    signatures = np.full((len(keyword_sets), permutations), EMPTY_SIGNATURE, dtype=np.uint32)
+    nonempty = np.flatnonzero(counts)
+    if len(tokens):
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[nonempty]
+        chunk = 16  # permutations per pass, to bound memory for large corpora
+        for k in range(0, permutations, chunk):
+            hashed = (tokens[:, None] * multipliers[None, k:k + chunk]
+                      + offsets[None, k:k + chunk]) >> np.uint64(33)
+            signatures[nonempty, k:k + chunk] = np.minimum.reduceat(hashed, starts, axis=0)
+    return signatures
+
+
+def lsh_candidate_pairs(signatures, bands: int, rows: int):
+    """
+    Candidate pairs (i < j) from banded LSH. Within each band, every pair of
+    claims whose rows hash to the same bucket is a candidate, so a pair's
+    chance of being proposed is the banding formula in lsh_recall. Buckets
+    larger than MAX_BUCKET_SIZE (usually boilerplate claims) are only
+    chained in claim order, to keep the pair count from growing with bucket
+    size squared.
+
+    Returns (pairs, oversized_buckets).
+    """
+    np = require_numpy()
+    n = len(signatures)
+    mixers = np.random.default_rng(MINHASH_SEED + 1).integers(
+        1, 2 ** 63, size=rows, dtype=np.uint64) * 2 + 1
+    valid = signatures[:, 0] != EMPTY_SIGNATURE
+    pairs = []
+    oversized = 0
+    for band in range(bands):
+        block = signatures[:, band * rows:(band + 1) * rows]
+        keys = (block.astype(np.uint64) * mixers).sum(axis=1)
+        order = np.lexsort((np.arange(n), keys))
+        order = order[valid[order]]
+        sorted_keys = keys[order]
+        same = sorted_keys[1:] == sorted_keys[:-1]
+        if not same.any():
+            continue
+        # Start and size of the bucket at every sorted position
+        starts = np.flatnonzero(np.concatenate(([True], ~same)))
+        sizes = np.diff(np.append(starts, len(order)))
+        bucket_end = np.repeat(starts + sizes, sizes)
+        capped = np.repeat(sizes > MAX_BUCKET_SIZE, sizes)
+        oversized += int((sizes > MAX_BUCKET_SIZE).sum())
+
+        chained = np.flatnonzero(capped[:-1] & same)
+        pairs.append(np.stack((order[chained], order[chained + 1]), axis=1))
+        # All pairs of the remaining buckets, one offset at a time
+        position = np.flatnonzero(~capped & (bucket_end - np.arange(len(order)) > 1))
+        offset = 1
+        while len(position):
+            pairs.append(np.stack((order[position], order[position + offset]), axis=1))
+            offset += 1
+            position = position[bucket_end[position] - position > offset]
+    if not pairs:
+        return np.zeros((0, 2), dtype=np.int64), oversized
+    pairs = np.sort(np.concatenate(pairs), axis=1)
+    codes = np.unique(pairs[:, 0].astype(np.int64) * n + pairs[:, 1])
+    return np.stack((codes // n, codes % n), axis=1), oversized
+
+
+def lsh_similarity_edges(keyword_sets: List[Set[str]], similarity_threshold: float,
+                         bands: int = None, rows: int = None) -> tuple:
+    """
+    Above-threshold edges from MinHash-LSH candidate pairs, for corpora too
+    large for the exact index. Candidates whose signatures agree in fewer
+    positions than signature_cutoff allows are dropped; the rest are checked
+    with the exact keyword Jaccard similarity. Pairs that LSH never proposes
+    are missed, and the expected recall at the threshold (banding times the
+    signature filter) is returned with the run statistics. That figure holds
+    when oversized_buckets is 0; pairs inside a chained bucket are found only
+    through their neighbours.
+
+    Returns (edges, stats).
+    """
+    if (bands is not None and bands < 1) or (rows is not None and rows < 1):
+        raise ValueError("LSH bands and rows must be at least 1")
+    threshold = min(max(similarity_threshold, 0.0), 1.0)
+    if bands is None and rows is None:
+        bands, rows = choose_lsh_bands(threshold)
+    elif rows is None:
+        rows = max(MINHASH_PERMUTATIONS // bands, 1)
+    elif bands is None:
+        bands = max(MINHASH_PERMUTATIONS // rows, 1)
+    permutations = bands * rows
+    if permutations > MAX_MINHASH_PERMUTATIONS:
+        raise ValueError(f"LSH bands x rows is {permutations}; at most {MAX_MINHASH_PERMUTATIONS} "
+                         f"MinHash permutations are supported")
+
+    np = require_numpy()
+    signatures = minhash_signatures(keyword_sets, permutations)
+    candidates, oversized = lsh_candidate_pairs(signatures, bands, rows)
+
+    cutoff = signature_cutoff(threshold, permutations)
+    if cutoff > 0 and len(candidates):
+        chunk = 1 << 16  # pairs per comparison, to bound memory
+        keep = np.concatenate([
+            (signatures[candidates[k:k + chunk, 0]] == signatures[candidates[k:k + chunk, 1]])
+            .sum(axis=1) >= cutoff
+            for k in range(0, len(candidates), chunk)])
+        checked = candidates[keep]
+    else:
+        checked = candidates
+
+    edges = []
+    for i, j in checked.tolist():
+        similarity = keyword_similarity(keyword_sets[i], keyword_sets[j])
+        if similarity >= similarity_threshold:
+            edges.append((i, j, similarity))
+
+    recall = lsh_recall(threshold, bands, rows) * signature_filter_recall(threshold, permutations, cutoff)
+    stats = {
+        "method": "minhash_lsh",
+        "bands": bands,
+        "rows": rows,
+        "expected_recall": round(recall, 4),
+        "oversized_buckets": oversized,
+        "candidate_pairs": len(candidates),
+        "signature_filtered": len(candidates) - len(checked),
+        "matched_pairs": len(edges)
+    }
+    return edges, stats
+
+
+CLUSTERING_METHODS = ("greedy", "components", "average")
+
+
+def canonical_order(all_claims: List[dict]) -> List[int]:
+    """Claim positions sorted by (source_id, claim_id, text), independent of input order."""
+    return sorted(range(len(all_claims)), key=lambda i: (
+        str(all_claims[i]["source_id"]), str(all_claims[i].get("claim_id", "")),
+        all_claims[i]["text"]))
+
+
+def similarity_edges(keyword_sets: List[Set[str]], similarity_threshold: float) -> List[tuple]:
+    """Every pair (i, j, similarity) with i < j at or above the threshold, via KeywordIndex."""
+    index = KeywordIndex(keyword_sets, similarity_threshold)
+    edges = []
+    for i in range(len(keyword_sets)):
+        for j in index.candidates(i):
+            similarity = keyword_similarity(keyword_sets[i], keyword_sets[j])
+            if similarity >= similarity_threshold:
+                edges.append((i, j, similarity))
+    return edges
+
+
+def component_groups(n: int, edges: List[tuple]) -> List[List[int]]:
+    """Connected components of the similarity graph (single linkage)."""
+    forest = UnionFind(n)
+    for i, j, _ in edges:
+        forest.union(i, j)
+    return forest.groups()
+
+
+def average_linkage_groups(n: int, edges: List[tuple], similarity_threshold: float) -> List[List[int]]:
+    """
+    Thresholded average linkage over the similarity graph.
+
+    The pair of clusters with the highest average pairwise similarity is
+    merged until no pair averages at least the threshold. This is not plain
+    average linkage: pairs without an edge (similarity below the threshold)
+    count as zero rather than their true Jaccard similarity, so the result
+    depends on the threshold used to build the graph. In exchange, only
+    clusters joined by at least one edge are ever compared and the work
+    follows the number of edges rather than n squared.
+    """
+    links = [{} for _ in range(n)]  # cluster -> {neighbour cluster: summed similarity}
+    for i, j, similarity in edges:
+        links[i][j] = similarity
+        links[j][i] = similarity
+    size = [1] * n
+    members = [[i] for i in range(n)]
+    heap = [(-similarity, i, j) for i, j, similarity in edges]
+    heapq.heapify(heap)
+
+    while heap:
+        negative, a, b = heapq.heappop(heap)
+        total = links[a].get(b)
+        # Skip entries made stale by an earlier merge
+        if total is None or total / (size[a] * size[b]) != -negative:
+            continue
+        if -negative < similarity_threshold:
+            break
+
+        keep, gone = (a, b) if len(links[a]) >= len(links[b]) else (b, a)
+        del links[keep][gone]
+        for other, summed in links[gone].items():
+            if other == keep:
+                continue
+            del links[other][gone]
+            links[keep][other] = links[keep].get(other, 0.0) + summed
+            links[other][keep] = links[keep][other]
+        links[gone] = {}
+        size[keep] += size[gone]
+        members[keep].extend(members[gone])
+        members[gone] = []
+
+        for other, summed in links[keep].items():
+            heapq.heappush(heap, (-(summed / (size[keep] * size[other])),
+                                  min(keep, other), max(keep, other)))
+
+    return sorted((sorted(group) for group in members if group), key=lambda group: group[0])
+
+
+def cluster_claims_graph(all_claims: List[dict], similarity_threshold: float = 0.3,
+                         method: str = "components", edges: List[tuple] = None) -> List[dict]:
+    """
+    Order-independent clustering from the above-threshold similarity graph.
+
+    Claims are put in canonical order first, so the same claims give the same
+    clusters however the sources were listed. "components" returns connected
+    components (union-find); "average" uses thresholded average linkage
+    (see average_linkage_groups). Clusters are
+    ordered by their first claim in canonical order.
+
+    Pass edges (over canonical positions) to reuse a graph built elsewhere,
+    e.g. from lsh_similarity_edges.
+    """
+    order = canonical_order(all_claims)
+    claims = [all_claims[i] for i in order]
+    if edges is None:
+        if similarity_threshold <= 0:
+            # Every pair qualifies, including claims with no keywords in common
+            groups = [list(range(len(claims)))] if claims else []
+            return [make_cluster([claims[i] for i in group]) for group in groups]
+        keyword_sets = [extract_keywords(claim["text"]) for claim in claims]
+        edges = similarity_edges(keyword_sets, similarity_threshold)
+
+    if method == "average":
+        groups = average_linkage_groups(len(claims), edges, similarity_threshold)
+    else:
+        groups = component_groups(len(claims), edges)
+    return [make_cluster([claims[i] for i in group]) for group in groups]
+
+
+def cluster_claims_approximate(all_claims: List[dict], similarity_threshold: float = 0.3,
+                               bands: int = None, rows: int = None,
+                               method: str = "components") -> tuple:
+    """
+    Cluster very large corpora from MinHash-LSH candidate pairs.
+
+    Only "components" is supported: thresholded average linkage counts every pair
+    LSH did not propose as zero similarity, so its clusters would depend on
+    which candidates happened to be found.
+
+    Returns (clusters, stats); see lsh_similarity_edges.
+    """
+    if method != "components":
+        raise ValueError("--approximate supports only --clustering components")
+    claims = [all_claims[i] for i in canonical_order(all_claims)]
+    keyword_sets = [extract_keywords(claim["text"]) for claim in claims]
+    edges, stats = lsh_similarity_edges(keyword_sets, similarity_threshold, bands, rows)
+    return cluster_claims_graph(claims, similarity_threshold, method, edges), stats
+
+
 def determine_agreement(cluster: dict, total_sources: int) -> str:
     """Determine level of agreement for a claim cluster."""
     source_count = len(cluster["sources"])
@@ -119,45 +747,62 @@ def determine_agreement(cluster: dict, total_sources: int) -> str:
         return "SINGLE_SOURCE"
 
 
+# Keywords that might indicate opposing views
+NEGATIVE_INDICATORS = frozenset({'not', 'no', 'never', 'decline', 'decrease', 'fall', 'drop', 'fail', 'unlikely'})
+POSITIVE_INDICATORS = frozenset({'yes', 'increase', 'growth', 'rise', 'success', 'likely', 'improve'})
+
+# Polarity bitmask bits
+NEGATIVE = 1
+POSITIVE = 2
+
+# Masks that oppose each mask: a negative hit opposes a positive one and vice versa
+OPPOSING = {mask: frozenset(other for other in range(4)
+                            if (mask & NEGATIVE and other & POSITIVE)
+                            or (mask & POSITIVE and other & NEGATIVE))
+            for mask in range(4)}
+
+
+def polarity_mask(cluster: dict) -> int:
+    """NEGATIVE / POSITIVE bits for the indicator words in a cluster's claims."""
+    mask = 0
+    for claim in cluster["claims"]:
+        words = claim["text"].lower().split()
+        if not NEGATIVE_INDICATORS.isdisjoint(words):
+            mask |= NEGATIVE
+        if not POSITIVE_INDICATORS.isdisjoint(words):
+            mask |= POSITIVE
+        if mask == NEGATIVE | POSITIVE:
+            break
+    return mask
+
+
 def detect_conflicts(clusters: List[dict]) -> List[dict]:
     """
     Detect potential conflicts between claim clusters.
 
     Looks for clusters with similar themes but potentially contradictory content.
+    Clusters are bucketed by theme and each one's polarity mask and source set
+    are computed once, so only same-theme pairs with opposing indicators are
+    examined. Pairs are reported in cluster order.
     """
     conflicts = []
     conflict_counter = 1
 
-    # Keywords that might indicate opposing views
-    negative_indicators = {'not', 'no', 'never', 'decline', 'decrease', 'fall', 'drop', 'fail', 'unlikely'}
-    positive_indicators = {'yes', 'increase', 'growth', 'rise', 'success', 'likely', 'improve'}
+    masks = [polarity_mask(cluster) for cluster in clusters]
+    source_sets = [frozenset(cluster["sources"]) for cluster in clusters]
+    themes = defaultdict(list)
+    for i, cluster in enumerate(clusters):
+        if masks[i]:
+            themes[cluster["theme"]].append(i)
 
     for i, cluster1 in enumerate(clusters):
-        for cluster2 in clusters[i + 1:]:
-            # Check if themes are similar
-            if cluster1["theme"] != cluster2["theme"]:
-                continue
-
-            # Check if different sources
-            sources1 = set(cluster1["sources"])
-            sources2 = set(cluster2["sources"])
-            if sources1 == sources2:
-                continue
-
-            # Check for potential contradiction
-            text1 = " ".join(c["text"].lower() for c in cluster1["claims"])
-            text2 = " ".join(c["text"].lower() for c in cluster2["claims"])
-
-            words1 = set(text1.split())
-            words2 = set(text2.split())
-
-            # Check if one has negative indicators and other has positive
-            has_negative1 = bool(words1 & negative_indicators)
-            has_positive1 = bool(words1 & positive_indicators)
-            has_negative2 = bool(words2 & negative_indicators)
-            has_positive2 = bool(words2 & positive_indicators)
-
-            if (has_negative1 and has_positive2) or (has_positive1 and has_negative2):
+        if not masks[i]:
+            continue
+        bucket = themes[cluster1["theme"]]
+        opposing = OPPOSING[masks[i]]
+        for j in bucket[bisect.bisect_right(bucket, i):]:
+            cluster2 = clusters[j]
+            if masks[j] in opposing and source_sets[i] != source_sets[j]:
                 conflicts.append({
                     "conflict_id": f"CNF-{conflict_counter:03d}",
                     "type": "opposing_view",
@@ -193,9 +838,15 @@ def build_alignment_matrix(clusters: List[dict], sources: List[str]) -> dict:
             if source in cluster["sources"]:
                 # Find the claim from this source
                 claim = next((c for c in cluster["claims"] if c["source_id"] == source), None)
+                claim_id = claim["claim_id"] if claim else None
+                if claim is None:
+                    # The source's claim was collapsed into a near-duplicate representative
+                    claim, claim_id = next(((c, d["claim_id"]) for c in cluster["claims"]
+                                            for d in c.get("duplicates", [])
+                                            if d["source_id"] == source), (None, None))
                 theme_data["source_coverage"][source] = {
                     "has_claim": True,
-                    "claim_id": claim["claim_id"] if claim else None,
+                    "claim_id": claim_id,
                     "summary": claim["text"][:80] + "..." if claim else None
                 }
             else:
@@ -211,6 +862,17 @@ def build_alignment_matrix(clusters: List[dict], sources: List[str]) -> dict:
     return matrix
 
 
+def positive_int(value: str) -> int:
+    """argparse type for integer options that must be at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected an integer, got '{value}'")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Align claims across multiple parsed sources"
@@ -223,6 +885,22 @@ def main():
                         help="Similarity threshold for clustering (0.0-1.0)")
     parser.add_argument("--output-format", default="json",
                         choices=["json", "text"], help="Output format")
+    parser.add_argument("--clustering", choices=CLUSTERING_METHODS,
+                        help="greedy (default): seed-based, depends on input order; components: "
+                             "connected components of the similarity graph; average: thresholded "
+                             "average linkage (pairs below the threshold count as zero "
+                             "similarity). Graph methods give the same result for any --sources order")
+    parser.add_argument("--dedupe", action="store_true",
+                        help="Collapse near-duplicate claims (SimHash) before clustering")
+    parser.add_argument("--dedupe-distance", type=int, default=DEFAULT_DEDUPE_DISTANCE,
+                        help="Max Hamming distance between 64-bit SimHash fingerprints for "
+                             f"--dedupe (default {DEFAULT_DEDUPE_DISTANCE})")
+    parser.add_argument("--approximate", action="store_true",
+                        help="MinHash-LSH candidate pairs for very large corpora (requires numpy)")
+    parser.add_argument("--bands", type=positive_int,
+                        help="LSH bands for --approximate (default: chosen from the threshold)")
+    parser.add_argument("--rows", type=positive_int,
+                        help="MinHash rows per band for --approximate")
 
     args = parser.parse_args()
 
@@ -248,8 +926,38 @@ def main():
 
     print(f"Loaded {len(all_claims)} claims from {len(source_ids)} sources")
 
+    total_claims = len(all_claims)
+    if args.dedupe:
+        all_claims = collapse_near_duplicates(all_claims, args.dedupe_distance)
+        print(f"Collapsed {total_claims - len(all_claims)} near-duplicate claims "
+              f"({len(all_claims)} remain)")
+
     # Cluster similar claims
-    clusters = cluster_claims(all_claims, args.similarity_threshold)
+    clustering = args.clustering or ("components" if args.approximate else "greedy")
+    if args.approximate and clustering != "components":
+        print("Error: --approximate needs --clustering components", file=sys.stderr)
+        sys.exit(1)
+    if clustering != "greedy":
+        # Graph clustering is order-independent; keep the source list that way too
+        source_ids.sort()
+
+    lsh_stats = None
+    if args.approximate:
+        try:
+            clusters, lsh_stats = cluster_claims_approximate(
+                all_claims, args.similarity_threshold, args.bands, args.rows, clustering)
+        except (ImportError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"MinHash-LSH: {lsh_stats['bands']} bands x {lsh_stats['rows']} rows, "
+              f"expected recall {lsh_stats['expected_recall']:.1%} at the threshold")
+        if lsh_stats["oversized_buckets"]:
+            print(f"Warning: {lsh_stats['oversized_buckets']} LSH buckets over {MAX_BUCKET_SIZE} "
+                  f"claims were chained, not fully paired; recall may be lower", file=sys.stderr)
+    elif clustering == "greedy":
+        clusters = cluster_claims(all_claims, args.similarity_threshold)
+    else:
+        clusters = cluster_claims_graph(all_claims, args.similarity_threshold, clustering)
     print(f"Identified {len(clusters)} claim clusters/themes")
 
     # Detect conflicts
@@ -263,10 +971,11 @@ def main():
     output = {
         "metadata": {
             "sources_analyzed": source_ids,
-            "total_claims": len(all_claims),
+            "total_claims": total_claims,
             "total_clusters": len(clusters),
             "total_conflicts": len(conflicts),
-            "similarity_threshold": args.similarity_threshold
+            "similarity_threshold": args.similarity_threshold,
+            "clustering": clustering
         },
         "alignment_matrix": matrix,
         "clusters": clusters,
@@ -278,6 +987,10 @@ def main():
             "single_source": sum(1 for c in clusters if determine_agreement(c, len(source_ids)) == "SINGLE_SOURCE")
         }
     }
+    if args.dedupe:
+        output["metadata"]["near_duplicates_collapsed"] = total_claims - len(all_claims)
+    if lsh_stats:
+        output["metadata"]["approximate_clustering"] = lsh_stats
 
     if args.output_format == "json":
         with open(args.output, "w", encoding="utf-8") as f:
@@ -289,7 +1002,7 @@ def main():
         print("=" * 70)
 
         print(f"\nSources: {', '.join(source_ids)}")
-        print(f"Total Claims: {len(all_claims)}")
+        print(f"Total Claims: {total_claims}")
         print(f"Claim Clusters: {len(clusters)}")
 
         print("\n--- AGREEMENT SUMMARY ---")
@@ -19,12 +19,178 @@ from datetime import datetime
 from pathlib import Path
 
 
+# Each extraction pattern is a set of trigger phrases followed by a tail. The
+# phrases are kept separately so a document is searched for them once, with
+# plain substring search on a lowercased copy, and the full pattern is only
+# tried where one of its phrases starts.
+CLAIM_PHRASES = [
+    (("research", "data", "evidence", "analysis", "study", "report"),
+     r'\s+(?:shows?|indicates?|suggests?|demonstrates?|reveals?|confirms?)\s+(.+?)(?:\.|$)'),
+    (("key finding", "main finding", "conclusion", "result"), r':\s*(.+?)(?:\.|$)'),
+    (("we found", "findings show", "results indicate"), r'\s+(.+?)(?:\.|$)'),
+]
+
+CITATION_PHRASES = (("according to", "per", "based on", "from"),
+                    r'\s+([^,\.]+(?:report|study|research|survey|analysis))')
+
+CONCLUSION_PHRASES = [
+    (("in conclusion", "to conclude", "overall", "in summary", "to summarize"),
+     r'[,:]?\s*(.+?)(?:\.|$)'),
+    (("we conclude", "this suggests", "this indicates", "this demonstrates"), r'\s+(.+?)(?:\.|$)'),
+    (("the main takeaway", "key takeaway", "bottom line"), r'[:\s]+(.+?)(?:\.|$)'),
+]
+
+RECOMMENDATION_PHRASES = [
+    (("recommend", "suggest", "advise", "should consider"), r'\s+(.+?)(?:\.|$)'),
+    (("best practice", "recommended approach"), r'[:\s]+(.+?)(?:\.|$)'),
+    (("organizations should", "companies should", "teams should"), r'\s+(.+?)(?:\.|$)'),
+]
+
+UNCERTAINTY_PHRASES = [
+    (("limitation", "caveat", "uncertainty", "unclear", "unknown"), r'[:\s]+(.+?)(?:\.|$)'),
+    (("however", "but", "although"), r'[,]?\s+(.+?)(?:\.|$)'),
+    (("more research", "further study", "additional investigation"),
+     r'\s+(?:is needed|required|necessary)\s*(.*)(?:\.|$)'),
+]
+
+
+def compile_phrase_pattern(phrases: tuple, tail: str, flags: int = re.IGNORECASE | re.MULTILINE):
+    """(phrases, compiled pattern) for a trigger-phrase alternation followed by tail."""
+    return phrases, re.compile("(?:" + "|".join(phrases) + ")" + tail, flags)
+
+
+CLAIM_PATTERNS = [compile_phrase_pattern(*p) for p in CLAIM_PHRASES]
+CITATION_PATTERN = compile_phrase_pattern(*CITATION_PHRASES, flags=re.IGNORECASE)
+CONCLUSION_PATTERNS = [compile_phrase_pattern(*p) for p in CONCLUSION_PHRASES]
+RECOMMENDATION_PATTERNS = [compile_phrase_pattern(*p) for p in RECOMMENDATION_PHRASES]
+UNCERTAINTY_PATTERNS = [compile_phrase_pattern(*p) for p in UNCERTAINTY_PHRASES]
+
+# Bullet points and numbered items
+LIST_PATTERN = re.compile(r'(?:^|\n)\s*(?:[-•*]|\d+\.)\s+(.+?)(?=\n|$)', re.MULTILINE)
+
+# Statistics/numbers, quotes, and the number runs a statistic must start at
+STAT_PATTERN = re.compile(
+    r'(?:^|\s)(\d+(?:\.\d+)?%?\s+(?:of|percent|growth|increase|decrease|decline).+?)(?:\.|$)',
+    re.IGNORECASE | re.MULTILINE
+)
+QUOTE_PATTERN = re.compile(r'"([^"]+)"')
+DIGITS_PATTERN = re.compile(r'\d+')
+
+# Characters that match an ASCII letter case-insensitively in `re` but not
+# after str.lower(); documents containing them are scanned pattern by pattern
+CASE_FOLD_EXCEPTIONS = ("\u0130", "\u0131", "\u017f", "\u212a")
+
+CLAIM_CATEGORIES = {
+    "market_analysis": ["market", "growth", "revenue", "sales", "demand", "industry"],
+    "risk_assessment": ["risk", "threat", "vulnerability", "danger", "concern"],
+    "opportunity": ["opportunity", "potential", "advantage", "benefit"],
+    "technology": ["technology", "tech", "software", "hardware", "ai", "machine learning"],
+    "financial": ["cost", "price", "investment", "budget", "expense", "profit"],
+    "competitive": ["competitor", "competition", "rival", "market share"],
+    "regulatory": ["regulation", "compliance", "law", "policy", "government"],
+    "operational": ["process", "operation", "efficiency", "workflow"],
+    "strategic": ["strategy", "strategic", "plan", "roadmap", "vision"],
+}
+
+HIGH_CONFIDENCE = ["clearly", "definitely", "certainly", "strongly", "significantly", "conclusively"]
+LOW_CONFIDENCE = ["possibly", "might", "may", "could", "potentially", "uncertain"]
+
+
 def generate_id(prefix: str, counter: int) -> str:
     """Generate a unique ID with prefix."""
     return f"{prefix}-{counter:03d}"
 
 
-def extract_claims(text: str, source_id: str) -> list:
+class DocumentScan:
+    """
+    Candidate match positions for every extraction pattern, found in one
+    pass over the document.
+
+    Each pattern starts with a trigger phrase, a line boundary, a number or a
+    quote, so its matches can only begin at those offsets. findall() tries the
+    pattern only there, resuming after each match exactly as re.findall does,
+    which gives the same matches without every pattern scanning the whole
+    document.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.phrase_positions = None
+        if not any(ch in text for ch in CASE_FOLD_EXCEPTIONS):
+            lowered = text.lower()
+            phrases = {phrase
+                       for patterns in (CLAIM_PATTERNS, [CITATION_PATTERN], CONCLUSION_PATTERNS,
+                                        RECOMMENDATION_PATTERNS, UNCERTAINTY_PATTERNS)
+                       for group, _ in patterns for phrase in group}
+            self.phrase_positions = {}
+            for phrase in phrases:
+                positions = []
+                i = lowered.find(phrase)
+                while i != -1:
+                    positions.append(i)
+                    i = lowered.find(phrase, i + 1)
+                self.phrase_positions[phrase] = positions
+
+        newlines = []
+        i = text.find("\n")
+        while i != -1:
+            newlines.append(i)
+            i = text.find("\n", i + 1)
+        self.line_positions = sorted({0, *newlines, *(i + 1 for i in newlines)})
+
+        stat_positions = set()
+        for m in DIGITS_PATTERN.finditer(text):
+            stat_positions.add(m.start())
+            if m.start():
+                stat_positions.add(m.start() - 1)
+        self.stat_positions = sorted(stat_positions)
+
+        quotes = []
+        i = text.find('"')
+        while i != -1:
+            quotes.append(i)
+            i = text.find('"', i + 1)
+        self.quote_positions = quotes
+
+    def candidates(self, phrases: tuple):
+        """Sorted offsets where any of the phrases starts, or None to scan everything."""
+        if self.phrase_positions is None:
+            return None
+        return sorted({i for phrase in phrases for i in self.phrase_positions[phrase]})
+
+    def findall(self, pattern, positions) -> list:
+        """pattern.findall(text) for a single-group pattern, trying only the given offsets."""
+        if positions is None:
+            return pattern.findall(self.text)
+        matches = []
+        resume = 0
+        for pos in positions:
+            if pos < resume:
+                continue
+            m = pattern.match(self.text, pos)
+            if m:
+                matches.append(m.group(1))
+                resume = m.end()
+        return matches
+
+    def phrase_matches(self, phrase_pattern) -> list:
+        phrases, pattern = phrase_pattern
+        return self.findall(pattern, self.candidates(phrases))
+
+
+def claim_record(text: str, source_id: str, counter: int) -> dict:
+    text_lower = text.lower()
+    return {
+        "claim_id": generate_id("CLM", counter),
+        "source_id": source_id,
+        "text": text,
+        "category": _category(text_lower),
+        "confidence_stated": _confidence(text_lower),
+        "evidence_refs": []
+    }
+
+
+def extract_claims(text: str, source_id: str, scan: DocumentScan = None) -> list:
     """
     Extract claims from text.
 
@@ -34,92 +200,54 @@ def extract_claims(text: str, source_id: str) -> list:
     - Bullet points with key findings
     - Sentences containing keywords like "shows", "indicates", "suggests"
     """
+    scan = scan or DocumentScan(text)
     claims = []
-    claim_counter = 1
-
-    # Patterns that indicate claims
-    claim_patterns = [
-        r'(?:research|data|evidence|analysis|study|report)\s+(?:shows?|indicates?|suggests?|demonstrates?|reveals?|confirms?)\s+(.+?)(?:\.|$)',
-        r'(?:key finding|main finding|conclusion|result):\s*(.+?)(?:\.|$)',
-        r'(?:we found|findings show|results indicate)\s+(.+?)(?:\.|$)',
-    ]
-
-    # Look for bullet points and numbered items
-    list_pattern = r'(?:^|\n)\s*(?:[-•*]|\d+\.)\s+(.+?)(?=\n|$)'
+    seen = set()
 
     # Extract from patterns
-    for pattern in claim_patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE | re.MULTILINE)
-        for match in matches:
+    for phrase_pattern in CLAIM_PATTERNS:
+        for match in scan.phrase_matches(phrase_pattern):
             match = match.strip()
             if len(match) > 20:  # Filter out very short matches
-                claims.append({
-                    "claim_id": generate_id("CLM", claim_counter),
-                    "source_id": source_id,
-                    "text": match,
-                    "category": categorize_claim(match),
-                    "confidence_stated": extract_confidence_level(match),
-                    "evidence_refs": []
-                })
-                claim_counter += 1
+                claims.append(claim_record(match, source_id, len(claims) + 1))
+                seen.add(match)
 
     # Extract from list items (often contain key claims)
-    list_matches = re.findall(list_pattern, text, re.MULTILINE)
-    for match in list_matches:
+    for match in scan.findall(LIST_PATTERN, scan.line_positions):
         match = match.strip()
-        if len(match) > 30 and not any(c['text'] == match for c in claims):
-            claims.append({
-                "claim_id": generate_id("CLM", claim_counter),
-                "source_id": source_id,
-                "text": match,
-                "category": categorize_claim(match),
-                "confidence_stated": extract_confidence_level(match),
-                "evidence_refs": []
-            })
-            claim_counter += 1
+        if len(match) > 30 and match not in seen:
+            claims.append(claim_record(match, source_id, len(claims) + 1))
+            seen.add(match)
 
     return claims
 
 
-def categorize_claim(text: str) -> str:
-    """Categorize a claim based on its content."""
-    text_lower = text.lower()
-
-    categories = {
-        "market_analysis": ["market", "growth", "revenue", "sales", "demand", "industry"],
-        "risk_assessment": ["risk", "threat", "vulnerability", "danger", "concern"],
-        "opportunity": ["opportunity", "potential", "advantage", "benefit"],
-        "technology": ["technology", "tech", "software", "hardware", "ai", "machine learning"],
-        "financial": ["cost", "price", "investment", "budget", "expense", "profit"],
-        "competitive": ["competitor", "competition", "rival", "market share"],
-        "regulatory": ["regulation", "compliance", "law", "policy", "government"],
-        "operational": ["process", "operation", "efficiency", "workflow"],
-        "strategic": ["strategy", "strategic", "plan", "roadmap", "vision"],
-    }
-
-    for category, keywords in categories.items():
+def _category(text_lower: str) -> str:
+    for category, keywords in CLAIM_CATEGORIES.items():
         if any(kw in text_lower for kw in keywords):
             return category
-
     return "general"
 
 
-def extract_confidence_level(text: str) -> str:
-    """Extract confidence level from claim text."""
-    text_lower = text.lower()
-
-    high_confidence = ["clearly", "definitely", "certainly", "strongly", "significantly", "conclusively"]
-    low_confidence = ["possibly", "might", "may", "could", "potentially", "uncertain"]
-
-    if any(word in text_lower for word in high_confidence):
+def _confidence(text_lower: str) -> str:
+    if any(word in text_lower for word in HIGH_CONFIDENCE):
         return "high"
-    elif any(word in text_lower for word in low_confidence):
+    elif any(word in text_lower for word in LOW_CONFIDENCE):
         return "low"
-
     return "medium"
 
 
-def extract_evidence(text: str, source_id: str) -> list:
+def categorize_claim(text: str) -> str:
+    """Categorize a claim based on its content."""
+    return _category(text.lower())
+
+
+def extract_confidence_level(text: str) -> str:
+    """Extract confidence level from claim text."""
+    return _confidence(text.lower())
+
+
+def extract_evidence(text: str, source_id: str, scan: DocumentScan = None) -> list:
     """
     Extract evidence items from text.
 
@@ -129,21 +257,12 @@ def extract_evidence(text: str, source_id: str) -> list:
     - Quotes
     - Data mentions
     """
+    scan = scan or DocumentScan(text)
     evidence = []
     evidence_counter = 1
 
-    # Pattern for statistics/numbers
-    stat_pattern = r'(?:^|\s)(\d+(?:\.\d+)?%?\s+(?:of|percent|growth|increase|decrease|decline).+?)(?:\.|$)'
-
-    # Pattern for citations
-    citation_pattern = r'(?:according to|per|based on|from)\s+([^,\.]+(?:report|study|research|survey|analysis))'
-
-    # Pattern for quotes
-    quote_pattern = r'"([^"]+)"'
-
     # Extract statistics
-    stat_matches = re.findall(stat_pattern, text, re.IGNORECASE | re.MULTILINE)
-    for match in stat_matches:
+    for match in scan.findall(STAT_PATTERN, scan.stat_positions):
         evidence.append({
             "evidence_id": generate_id("EVD", evidence_counter),
             "source_id": source_id,
@@ -154,8 +273,7 @@ def extract_evidence(text: str, source_id: str) -> list:
         evidence_counter += 1
 
     # Extract citations
-    citation_matches = re.findall(citation_pattern, text, re.IGNORECASE)
-    for match in citation_matches:
+    for match in scan.phrase_matches(CITATION_PATTERN):
         evidence.append({
             "evidence_id": generate_id("EVD", evidence_counter),
             "source_id": source_id,
@@ -166,8 +284,7 @@ def extract_evidence(text: str, source_id: str) -> list:
         evidence_counter += 1
 
     # Extract quotes
-    quote_matches = re.findall(quote_pattern, text)
-    for match in quote_matches:
+    for match in scan.findall(QUOTE_PATTERN, scan.quote_positions):
         if len(match) > 20:
             evidence.append({
                 "evidence_id": generate_id("EVD", evidence_counter),
@@ -181,21 +298,14 @@ def extract_evidence(text: str, source_id: str) -> list:
     return evidence
 
 
-def extract_conclusions(text: str, source_id: str) -> list:
+def extract_conclusions(text: str, source_id: str, scan: DocumentScan = None) -> list:
     """Extract conclusions from text."""
+    scan = scan or DocumentScan(text)
     conclusions = []
     conclusion_counter = 1
 
-    # Patterns for conclusions
-    patterns = [
-        r'(?:in conclusion|to conclude|overall|in summary|to summarize)[,:]?\s*(.+?)(?:\.|$)',
-        r'(?:we conclude|this suggests|this indicates|this demonstrates)\s+(.+?)(?:\.|$)',
-        r'(?:the main takeaway|key takeaway|bottom line)[:\s]+(.+?)(?:\.|$)',
-    ]
-
-    for pattern in patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE | re.MULTILINE)
-        for match in matches:
+    for phrase_pattern in CONCLUSION_PATTERNS:
+        for match in scan.phrase_matches(phrase_pattern):
             match = match.strip()
             if len(match) > 20:
                 conclusions.append({
@@ -208,21 +318,14 @@ def extract_conclusions(text: str, source_id: str) -> list:
     return conclusions
 
 
-def extract_recommendations(text: str, source_id: str) -> list:
+def extract_recommendations(text: str, source_id: str, scan: DocumentScan = None) -> list:
     """Extract recommendations from text."""
+    scan = scan or DocumentScan(text)
     recommendations = []
     rec_counter = 1
 
-    # Patterns for recommendations
-    patterns = [
-        r'(?:recommend|suggest|advise|should consider)\s+(.+?)(?:\.|$)',
-        r'(?:best practice|recommended approach)[:\s]+(.+?)(?:\.|$)',
-        r'(?:organizations should|companies should|teams should)\s+(.+?)(?:\.|$)',
-    ]
-
-    for pattern in patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE | re.MULTILINE)
-        for match in matches:
+    for phrase_pattern in RECOMMENDATION_PATTERNS:
+        for match in scan.phrase_matches(phrase_pattern):
             match = match.strip()
             if len(match) > 15:
                 recommendations.append({
@@ -236,21 +339,14 @@ def extract_recommendations(text: str, source_id: str) -> list:
     return recommendations
 
 
-def extract_uncertainties(text: str, source_id: str) -> list:
+def extract_uncertainties(text: str, source_id: str, scan: DocumentScan = None) -> list:
     """Extract uncertainties and limitations from text."""
+    scan = scan or DocumentScan(text)
     uncertainties = []
     unc_counter = 1
 
-    # Patterns for uncertainties
-    patterns = [
-        r'(?:limitation|caveat|uncertainty|unclear|unknown)[:\s]+(.+?)(?:\.|$)',
-        r'(?:however|but|although)[,]?\s+(.+?)(?:\.|$)',
-        r'(?:more research|further study|additional investigation)\s+(?:is needed|required|necessary)\s*(.*)(?:\.|$)',
-    ]
-
-    for pattern in patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE | re.MULTILINE)
-        for match in matches:
+    for phrase_pattern in UNCERTAINTY_PATTERNS:
+        for match in scan.phrase_matches(phrase_pattern):
             match = match.strip()
             if len(match) > 15:
                 uncertainties.append({
@@ -265,6 +361,7 @@ def extract_uncertainties(text: str, source_id: str) -> list:
 
 def parse_source(content: str, source_id: str, source_type: str, source_name: str) -> dict:
     """Parse a source document and extract all structured elements."""
+    scan = DocumentScan(content)
 
     parsed = {
         "source_id": source_id,
@@ -272,11 +369,11 @@ def parse_source(content: str, source_id: str, source_type: str, source_name: st
         "source_name": source_name,
         "date_parsed": datetime.now().isoformat(),
         "extracted": {
-            "claims": extract_claims(content, source_id),
-            "evidence": extract_evidence(content, source_id),
-            "conclusions": extract_conclusions(content, source_id),
-            "recommendations": extract_recommendations(content, source_id),
-            "uncertainties": extract_uncertainties(content, source_id)
+            "claims": extract_claims(content, source_id, scan),
+            "evidence": extract_evidence(content, source_id, scan),
+            "conclusions": extract_conclusions(content, source_id, scan),
+            "recommendations": extract_recommendations(content, source_id, scan),
+            "uncertainties": extract_uncertainties(content, source_id, scan)
         },
         "statistics": {
             "total_claims": 0,
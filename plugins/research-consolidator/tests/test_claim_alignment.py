@@ -0,0 +1,239 @@
+import random
+
+import pytest
+
+import claim_alignment as ca
+
+VOCABULARY = [f'word{n}' for n in range(40)]
+CATEGORIES = ['market_analysis', 'risk_assessment', 'financial', 'general']
+
+
+def random_claims(rng, count, vocabulary=VOCABULARY):
+    claims = []
+    for n in range(count):
+        words = rng.sample(vocabulary, rng.randint(0, 8)) + rng.sample(['the', 'of', 'is'], 1)
+        claims.append({'claim_id': f'CLM-{n:03d}', 'source_id': f'SRC-{rng.randint(1, 4)}',
+                       'text': ' '.join(words), 'category': rng.choice(CATEGORIES)})
+    return claims
+
+
+def all_pairs_greedy(claims, threshold):
+    """cluster_claims as first written: every later unassigned claim is compared."""
+    keyword_sets = [ca.extract_keywords(claim['text']) for claim in claims]
+    assigned, groups = set(), []
+    for i in range(len(claims)):
+        if i in assigned:
+            continue
+        group = [i] + [j for j in range(i + 1, len(claims)) if j not in assigned
+                       and ca.keyword_similarity(keyword_sets[i], keyword_sets[j]) >= threshold]
+        assigned.update(group)
+        groups.append(group)
+    return groups
+
+
+def all_pairs_edges(keyword_sets, threshold):
+    return {(i, j) for i in range(len(keyword_sets)) for j in range(i + 1, len(keyword_sets))
+            if ca.keyword_similarity(keyword_sets[i], keyword_sets[j]) >= threshold}
+
+
+def claim_ids(clusters):
+    return [[claim['claim_id'] for claim in cluster['claims']] for cluster in clusters]
+
+
+@pytest.mark.parametrize('threshold', [0.0, 0.2, 0.3, 0.5, 2 / 3, 1.0])
+def test_prefix_filtered_clustering_matches_all_pairs(threshold):
+    rng = random.Random(45)
+    for _ in range(20):
+        claims = random_claims(rng, 60)
+        clusters = ca.cluster_claims(claims, threshold)
+        expected = [[claims[i]['claim_id'] for i in group] for group in all_pairs_greedy(claims, threshold)]
+        assert claim_ids(clusters) == expected
+        for cluster in clusters:
+            assert sorted(cluster['sources']) == sorted({c['source_id'] for c in cluster['claims']})
+
+        keyword_sets = [ca.extract_keywords(claim['text']) for claim in claims]
+        if threshold > 0:
+            edges = ca.similarity_edges(keyword_sets, threshold)
+            assert {(i, j) for i, j, _ in edges} == all_pairs_edges(keyword_sets, threshold)
+
+
+def test_lsh_finds_above_threshold_pairs_at_the_expected_recall():
+    rng = random.Random(46)
+    vocabulary = [f'term{n}' for n in range(2000)]
+    keyword_sets = []
+    for _ in range(300):
+        base = set(rng.sample(vocabulary, 12))
+        keyword_sets.append(base)
+        for _ in range(2):
+            variant = set(base)
+            for word in rng.sample(sorted(base), rng.randint(0, 3)):
+                variant.discard(word)
+                variant.add(rng.choice(vocabulary))
+            keyword_sets.append(variant)
+    keyword_sets.append(set())
+
+    threshold = 0.5
+    edges, stats = ca.lsh_similarity_edges(keyword_sets, threshold)
+    exact = all_pairs_edges(keyword_sets, threshold)
+    found = {(i, j) for i, j, _ in edges}
+    assert stats['oversized_buckets'] == 0
+    assert found <= exact  # every reported edge is checked exactly
+    assert len(exact) > 500
+    assert len(found) / len(exact) >= stats['expected_recall'] - 0.03
+    identical = {(i, j) for i, j in exact if keyword_sets[i] == keyword_sets[j]}
+    assert identical <= found
+
+
+def test_lsh_bands_reach_the_target_recall_at_the_threshold():
+    assert ca.lsh_recall(1.0, 4, 3) == 1.0
+    assert ca.lsh_recall(0.5, 1, 3) == pytest.approx(0.125)
+    for threshold in (0.3, 0.5, 0.8):
+        bands, rows = ca.choose_lsh_bands(threshold)
+        assert rows >= ca.MIN_LSH_ROWS
+        assert bands * rows <= ca.MAX_MINHASH_PERMUTATIONS
+        assert ca.lsh_recall(threshold, bands, rows) >= ca.TARGET_RECALL
+
+
+def connected_components(n, edges):
+    neighbours = {i: set() for i in range(n)}
+    for i, j, _ in edges:
+        neighbours[i].add(j)
+        neighbours[j].add(i)
+    seen, groups = set(), []
+    for start in range(n):
+        if start in seen:
+            continue
+        stack, group = [start], set()
+        while stack:
+            node = stack.pop()
+            if node not in group:
+                group.add(node)
+                stack.extend(neighbours[node] - group)
+        seen |= group
+        groups.append(sorted(group))
+    return groups
+
+
+@pytest.mark.parametrize('method', ['components', 'average'])
+def test_graph_clustering_does_not_depend_on_input_order(method):
+    rng = random.Random(47)
+    for _ in range(20):
+        claims = random_claims(rng, 50)
+        expected = claim_ids(ca.cluster_claims_graph(claims, 0.3, method))
+        for _ in range(5):
+            shuffled = rng.sample(claims, len(claims))
+            assert claim_ids(ca.cluster_claims_graph(shuffled, 0.3, method)) == expected
+
+
+def test_union_find_groups_do_not_depend_on_edge_order():
+    rng = random.Random(47)
+    for _ in range(50):
+        n = 40
+        edges = [(i, j, 1.0) for i, j in (rng.sample(range(n), 2) for _ in range(30))]
+        expected = connected_components(n, edges)
+        for _ in range(5):
+            assert ca.component_groups(n, rng.sample(edges, len(edges))) == expected
+
+
+def test_average_linkage_does_not_depend_on_edge_order():
+    rng = random.Random(47)
+    for _ in range(50):
+        n = 30
+        pairs = {tuple(sorted(rng.sample(range(n), 2))) for _ in range(60)}
+        edges = [(i, j, rng.choice([0.3, 0.4, 0.5, 0.75, 1.0])) for i, j in sorted(pairs)]
+        expected = ca.average_linkage_groups(n, edges, 0.3)
+        for _ in range(5):
+            assert ca.average_linkage_groups(n, rng.sample(edges, len(edges)), 0.3) == expected
+        components = connected_components(n, edges)
+        # Merges follow edges, so every cluster lies inside one component
+        assert all(any(set(group) <= set(c) for c in components) for group in expected)
+
+
+def test_average_linkage_stops_below_the_threshold():
+    # 0-1 and 1-2 are similar, 0-2 is not: the triangle averages (0.9 + 0.9 + 0) / 2 < 0.5
+    edges = [(0, 1, 0.9), (1, 2, 0.9)]
+    assert ca.average_linkage_groups(3, edges, 0.5) == [[0, 1], [2]]
+    assert ca.component_groups(3, edges) == [[0, 1, 2]]
+
+
+def test_simhash_collapses_rephrasings_but_not_different_claims():
+    claims = [
+        {'claim_id': 'CLM-001', 'source_id': 'SRC-2', 'text': 'Cloud revenue growth will accelerate in Europe.'},
+        {'claim_id': 'CLM-001', 'source_id': 'SRC-1', 'text': 'In Europe, the cloud REVENUE growth will accelerate'},
+        {'claim_id': 'CLM-002', 'source_id': 'SRC-1', 'text': 'Hardware margins are shrinking across Asia'},
+        {'claim_id': 'CLM-003', 'source_id': 'SRC-3', 'text': 'The of and'},
+        {'claim_id': 'CLM-004', 'source_id': 'SRC-3', 'text': 'the and of'},
+    ]
+    collapsed = ca.collapse_near_duplicates(claims)
+    assert [(c['source_id'], c['claim_id']) for c in collapsed] == [
+        ('SRC-1', 'CLM-001'), ('SRC-1', 'CLM-002'), ('SRC-3', 'CLM-003'), ('SRC-3', 'CLM-004')]
+    assert collapsed[0]['duplicates'] == [{'source_id': 'SRC-2', 'claim_id': 'CLM-001'}]
+    assert ca.claim_sources(collapsed[0]) == ['SRC-1', 'SRC-2']
+
+
+def test_near_duplicate_groups_match_all_pairs_hamming():
+    rng = random.Random(49)
+    for max_distance in (0, 1, 3, 6):
+        fingerprints = []
+        for _ in range(60):
+            fingerprint = rng.getrandbits(64)
+            fingerprints.append(fingerprint)
+            for _ in range(rng.randint(0, 2)):
+                for bit in rng.sample(range(64), rng.randint(0, max_distance + 2)):
+                    fingerprint ^= 1 << bit
+                fingerprints.append(fingerprint)
+        edges = [(i, j, 1.0) for i in range(len(fingerprints)) for j in range(i + 1, len(fingerprints))
+                 if ca.hamming_distance(fingerprints[i], fingerprints[j]) <= max_distance]
+        assert ca.near_duplicate_groups(fingerprints, max_distance) == \
+            connected_components(len(fingerprints), edges)
+
+
+def test_simhash_fingerprints_match_without_numpy(monkeypatch):
+    rng = random.Random(49)
+    keyword_sets = [set(rng.sample(VOCABULARY, rng.randint(0, 10))) for _ in range(200)]
+    monkeypatch.setattr(ca, 'SIMHASH_CHUNK_TOKENS', 16)  # several chunks, some claims alone
+    with_numpy = ca.simhash_fingerprints(keyword_sets)
+    monkeypatch.setitem(__import__('sys').modules, 'numpy', None)
+    assert ca.simhash_fingerprints(keyword_sets) == with_numpy
+    assert with_numpy[[len(k) for k in keyword_sets].index(0)] == 0
+
+
+def all_pairs_conflicts(clusters):
+    """detect_conflicts as first written: every pair of clusters is compared."""
+    found = []
+    for i, cluster1 in enumerate(clusters):
+        for j in range(i + 1, len(clusters)):
+            cluster2 = clusters[j]
+            if cluster1['theme'] != cluster2['theme'] or set(cluster1['sources']) == set(cluster2['sources']):
+                continue
+            words1 = set(' '.join(c['text'].lower() for c in cluster1['claims']).split())
+            words2 = set(' '.join(c['text'].lower() for c in cluster2['claims']).split())
+            negative1, positive1 = bool(words1 & ca.NEGATIVE_INDICATORS), bool(words1 & ca.POSITIVE_INDICATORS)
+            negative2, positive2 = bool(words2 & ca.NEGATIVE_INDICATORS), bool(words2 & ca.POSITIVE_INDICATORS)
+            if (negative1 and positive2) or (positive1 and negative2):
+                found.append((i, j))
+    return found
+
+
+def test_polarity_conflicts_match_all_pairs():
+    rng = random.Random(48)
+    words = ['revenue', 'costs', 'will', 'Growth', 'decline', 'not', 'likely', 'rise', 'fall', 'stable']
+    for _ in range(50):
+        clusters = []
+        for _ in range(rng.randint(0, 25)):
+            claims = [{'text': ' '.join(rng.choices(words, k=rng.randint(1, 5)))}
+                      for _ in range(rng.randint(1, 3))]
+            clusters.append({'theme': rng.choice(CATEGORIES[:2]), 'claims': claims,
+                             'sources': rng.sample(['SRC-1', 'SRC-2', 'SRC-3'], rng.randint(1, 2))})
+        conflicts = ca.detect_conflicts(clusters)
+        expected = all_pairs_conflicts(clusters)
+        assert [c['conflict_id'] for c in conflicts] == [f'CNF-{n:03d}' for n in range(1, len(expected) + 1)]
+        assert [(c['cluster_1_sources'], c['cluster_2_sources']) for c in conflicts] == \
+            [(clusters[i]['sources'], clusters[j]['sources']) for i, j in expected]
+
+
+def test_polarity_mask():
+    cluster = {'claims': [{'text': 'Sales will not recover'}, {'text': 'Margins likely improve'}]}
+    assert ca.polarity_mask(cluster) == ca.NEGATIVE | ca.POSITIVE
+    assert ca.polarity_mask({'claims': [{'text': 'Nothing notable'}]}) == 0
+    assert ca.OPPOSING[ca.NEGATIVE] == {ca.POSITIVE, ca.NEGATIVE | ca.POSITIVE}
@@ -0,0 +1,63 @@
+import random
+
+import pytest
+
+import source_parser as sp
+
+PATTERNS = ([('claim', p) for p in sp.CLAIM_PATTERNS] + [('citation', sp.CITATION_PATTERN)]
+            + [('conclusion', p) for p in sp.CONCLUSION_PATTERNS]
+            + [('recommendation', p) for p in sp.RECOMMENDATION_PATTERNS]
+            + [('uncertainty', p) for p in sp.UNCERTAINTY_PATTERNS])
+
+PIECES = ['shows', 'suggests', 'is needed', 'market', 'report', 'survey', 'adoption', 'costs',
+          ': ', ', ', '. ', ' ', ' ', '\n', '\n- ', '\n1. ', '  * ', '42', '3.5%', ' of ', ' percent ',
+          'growth', '"', 'quoted words here', '• ']
+
+
+def random_document(rng, extra=()):
+    phrases = [phrase for _, (group, _) in PATTERNS for phrase in group]
+    pieces = PIECES + list(extra)
+    parts = []
+    for _ in range(rng.randint(0, 80)):
+        piece = rng.choice(phrases) if rng.random() < 0.3 else rng.choice(pieces)
+        parts.append(''.join(ch.upper() if rng.random() < 0.2 else ch for ch in piece))
+    return ''.join(parts)
+
+
+def assert_scan_matches_findall(text):
+    scan = sp.DocumentScan(text)
+    for name, (phrases, pattern) in PATTERNS:
+        assert scan.findall(pattern, scan.candidates(phrases)) == pattern.findall(text), (name, text)
+    assert scan.findall(sp.LIST_PATTERN, scan.line_positions) == sp.LIST_PATTERN.findall(text)
+    assert scan.findall(sp.STAT_PATTERN, scan.stat_positions) == sp.STAT_PATTERN.findall(text)
+    assert scan.findall(sp.QUOTE_PATTERN, scan.quote_positions) == sp.QUOTE_PATTERN.findall(text)
+    return scan
+
+
+def test_document_scan_matches_re_findall():
+    rng = random.Random(50)
+    for _ in range(2000):
+        scan = assert_scan_matches_findall(random_document(rng))
+        assert scan.phrase_positions is not None
+
+
+@pytest.mark.parametrize('char', sp.CASE_FOLD_EXCEPTIONS)
+def test_document_scan_falls_back_for_case_fold_exceptions(char):
+    rng = random.Random(50)
+    for _ in range(300):
+        scan = assert_scan_matches_findall(random_document(rng, extra=[char]) + char)
+        assert scan.phrase_positions is None
+
+
+@pytest.mark.parametrize('text', [
+    'Research \u0130ndicates adoption is accelerating across teams.',
+    '\u212aey finding: adoption is accelerating across teams.',
+    'The data \u017fhows adoption is accelerating across teams.',
+    'Re\u017fults indicate adoption is accelerating across teams.',
+    'L\u0131mitation: the sample is small and mostly dated.',
+])
+def test_case_fold_characters_are_matched_like_re(text):
+    # re.IGNORECASE matches these characters to ASCII letters, str.lower() does not
+    assert any(pattern.findall(text) for _, (_, pattern) in PATTERNS)
+    assert_scan_matches_findall(text)
+    assert sp.extract_claims(text, 'SRC-001') or sp.extract_uncertainties(text, 'SRC-001')
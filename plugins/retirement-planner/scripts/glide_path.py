@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Glide Path Search
+
+Ranks parameterized stock/bond glide paths by Monte Carlo success rate and
+median ending wealth. Every candidate is scored against one shared matrix of
+market draws, so differences between candidates come from the allocation
+schedule rather than from sampling noise.
+
+A glide path holds `start equity` until the pivot age, then reduces equity by
+`slope` percentage points per year until it reaches `end equity`.
+
+Usage:
+    python glide_path.py --portfolio-value 1000000 --annual-spending 60000 --retirement-age 65
+    python glide_path.py --portfolio-value 1500000 --annual-spending 80000 --retirement-age 62 \\
+        --start-equity 60,70,80,90 --end-equity 20,30,40 --slopes 1,2,4 --pivot-ages 55,60,65,70
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+
+# Candidates scored per vectorized batch; bounds the (candidates x simulations) working set
+CANDIDATE_BATCH_SIZE = 32
+
+# Screening wealth margin, as a fraction of the starting balance
+SCREEN_WEALTH_MARGIN = 0.05
+
+# Draw matrices shared with worker processes (set once per worker by _init_worker)
+_DRAWS = None
+
+
+def parse_percent_list(value):
+    """Parse a comma-separated list of numbers (e.g. '60,70,80')."""
+    try:
+        return [float(v) for v in value.split(',') if v.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected comma-separated numbers, got: {value}")
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Glide Path Search (Monte Carlo)')
+    parser.add_argument('--portfolio-value', type=float, required=True,
+                        help='Current portfolio value')
+    parser.add_argument('--annual-spending', type=float, required=True,
+                        help='Annual retirement spending need')
+    parser.add_argument('--retirement-age', type=int, required=True,
+                        help='Retirement age')
+    parser.add_argument('--current-age', type=int, default=None,
+                        help='Age at the start of the simulation (defaults to retirement age)')
+    parser.add_argument('--simulations', type=int, default=10000,
+                        help='Number of Monte Carlo simulations')
+    parser.add_argument('--years', type=int, default=40,
+                        help='Years to simulate (default 40)')
+    parser.add_argument('--stock-return-mean', type=float, default=9.0,
+                        help='Expected annual stock return (percent)')
+    parser.add_argument('--stock-return-std', type=float, default=17.0,
+                        help='Stock return standard deviation (percent)')
+    parser.add_argument('--bond-return-mean', type=float, default=4.0,
+                        help='Expected annual bond return (percent)')
+    parser.add_argument('--bond-return-std', type=float, default=6.0,
+                        help='Bond return standard deviation (percent)')
+    parser.add_argument('--stock-bond-correlation', type=float, default=0.1,
+                        help='Correlation between stock and bond returns')
+    parser.add_argument('--inflation-mean', type=float, default=2.5,
+                        help='Expected inflation rate (percent)')
+    parser.add_argument('--inflation-std', type=float, default=1.5,
+                        help='Inflation standard deviation (percent)')
+    parser.add_argument('--start-equity', type=parse_percent_list, default=[50, 60, 70, 80, 90],
+                        help='Starting equity percentages to search (default 50,60,70,80,90)')
+    parser.add_argument('--end-equity', type=parse_percent_list, default=[20, 30, 40, 50],
+                        help='Ending equity percentages to search (default 20,30,40,50)')
+    parser.add_argument('--slopes', type=parse_percent_list, default=[1, 2, 3],
+                        help='Equity reduction per year after the pivot, in points (default 1,2,3)')
+    parser.add_argument('--pivot-ages', type=parse_percent_list, default=None,
+                        help='Ages at which equity starts declining (default: retirement age -10 to +5)')
+    parser.add_argument('--screen-fraction', type=float, default=0.2,
+                        help='Fraction of simulations used to prune dominated candidates (default 0.2)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes (default: CPU count; 1 disables multiprocessing)')
+    parser.add_argument('--top', type=int, default=10,
+                        help='Number of ranked glide paths to report')
+    parser.add_argument('--seed', type=int, default=42,
+                        help='Random seed for the shared draw matrix')
+    parser.add_argument('--output', type=str, default=None,
+                        help='Output JSON file path')
+    return parser.parse_args()
+
+
+def generate_draws(args):
+    """
+    Generate the shared draw matrices (simulations x years) for stock returns,
+    bond returns and cumulative inflation, all in percent except inflation
+    which is returned as a cumulative growth factor.
+    """
+    rng = np.random.default_rng(args.seed)
+    shape = (args.simulations, args.years)
+
+    z_stock = rng.standard_normal(shape)
+    z_bond = rng.standard_normal(shape)
+    rho = args.stock_bond_correlation
+    z_bond = rho * z_stock + np.sqrt(1 - rho ** 2) * z_bond
+
+    stock_returns = args.stock_return_mean + args.stock_return_std * z_stock
+    bond_returns = args.bond_return_mean + args.bond_return_std * z_bond
+    inflation = rng.normal(args.inflation_mean, args.inflation_std, shape)
+    cumulative_inflation = np.cumprod(1 + inflation / 100, axis=1)
+
+    return stock_returns, bond_returns, cumulative_inflation
+
+
+def build_candidates(args):
+    """Enumerate valid (start, end, slope, pivot) combinations."""
+    start_age = args.current_age or args.retirement_age
+    pivot_ages = args.pivot_ages
+    if pivot_ages is None:
+        pivot_ages = [args.retirement_age + offset for offset in (-10, -5, 0, 5)]
+
+    candidates = []
+    for start, end, slope, pivot in itertools.product(
+            args.start_equity, args.end_equity, args.slopes, pivot_ages):
+        if end > start or slope <= 0:
+            continue
+        candidates.append({
+            'start_equity': start,
+            'end_equity': end,
+            'slope': slope,
+            'pivot_age': int(pivot)
+        })
+    if not candidates:
+        return [], np.empty((0, args.years))
+
+    ages = start_age + np.arange(args.years)
+    equity = np.empty((len(candidates), args.years))
+    for i, c in enumerate(candidates):
+        declining = c['start_equity'] - c['slope'] * np.maximum(ages - c['pivot_age'], 0)
+        equity[i] = np.maximum(declining, c['end_equity']) / 100
+
+    # Different parameters can yield the same schedule within the horizon
+    # (e.g. a late pivot never reaching the floor); score each schedule once
+    _, first = np.unique(equity, axis=0, return_index=True)
+    keep = np.sort(first)
+    return [candidates[i] for i in keep], equity[keep]
+
+
+def score_candidates(equity, portfolio, spending, stock_returns, bond_returns,
+                     cumulative_inflation):
+    """
+    Score a batch of glide paths on the given draws.
+
+    Returns (success_rate, median_final_balance) arrays, one entry per candidate.
+    Balances evolve exactly as in monte_carlo.py: apply the year's return, then
+    withdraw inflation-adjusted spending; a path that hits zero stays depleted.
+    """
+    n_candidates, years = equity.shape
+    n_sims = stock_returns.shape[0]
+
+    balance = np.full((n_candidates, n_sims), float(portfolio))
+    alive = np.ones((n_candidates, n_sims), dtype=bool)
+
+    for year in range(years):
+        w = equity[:, year:year + 1]
+        returns = w * stock_returns[:, year] + (1 - w) * bond_returns[:, year]
+        balance *= 1 + returns / 100
+        balance -= spending * cumulative_inflation[:, year]
+        alive &= balance > 0
+        balance[~alive] = 0.0
+
+    success_rate = alive.mean(axis=1) * 100
+    median_final = np.median(balance, axis=1)
+    return success_rate, median_final
+
+
+def _init_worker(draws):
+    global _DRAWS
+    _DRAWS = draws
+
+
+def _score_batch(task):
+    """Worker entry point: score one batch of candidates on the first n_sims draws."""
+    equity, portfolio, spending, n_sims = task
+    stock_returns, bond_returns, cumulative_inflation = _DRAWS
+    return score_candidates(equity, portfolio, spending, stock_returns[:n_sims],
+                            bond_returns[:n_sims], cumulative_inflation[:n_sims])
+
+
+def score_all(equity, portfolio, spending, n_sims, pool):
+    """Score every candidate row of `equity`, spreading batches across the pool."""
+    tasks = [(equity[i:i + CANDIDATE_BATCH_SIZE], portfolio, spending, n_sims)
+             for i in range(0, len(equity), CANDIDATE_BATCH_SIZE)]
+    if pool is None:
+        results = [_score_batch(task) for task in tasks]
+    else:
+        results = list(pool.map(_score_batch, tasks))
+
+    if not results:
+        return np.empty(0), np.empty(0)
+    success = np.concatenate([r[0] for r in results])
+    median = np.concatenate([r[1] for r in results])
+    return success, median
+
+
+def dominated_mask(success, median, success_margin=0.0, median_margin=0.0):
+    """
+    Flag candidates that another candidate beats on success rate or median
+    wealth by more than the given margin while matching or beating it on the
+    other. Both margins are additive (percentage points and dollars), so
+    candidates whose median wealth is zero are still compared on success.
+    """
+    better_success = success[None, :] > success[:, None] + success_margin
+    better_median = median[None, :] > median[:, None] + median_margin
+    no_worse_success = success[None, :] >= success[:, None]
+    no_worse_median = median[None, :] >= median[:, None]
+    dominated = (better_success & no_worse_median) | (better_median & no_worse_success)
+    return dominated.any(axis=1)
+
+
+def search_glide_paths(args):
+    """
+    Run the screened glide path search and return the output document.
+    Raises ValueError when the parameter grid has no valid glide path.
+    """
+    candidates, equity = build_candidates(args)
+    if not candidates:
+        raise ValueError("No valid glide paths: every combination has an end equity above "
+                         "its start equity or a non-positive slope")
+    draws = generate_draws(args)
+
+    n_screen = min(args.simulations, max(500, int(args.simulations * args.screen_fraction)))
+    # Two standard errors of a success-rate estimate at p=0.5, in percentage points
+    screen_margin = 2 * 100 * np.sqrt(0.25 / n_screen)
+
+    workers = args.workers or os.cpu_count() or 1
+    pool = None
+    if workers > 1 and len(candidates) > CANDIDATE_BATCH_SIZE:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(draws,))
+    else:
+        _init_worker(draws)
+
+    try:
+        # Stage 1: screen every candidate on a prefix of the shared draws
+        if n_screen < args.simulations:
+            screen_success, screen_median = score_all(
+                equity, args.portfolio_value, args.annual_spending, n_screen, pool)
+            pruned = dominated_mask(screen_success, screen_median,
+                                    success_margin=screen_margin,
+                                    median_margin=SCREEN_WEALTH_MARGIN * args.portfolio_value)
+        else:
+            pruned = np.zeros(len(candidates), dtype=bool)
+
+        # Too few survivors for --top: refill with the best-screened pruned candidates
+        refilled = max(0, min(args.top, len(candidates)) - int((~pruned).sum()))
+        if refilled:
+            pruned_idx = np.flatnonzero(pruned)
+            screen_order = np.lexsort((-screen_median[pruned_idx], -screen_success[pruned_idx]))
+            pruned[pruned_idx[screen_order[:refilled]]] = False
+
+        # Stage 2: full evaluation of the survivors
+        survivors = np.flatnonzero(~pruned)
+        success, median = score_all(equity[survivors], args.portfolio_value,
+                                    args.annual_spending, args.simulations, pool)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    pareto = ~dominated_mask(success, median)
+    order = np.lexsort((-median, -success))
+
+    start_age = args.current_age or args.retirement_age
+    sample_offsets = list(range(0, args.years, 5))
+    ranked = []
+    for rank, k in enumerate(order[:args.top], 1):
+        idx = survivors[k]
+        ranked.append({
+            'rank': rank,
+            **candidates[idx],
+            'success_rate': round(float(success[k]), 2),
+            'median_final_balance': round(float(median[k]), 2),
+            'pareto_optimal': bool(pareto[k]),
+            'equity_by_age': {str(start_age + o): round(float(equity[idx, o]) * 100, 1)
+                              for o in sample_offsets}
+        })
+
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'inputs': {
+            'portfolio_value': args.portfolio_value,
+            'annual_spending': args.annual_spending,
+            'retirement_age': args.retirement_age,
+            'start_age': start_age,
+            'simulations': args.simulations,
+            'years': args.years,
+            'stock_return': args.stock_return_mean,
+            'stock_volatility': args.stock_return_std,
+            'bond_return': args.bond_return_mean,
+            'bond_volatility': args.bond_return_std,
+            'stock_bond_correlation': args.stock_bond_correlation,
+            'expected_inflation': args.inflation_mean,
+            'inflation_volatility': args.inflation_std
+        },
+        'search': {
+            'candidates': len(candidates),
+            'screening_simulations': n_screen,
+            'pruned_as_dominated': int(pruned.sum()),
+            'refilled_after_pruning': refilled,
+            'fully_evaluated': len(survivors),
+            'pareto_optimal': int(pareto.sum()),
+            'workers': workers if pool is not None else 1
+        },
+        'ranked_glide_paths': ranked
+    }
+
+
+def main():
+    args = parse_arguments()
+
+    print(f"Searching glide paths with {args.simulations:,} shared simulations...")
+    print(f"Portfolio: ${args.portfolio_value:,.0f}")
+    print(f"Annual spending: ${args.annual_spending:,.0f}")
+    print(f"Stocks: {args.stock_return_mean}% ± {args.stock_return_std}%  "
+          f"Bonds: {args.bond_return_mean}% ± {args.bond_return_std}%")
+    print()
+
+    try:
+        results = search_glide_paths(args)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    search = results['search']
+    print(f"Candidates: {search['candidates']} "
+          f"(pruned {search['pruned_as_dominated']} after screening on "
+          f"{search['screening_simulations']:,} simulations)")
+    print()
+    print(f"{'Rank':<5}{'Start':>7}{'End':>6}{'Slope':>7}{'Pivot':>7}{'Success':>10}{'Median Wealth':>17}")
+    for path in results['ranked_glide_paths']:
+        print(f"{path['rank']:<5}{path['start_equity']:>6.0f}%{path['end_equity']:>5.0f}%"
+              f"{path['slope']:>7.1f}{path['pivot_age']:>7}{path['success_rate']:>9.1f}%"
+              f"  ${path['median_final_balance']:>14,.0f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to: {args.output}")
+    else:
+        print("\nFull results:")
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -9,11 +9,20 @@ Usage:
     python retirement_calculator.py --current-income 150000 --retirement-age 65
     python retirement_calculator.py --current-income 200000 --retirement-age 62 --lifestyle affluent --current-age 55
     python retirement_calculator.py --current-income 150000 --retirement-age 65 --mortgage-paid
+    python retirement_calculator.py --batch clients.csv --output needs.jsonl --workers 4
 """
 
 import argparse
+import csv
 import json
+import math
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
 
 
 REPLACEMENT_RATIOS = {
@@ -22,6 +31,28 @@ REPLACEMENT_RATIOS = {
     "affluent": 0.90
 }
 
+# Longest horizon covered by the precomputed growth-factor tables
+MAX_GROWTH_YEARS = 120
+
+# Rows handed to each worker process at a time in batch mode
+BATCH_CHUNK_SIZE = 256
+
+# Chunks in flight per worker; bounds batch-mode memory however long the input is
+BATCH_CHUNKS_PER_WORKER = 2
+
+
+@lru_cache(maxsize=None)
+def _growth_table(rate):
+    """Compound growth factors (1 + rate) ** n for n = 0..MAX_GROWTH_YEARS."""
+    return tuple((1 + rate) ** n for n in range(MAX_GROWTH_YEARS + 1))
+
+
+def growth_factor(rate, years):
+    """Return (1 + rate) ** years, using the cached per-rate table when possible."""
+    if 0 <= years <= MAX_GROWTH_YEARS:
+        return _growth_table(rate)[years]
+    return (1 + rate) ** years
+
 
 def calculate_retirement_needs(current_income, retirement_age, lifestyle,
                                 mortgage_paid=False, current_age=None,
@@ -39,16 +70,16 @@ def calculate_retirement_needs(current_income, retirement_age, lifestyle,
     if current_age and current_age < retirement_age:
         years_to_retirement = retirement_age - current_age
 
-    spending_at_retirement = base_spending * ((1 + inflation_rate) ** years_to_retirement)
+    spending_at_retirement = base_spending * growth_factor(inflation_rate, years_to_retirement)
 
     if retirement_age < 65:
         pre_medicare_years = min(65 - retirement_age, 10)
-        annual_healthcare_pre_medicare = 20000 * ((1 + healthcare_inflation) ** years_to_retirement)
-        annual_healthcare_medicare = 9000 * ((1 + healthcare_inflation) ** (years_to_retirement + pre_medicare_years))
+        annual_healthcare_pre_medicare = 20000 * growth_factor(healthcare_inflation, years_to_retirement)
+        annual_healthcare_medicare = 9000 * growth_factor(healthcare_inflation, years_to_retirement + pre_medicare_years)
     else:
         pre_medicare_years = 0
         annual_healthcare_pre_medicare = 0
-        annual_healthcare_medicare = 9000 * ((1 + healthcare_inflation) ** years_to_retirement)
+        annual_healthcare_medicare = 9000 * growth_factor(healthcare_inflation, years_to_retirement)
 
     expense_breakdown = {
         "housing": round(spending_at_retirement * 0.25, 2),
@@ -70,15 +101,12 @@ def calculate_retirement_needs(current_income, retirement_age, lifestyle,
     }
 
     spending_projections = []
-    annual = total_annual_need
-    for year in range(1, 41):
-        annual *= (1 + inflation_rate)
-        if year in [5, 10, 15, 20, 25, 30, 35, 40]:
-            spending_projections.append({
-                "year": year,
-                "age": retirement_age + year,
-                "annual_spending": round(annual, 2)
-            })
+    for year in (5, 10, 15, 20, 25, 30, 35, 40):
+        spending_projections.append({
+            "year": year,
+            "age": retirement_age + year,
+            "annual_spending": round(total_annual_need * growth_factor(inflation_rate, year), 2)
+        })
 
     return {
         "timestamp": datetime.now().isoformat(),
@@ -110,6 +138,169 @@ def calculate_retirement_needs(current_income, retirement_age, lifestyle,
     }
 
 
+def _parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'y')
+
+
+def iter_batch_rows(path):
+    """
+    Stream household rows from a CSV or JSON Lines file.
+
+    Files ending in .jsonl/.ndjson are read as one JSON object per line;
+    anything else is read as CSV with a header row. Column names are
+    normalized to snake_case (e.g. "Current Income" -> "current_income").
+
+    Yields (row_number, row, error): row_number is the line number for JSON
+    Lines and the data row number for CSV. A line that is not valid JSON or
+    not an object yields row None and an error message instead of aborting.
+    """
+    path = Path(path)
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        if path.suffix.lower() in ('.jsonl', '.ndjson'):
+            rows = _iter_json_lines(f)
+        else:
+            rows = ((n, row, None) for n, row in enumerate(csv.DictReader(f), 1))
+        for row_number, row, error in rows:
+            if row is not None:
+                row = {str(k).strip().lower().replace('-', '_').replace(' ', '_'): v
+                       for k, v in row.items()}
+            yield row_number, row, error
+
+
+def _iter_json_lines(f):
+    for line_number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, f"Expected a JSON object, got {type(row).__name__}"
+            continue
+        yield line_number, row, None
+
+
+def _finite_number(value, key):
+    """float(value), rejecting NaN and infinities with a ValueError naming the column."""
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(f"{key} must be a finite number, got {value!r}")
+    return number
+
+
+def household_from_row(row, defaults):
+    """
+    Convert one batch row into calculate_retirement_needs keyword arguments.
+    Raises ValueError for unparseable or non-finite numbers.
+    """
+    def value(key):
+        v = row.get(key)
+        return None if v is None or v == '' else v
+
+    def number(key, default=None):
+        v = value(key)
+        return _finite_number(v if v is not None else default, key)
+
+    current_age = value('current_age')
+    return {
+        "current_income": number('current_income'),
+        "retirement_age": int(number('retirement_age')),
+        "lifestyle": value('lifestyle') or defaults['lifestyle'],
+        "mortgage_paid": _parse_bool(value('mortgage_paid') or False),
+        "current_age": int(number('current_age')) if current_age is not None else None,
+        "inflation_rate": number('inflation', defaults['inflation']) / 100,
+        "healthcare_inflation": number('healthcare_inflation', defaults['healthcare_inflation']) / 100,
+    }
+
+
+def _non_finite_field(value, path=()):
+    """Dotted path of the first NaN or infinite number in a result, or None."""
+    if isinstance(value, float):
+        return None if math.isfinite(value) else '.'.join(path)
+    if isinstance(value, dict):
+        items = value.items()
+    elif isinstance(value, (list, tuple)):
+        items = enumerate(value)
+    else:
+        return None
+    for key, item in items:
+        found = _non_finite_field(item, path + (str(key),))
+        if found is not None:
+            return found
+    return None
+
+
+def _process_household(item):
+    """Compute one batch row; errors are reported per row instead of aborting the batch."""
+    row_number, row, error, defaults = item
+    if error is not None:
+        return {"client_id": row_number, "row": row_number, "error": error}
+    client_id = row.get('client_id') or row.get('id') or row_number
+    try:
+        result = calculate_retirement_needs(**household_from_row(row, defaults))
+    except (TypeError, ValueError, OverflowError) as e:
+        return {"client_id": client_id, "row": row_number, "error": str(e)}
+    # Finite but very large inputs can overflow to inf without raising
+    field = _non_finite_field(result)
+    if field is not None:
+        return {"client_id": client_id, "row": row_number,
+                "error": f"{field} is not a finite number (inputs too large)"}
+    return {"client_id": client_id, **result}
+
+
+def _process_chunk(chunk):
+    return [_process_household(item) for item in chunk]
+
+
+def process_households(items, workers=1):
+    """
+    Lazily compute batch items (row_number, row, error, defaults), yielding
+    results in input order.
+
+    With workers > 1, items are read in chunks of BATCH_CHUNK_SIZE and at most
+    BATCH_CHUNKS_PER_WORKER chunks per worker are in flight at once, so only
+    that window of rows and results is ever held in memory. A new chunk is
+    submitted each time the oldest one is collected.
+    """
+    if workers <= 1:
+        yield from map(_process_household, items)
+        return
+
+    items = iter(items)
+    chunks = iter(lambda: list(islice(items, BATCH_CHUNK_SIZE)), [])
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque(pool.submit(_process_chunk, chunk)
+                        for chunk in islice(chunks, BATCH_CHUNKS_PER_WORKER * workers))
+        while pending:
+            results = pending.popleft().result()
+            chunk = next(chunks, None)
+            if chunk is not None:
+                pending.append(pool.submit(_process_chunk, chunk))
+            yield from results
+
+
+def run_batch(input_path, out, defaults, workers=1):
+    """
+    Stream households from input_path and write one JSON result per line to out.
+
+    Rows are processed lazily, so memory stays flat regardless of book size.
+    With workers > 1, chunks of rows go to a process pool through a bounded
+    window (see process_households); output order always matches input order.
+    """
+    items = ((n, row, error, defaults) for n, row, error in iter_batch_rows(input_path))
+    processed = errors = 0
+    for result in process_households(items, workers):
+        out.write(json.dumps(result, separators=(',', ':'), allow_nan=False) + '\n')
+        processed += 1
+        if 'error' in result:
+            errors += 1
+    return processed, errors
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Calculate retirement income needs',
@@ -124,12 +315,19 @@ Examples:
 
   Mortgage paid off:
     python retirement_calculator.py --current-income 150000 --retirement-age 65 --mortgage-paid
+
+  Batch mode (CSV or JSONL in, JSON Lines out):
+    python retirement_calculator.py --batch clients.csv --output needs.jsonl --workers 4
+
+  Batch columns: client_id, current_income, retirement_age, current_age, lifestyle,
+  mortgage_paid, inflation, healthcare_inflation (rates in percent; missing values
+  fall back to the command-line defaults)
         """
     )
 
-    parser.add_argument('--current-income', type=float, required=True,
+    parser.add_argument('--current-income', type=float, default=None,
                         help='Current annual gross income')
-    parser.add_argument('--retirement-age', type=int, required=True,
+    parser.add_argument('--retirement-age', type=int, default=None,
                         help='Planned retirement age')
     parser.add_argument('--current-age', type=int, default=None,
                         help='Current age (for inflation projection)')
@@ -145,9 +343,35 @@ Examples:
                         help='Output JSON file path')
     parser.add_argument('--output-format', choices=['json', 'text'], default='text',
                         help='Output format')
+    parser.add_argument('--batch', type=str, default=None,
+                        help='Process many households from a CSV or JSONL file, writing JSON Lines')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Worker processes for batch mode (default 1)')
 
     args = parser.parse_args()
 
+    if args.batch:
+        defaults = {
+            'lifestyle': args.lifestyle,
+            'inflation': args.inflation,
+            'healthcare_inflation': args.healthcare_inflation,
+        }
+        if not Path(args.batch).exists():
+            print(f"Error: Batch file not found: {args.batch}", file=sys.stderr)
+            sys.exit(1)
+        if args.output:
+            with open(args.output, 'w') as f:
+                processed, errors = run_batch(args.batch, f, defaults, args.workers)
+            print(f"Processed {processed:,} households ({errors:,} errors)")
+            print(f"Results saved to: {args.output}")
+        else:
+            processed, errors = run_batch(args.batch, sys.stdout, defaults, args.workers)
+            print(f"Processed {processed:,} households ({errors:,} errors)", file=sys.stderr)
+        return
+
+    if args.current_income is None or args.retirement_age is None:
+        parser.error('--current-income and --retirement-age are required (or use --batch)')
+
     result = calculate_retirement_needs(
         current_income=args.current_income,
         retirement_age=args.retirement_age,
@@ -3,44 +3,237 @@
 Sync Portfolio Data from Portfolio Analyzer
 
 Imports portfolio holdings and metrics from the portfolio-analyzer skill.
+
+Holdings are streamed from the source file one at a time, so very large
+multi-account exports never have to fit in memory. Asset allocation is
+derived from each holding's `asset_class`, and the sync is skipped entirely
+when the source content is unchanged since the last run.
 """
 
 import argparse
+import hashlib
 import json
-import shutil
 from pathlib import Path
 
+OUTPUT_PATH = Path('data/current_portfolio.json')
+STATE_PATH = Path('data/.sync_state.json')
+
+READ_CHUNK_SIZE = 1 << 16
+
+# Characters that can continue a JSON number
+NUMBER_CHARS = '0123456789.eE+-'
+
+# Allocation used when no holding carries a recognizable asset_class
+DEFAULT_ALLOCATION = {'stocks': 0.70, 'bonds': 0.30, 'cash': 0.0, 'other': 0.0}
+
+# Checked in order; the first bucket with a matching term wins
+ASSET_CLASS_TERMS = [
+    ('bonds', ('bond', 'fixed income', 'treasur', 'municipal', 'debt')),
+    ('cash', ('cash', 'money market', 'sweep')),
+    ('stocks', ('stock', 'equit', 'etf', 'reit')),
+]
+
 def parse_arguments():
     parser = argparse.ArgumentParser(description='Import portfolio data')
     parser.add_argument('--source', type=str, required=True,
                         help='Path to portfolio holdings.json file')
     parser.add_argument('--metrics', type=str, default=None,
                         help='Path to portfolio metrics.json file (optional)')
+    parser.add_argument('--force', action='store_true',
+                        help='Re-import even if the source is unchanged since the last sync')
     return parser.parse_args()
 
+def file_sha256(path):
+    """Hash a file in fixed-size chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class _JsonStream:
+    """Minimal incremental JSON reader over a text file."""
+
+    def __init__(self, f, chunk_size=READ_CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        if self.pos > self.chunk_size:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        self.buf += chunk
+        return True
+
+    def peek(self):
+        """Return the next non-whitespace character without consuming it ('' at EOF)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected '{char}' in holdings JSON")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value, reading more input as needed."""
+        self.peek()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.eof or not self._fill():
+                    raise
+                continue
+            # A number running up to the buffer edge may continue in the next
+            # chunk, including one cut right after its '.', 'e' or sign
+            if (not self.eof and type(obj) in (int, float)
+                    and not self.buf[end:].strip(NUMBER_CHARS) and self._fill()):
+                continue
+            self.pos = end
+            return obj
+
+    def array_items(self):
+        """Yield the items of the array starting at the current position."""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            char = self.peek()
+            self.pos += 1
+            if char == ']':
+                return
+            if char != ',':
+                raise ValueError("Malformed holdings array")
+
+def iter_holdings(path):
+    """
+    Stream holdings from either a bare JSON array or a portfolio-analyzer
+    document of the form {"holdings": [...], ...}.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        stream = _JsonStream(f, READ_CHUNK_SIZE)
+        first = stream.peek()
+        if first == '[':
+            yield from stream.array_items()
+            return
+        if first != '{':
+            raise ValueError("Holdings file must contain a JSON array or object")
+
+        stream.expect('{')
+        while stream.peek() not in ('}', ''):
+            key = stream.value()
+            stream.expect(':')
+            if key == 'holdings' and stream.peek() == '[':
+                yield from stream.array_items()
+                return
+            stream.value()  # skip other top-level fields
+            if stream.peek() == ',':
+                stream.pos += 1
+
+def classify_asset_class(label):
+    """Map a free-form asset_class label to stocks/bonds/cash/other (None if missing)."""
+    if not label:
+        return None
+    label = str(label).lower()
+    for bucket, terms in ASSET_CLASS_TERMS:
+        if any(term in label for term in terms):
+            return bucket
+    return 'other'
+
+def summarize_holdings(holdings):
+    """Single pass over holdings: totals, allocation by asset class and account count."""
+    total_value = 0.0
+    count = 0
+    bucket_values = {'stocks': 0.0, 'bonds': 0.0, 'cash': 0.0, 'other': 0.0}
+    unclassified_value = 0.0
+    accounts = set()
+
+    for holding in holdings:
+        count += 1
+        value = holding.get('value') or 0
+        total_value += value
+        if holding.get('account'):
+            accounts.add(holding['account'])
+
+        bucket = classify_asset_class(holding.get('asset_class'))
+        if bucket is None:
+            unclassified_value += value
+        else:
+            bucket_values[bucket] += value
+
+    classified_value = sum(bucket_values.values())
+    if classified_value > 0:
+        allocation = {k: round(v / classified_value, 4) for k, v in bucket_values.items()}
+        allocation_source = 'asset_class'
+    else:
+        allocation = dict(DEFAULT_ALLOCATION)
+        allocation_source = 'default_assumption'
+
+    return {
+        'total_value': total_value,
+        'asset_allocation': allocation,
+        'allocation_source': allocation_source,
+        'unclassified_value': round(unclassified_value, 2),
+        'holdings_count': count,
+        'account_count': len(accounts),
+    }
+
+def load_sync_state():
+    if STATE_PATH.exists():
+        try:
+            with open(STATE_PATH, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    return {}
+
 def import_portfolio_data(args):
     """Import and process portfolio data"""
 
-    # Read source holdings
-    with open(args.source, 'r') as f:
-        holdings = json.load(f)
+    source_hash = file_sha256(args.source)
+    metrics_hash = file_sha256(args.metrics) if args.metrics else None
+    state = {
+        'source': str(Path(args.source).resolve()),
+        'source_sha256': source_hash,
+        'metrics_sha256': metrics_hash,
+    }
 
-    # Calculate total portfolio value
-    total_value = sum(h.get('value', 0) for h in holdings)
+    if not getattr(args, 'force', False) and OUTPUT_PATH.exists() and load_sync_state() == state:
+        with open(OUTPUT_PATH, 'r') as f:
+            portfolio_data = json.load(f)
+        print("Source unchanged since last sync - skipping import.")
+        print(f"Saved data: {OUTPUT_PATH}")
+        return portfolio_data
 
-    # Determine asset allocation
-    # This is placeholder logic - actual implementation would be more sophisticated
-    stock_allocation = 0.70  # Default assumption
-    bond_allocation = 0.30
+    summary = summarize_holdings(iter_holdings(args.source))
+    total_value = summary['total_value']
+    allocation = summary['asset_allocation']
 
     portfolio_data = {
         'total_value': total_value,
-        'asset_allocation': {
-            'stocks': stock_allocation,
-            'bonds': bond_allocation
-        },
-        'holdings_count': len(holdings),
-        'imported_from': args.source
+        'asset_allocation': allocation,
+        'allocation_source': summary['allocation_source'],
+        'unclassified_value': summary['unclassified_value'],
+        'holdings_count': summary['holdings_count'],
+        'account_count': summary['account_count'],
+        'imported_from': args.source,
+        'source_sha256': source_hash
     }
 
     # If metrics provided, import additional data
@@ -52,16 +245,19 @@ def import_portfolio_data(args):
         portfolio_data['concentration'] = metrics.get('top_5_concentration', 0)
 
     # Save to data directory
-    output_path = Path('data/current_portfolio.json')
-    output_path.parent.mkdir(parents=True, exist_ok=True)
+    OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
 
-    with open(output_path, 'w') as f:
+    with open(OUTPUT_PATH, 'w') as f:
         json.dump(portfolio_data, f, indent=2)
+    with open(STATE_PATH, 'w') as f:
+        json.dump(state, f, indent=2)
 
     print(f"Portfolio data imported successfully!")
     print(f"Total value: ${total_value:,.0f}")
-    print(f"Asset allocation: {stock_allocation:.0%} stocks, {bond_allocation:.0%} bonds")
-    print(f"Saved to: {output_path}")
+    print(f"Asset allocation: {allocation['stocks']:.0%} stocks, {allocation['bonds']:.0%} bonds, "
+          f"{allocation['cash']:.0%} cash, {allocation['other']:.0%} other "
+          f"({summary['allocation_source'].replace('_', ' ')})")
+    print(f"Saved to: {OUTPUT_PATH}")
 
     return portfolio_data
 
@@ -0,0 +1,60 @@
+import sys
+
+import numpy as np
+import pytest
+
+import glide_path
+
+
+def search_args(monkeypatch, *extra):
+    monkeypatch.setattr(sys, 'argv', [
+        'glide_path.py', '--portfolio-value', '1000000', '--retirement-age', '65',
+        '--simulations', '2000', '--workers', '1', *extra])
+    return glide_path.parse_arguments()
+
+
+def test_dominated_mask_compares_success_when_medians_are_zero():
+    success = np.array([40.0, 30.0, 20.0])
+    median = np.zeros(3)
+    assert glide_path.dominated_mask(success, median, success_margin=5.0,
+                                     median_margin=50000.0).tolist() == [False, True, True]
+
+
+def test_dominated_mask_wealth_margin_is_additive():
+    success = np.array([50.0, 50.0, 50.0])
+    median = np.array([1000.0, 0.0, 990.0])
+    assert glide_path.dominated_mask(success, median,
+                                     median_margin=100.0).tolist() == [False, True, False]
+
+
+def test_dominated_mask_keeps_trade_offs():
+    success = np.array([60.0, 50.0])
+    median = np.array([1000.0, 2000.0])
+    assert not glide_path.dominated_mask(success, median).any()
+
+
+def test_search_prunes_when_median_wealth_is_zero(monkeypatch):
+    result = glide_path.search_glide_paths(search_args(monkeypatch, '--annual-spending', '60000'))
+    ranked = result['ranked_glide_paths']
+    assert all(path['median_final_balance'] == 0.0 for path in ranked)
+    assert result['search']['pruned_as_dominated'] > 0
+    assert len(ranked) == 10
+
+
+def test_screening_keeps_the_full_evaluation_top_paths(monkeypatch):
+    screened = glide_path.search_glide_paths(search_args(monkeypatch, '--annual-spending', '40000'))
+    full = glide_path.search_glide_paths(search_args(monkeypatch, '--annual-spending', '40000',
+                                                     '--screen-fraction', '1'))
+    top = [(p['start_equity'], p['end_equity'], p['slope'], p['pivot_age'])
+           for p in full['ranked_glide_paths'][:3]]
+    assert [(p['start_equity'], p['end_equity'], p['slope'], p['pivot_age'])
+            for p in screened['ranked_glide_paths'][:3]] == top
+
+
+def test_search_rejects_a_grid_with_no_valid_glide_path(monkeypatch):
+    args = search_args(monkeypatch, '--annual-spending', '40000',
+                       '--start-equity', '30', '--end-equity', '60')
+    candidates, equity = glide_path.build_candidates(args)
+    assert candidates == [] and equity.shape == (0, args.years)
+    with pytest.raises(ValueError, match='No valid glide paths'):
+        glide_path.search_glide_paths(args)
@@ -0,0 +1,81 @@
+import io
+import json
+
+import retirement_calculator as rc
+
+DEFAULTS = {'lifestyle': 'comfortable', 'inflation': 3.0, 'healthcare_inflation': 6.0}
+
+
+def households(count, pulled):
+    for n in range(1, count + 1):
+        pulled.append(n)
+        row = {'client_id': f'c{n}', 'current_income': str(50000 + n), 'retirement_age': '65'}
+        yield n, row, None, DEFAULTS
+
+
+def test_process_households_reads_a_generator_through_a_bounded_window():
+    pulled = []
+    workers = 2
+    results = rc.process_households(households(5000, pulled), workers=workers)
+    first = next(results)
+    window = rc.BATCH_CHUNKS_PER_WORKER * workers + 1
+    assert first['client_id'] == 'c1'
+    assert len(pulled) <= window * rc.BATCH_CHUNK_SIZE
+
+    rest = list(results)
+    assert [r['client_id'] for r in [first] + rest] == [f'c{n}' for n in range(1, 5001)]
+
+
+def test_process_households_matches_serial_results():
+    serial = list(rc.process_households(households(600, []), workers=1))
+    parallel = list(rc.process_households(households(600, []), workers=3))
+    for a, b in zip(serial, parallel):
+        a.pop('timestamp'), b.pop('timestamp')
+    assert serial == parallel
+
+
+def test_batch_reports_invalid_json_lines_per_row(tmp_path):
+    path = tmp_path / 'clients.jsonl'
+    path.write_text('{"client_id": "a", "current_income": 90000, "retirement_age": 65}\n'
+                    '{not json\n'
+                    '[1, 2]\n'
+                    '{"client_id": "d", "current_income": "x", "retirement_age": 65}\n')
+    out = io.StringIO()
+    assert rc.run_batch(path, out, DEFAULTS) == (4, 3)
+    rows = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert 'error' not in rows[0]
+    assert [r['row'] for r in rows[1:]] == [2, 3, 4]
+
+
+def test_batch_reports_non_finite_and_overflowing_numbers_per_row(tmp_path):
+    path = tmp_path / 'clients.csv'
+    path.write_text('client_id,current_income,retirement_age,current_age,inflation\n'
+                    'a,90000,inf,40,\n'
+                    'b,nan,65,40,\n'
+                    'c,90000,65,40,-inf\n'
+                    'd,90000,1e300,40,\n'
+                    'e,90000,65,40,\n')
+    out = io.StringIO()
+    assert rc.run_batch(path, out, DEFAULTS) == (5, 4)
+    rows = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [r['client_id'] for r in rows] == ['a', 'b', 'c', 'd', 'e']
+    assert rows[0]['error'] == "retirement_age must be a finite number, got 'inf'"
+    assert rows[1]['error'] == "current_income must be a finite number, got 'nan'"
+    assert rows[2]['error'] == "inflation must be a finite number, got '-inf'"
+    assert 'error' in rows[3]
+    assert 'error' not in rows[4]
+
+
+def test_batch_reports_results_that_overflow_to_infinity_per_row(tmp_path):
+    path = tmp_path / 'clients.csv'
+    path.write_text('client_id,current_income,retirement_age\n'
+                    'a,1e308,65\n'
+                    'b,90000,65\n')
+    out = io.StringIO()
+    assert rc.run_batch(path, out, DEFAULTS) == (2, 1)
+    lines = out.getvalue().splitlines()
+    assert 'Infinity' not in lines[0]
+    rows = [json.loads(line) for line in lines]
+    assert rows[0]['row'] == 1
+    assert rows[0]['error'].endswith('is not a finite number (inputs too large)')
+    assert 'error' not in rows[1]
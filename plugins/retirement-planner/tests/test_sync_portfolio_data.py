@@ -0,0 +1,46 @@
+import io
+import json
+
+import pytest
+
+import sync_portfolio_data as sync
+
+DOCUMENTS = [
+    '{"a": 0.1, "holdings": []}',
+    '{"total": -1.5e+10, "holdings": [{"value": 12345.678e-2}, {"value": 1E5}]}',
+    '[1, 22, 333.5, true, null, "text", -0.25]',
+]
+
+
+@pytest.mark.parametrize('document', DOCUMENTS)
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 4, 5, 8, 13])
+def test_values_split_across_chunk_boundaries(document, chunk_size):
+    stream = sync._JsonStream(io.StringIO(document), chunk_size)
+    assert stream.value() == json.loads(document)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 4, 8])
+def test_array_items_split_across_chunk_boundaries(chunk_size):
+    document = '[{"value": 0.1}, 2.5e3, -7, 100]'
+    stream = sync._JsonStream(io.StringIO(document), chunk_size)
+    assert list(stream.array_items()) == json.loads(document)
+
+
+@pytest.mark.parametrize('number', ['0.1', '-2e+5', '12.75E-3', '100'])
+@pytest.mark.parametrize('chunk_size', [1, 2, 4, 8])
+def test_numbers_cut_at_every_offset(number, chunk_size):
+    # Pad the number so every chunk boundary falls at each position inside it
+    for padding in range(chunk_size):
+        stream = sync._JsonStream(io.StringIO(' ' * padding + number + ', "next"'), chunk_size)
+        assert stream.value() == json.loads(number)
+        stream.expect(',')
+        assert stream.value() == 'next'
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 4, 8, 1 << 16])
+def test_iter_holdings_skips_numeric_fields_across_chunk_boundaries(tmp_path, monkeypatch,
+                                                                    chunk_size):
+    monkeypatch.setattr(sync, 'READ_CHUNK_SIZE', chunk_size)
+    path = tmp_path / 'portfolio.json'
+    path.write_text('{"a": 0.1, "b": -2e+5, "holdings": [{"symbol": "VTI", "value": 1.5}]}')
+    assert list(sync.iter_holdings(path)) == [{'symbol': 'VTI', 'value': 1.5}]
@@ -17,7 +17,7 @@ import csv
 import json
 import sys
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 
 # Field mapping for different brokers
@@ -72,6 +72,19 @@ BROKER_FIELD_MAPPINGS = {
     }
 }
 
+# Currency symbols and thousands separators are dropped; accounting-style
+# parentheses become a leading minus sign
+NUMBER_CLEANUP = str.maketrans({'$': None, ',': None, '(': '-', ')': None})
+
+# Joins a column into one string so it can be cleaned with a single translate call
+CELL_SEPARATOR = '\x1f'
+
+# Numeric columns of a sales export, parsed column-at-a-time
+SALE_NUMERIC_FIELDS = ["quantity", "price", "proceeds", "cost_basis", "gain_loss"]
+
+# Sale rows collected before their numeric columns are parsed
+SALE_BLOCK_ROWS = 4096
+
 # Vesting-specific field mappings
 VESTING_FIELD_MAPPINGS = {
     "morgan_stanley": {
@@ -166,8 +179,7 @@ def parse_number(value: str) -> Optional[float]:
         return None
 
     # Remove currency symbols and formatting
-    cleaned = value.strip()
-    cleaned = cleaned.replace('$', '').replace(',', '').replace('(', '-').replace(')', '')
+    cleaned = value.strip().translate(NUMBER_CLEANUP)
 
     try:
         return float(cleaned)
@@ -175,6 +187,100 @@ def parse_number(value: str) -> Optional[float]:
         return None
 
 
+def parse_number_column(values: List[Optional[str]]) -> Tuple[List[Optional[float]], List[int]]:
+    """
+    Parse a whole column of numeric strings at once.
+
+    The column is cleaned with a single str.translate call and converted with
+    one map(float), falling back to cell-by-cell conversion only when some
+    cells are empty or malformed.
+
+    Args:
+        values: Raw cell values (None or '' for missing)
+
+    Returns:
+        (column, bad) where column holds the same values parse_number gives
+        cell by cell, and bad lists the indices of non-empty cells that could
+        not be parsed
+    """
+    joined = CELL_SEPARATOR.join([v or '' for v in values])
+    parts = joined.translate(NUMBER_CLEANUP).split(CELL_SEPARATOR)
+    if len(parts) != len(values):
+        # A cell contained the separator itself; clean cell by cell instead
+        parts = [(v or '').translate(NUMBER_CLEANUP) for v in values]
+
+    try:
+        return list(map(float, parts)), []
+    except ValueError:
+        pass
+
+    column = []
+    bad = []
+    for i, cell in enumerate(parts):
+        try:
+            column.append(float(cell))
+        except ValueError:
+            column.append(None)
+            if values[i] and values[i].strip():
+                bad.append(i)
+    return column, bad
+
+
+def _convert_sale_block(candidates: List[Tuple], raw_columns: Dict[str, List[Optional[str]]],
+                        transactions: List[Dict], errors: List[Dict],
+                        cell_warnings: List[Dict]) -> None:
+    """
+    Parse the numeric columns of a block of sale rows in bulk and append the
+    resulting transactions and rejected rows, then empty the block.
+
+    Unparseable cells are read as missing, as parse_number does. A row that
+    still has its essential fields is kept and its bad cells are reported in
+    cell_warnings; errors lists rejected rows only.
+    """
+    numbers = {}
+    unparseable = {}
+    for field, raw_column in raw_columns.items():
+        numbers[field], bad = parse_number_column(raw_column)
+        for i in bad:
+            unparseable.setdefault(i, []).append(f"Unparseable {field} value: {raw_column[i]!r}")
+
+    for i, (row_num, symbol, date, txn_type, row) in enumerate(candidates):
+        transaction = {
+            "row_number": row_num,
+            "symbol": symbol,
+            "date": date,
+            "quantity": numbers["quantity"][i],
+            "price": numbers["price"][i],
+            "proceeds": numbers["proceeds"][i],
+            "cost_basis_reported": numbers["cost_basis"][i],
+            "gain_loss_reported": numbers["gain_loss"][i],
+            "transaction_type": txn_type,
+            "raw_data": row
+        }
+
+        # Validate essential fields
+        if transaction["quantity"] and (transaction["price"] or transaction["proceeds"]):
+            transactions.append(transaction)
+            if i in unparseable:
+                cell_warnings.append({
+                    "message": f"Row {row_num}: " + "; ".join(unparseable[i]) + " (read as missing)",
+                    "affected_rows": [row_num]
+                })
+        else:
+            issue = "Missing essential fields (quantity, price, or proceeds)"
+            if i in unparseable:
+                issue += ": " + "; ".join(unparseable[i])
+            errors.append({
+                "row": row_num,
+                "issue": issue,
+                "data": dict(row)
+            })
+
+    candidates.clear()
+    for raw_column in raw_columns.values():
+        raw_column.clear()
+
+
 def parse_sale_transactions(filepath: str, broker: str) -> Dict:
     """
     Parse sale transactions from broker CSV.
@@ -190,6 +296,9 @@ def parse_sale_transactions(filepath: str, broker: str) -> Dict:
 
     transactions = []
     errors = []
+    cell_warnings = []
+    candidates = []
+    raw_columns = {field: [] for field in SALE_NUMERIC_FIELDS}
 
     with open(filepath, 'r', encoding='utf-8-sig') as f:
         # Try to detect delimiter
@@ -199,16 +308,14 @@ def parse_sale_transactions(filepath: str, broker: str) -> Dict:
         dialect = csv.Sniffer().sniff(sample, delimiters=',\t;')
         reader = csv.DictReader(f, dialect=dialect)
 
+        # Select sale rows and collect their raw numeric cells; each block of
+        # SALE_BLOCK_ROWS rows is then parsed column by column
         for row_num, row in enumerate(reader, start=2):  # Start at 2 (1 for header)
             try:
                 # Extract fields using mapping
                 symbol = find_matching_field(row, mapping.get("symbol", []))
                 date = find_matching_field(row, mapping.get("date", []))
-                quantity = find_matching_field(row, mapping.get("quantity", []))
-                price = find_matching_field(row, mapping.get("price", []))
-                proceeds = find_matching_field(row, mapping.get("proceeds", []))
-                cost_basis = find_matching_field(row, mapping.get("cost_basis", []))
-                gain_loss = find_matching_field(row, mapping.get("gain_loss", []))
+                raw = [find_matching_field(row, mapping.get(field, [])) for field in SALE_NUMERIC_FIELDS]
                 txn_type = find_matching_field(row, mapping.get("transaction_type", []))
 
                 # Skip non-sale transactions
@@ -219,28 +326,9 @@ def parse_sale_transactions(filepath: str, broker: str) -> Dict:
                 if symbol and 'AMZN' not in symbol.upper() and 'AMAZON' not in symbol.upper():
                     continue
 
-                transaction = {
-                    "row_number": row_num,
-                    "symbol": symbol,
-                    "date": parse_date(date) if date else None,
-                    "quantity": parse_number(quantity),
-                    "price": parse_number(price),
-                    "proceeds": parse_number(proceeds),
-                    "cost_basis_reported": parse_number(cost_basis),
-                    "gain_loss_reported": parse_number(gain_loss),
-                    "transaction_type": txn_type,
-                    "raw_data": dict(row)
-                }
-
-                # Validate essential fields
-                if transaction["quantity"] and (transaction["price"] or transaction["proceeds"]):
-                    transactions.append(transaction)
-                else:
-                    errors.append({
-                        "row": row_num,
-                        "issue": "Missing essential fields (quantity, price, or proceeds)",
-                        "data": dict(row)
-                    })
+                candidates.append((row_num, symbol, parse_date(date) if date else None, txn_type, row))
+                for column, value in zip(raw_columns.values(), raw):
+                    column.append(value)
 
             except Exception as e:
                 errors.append({
@@ -249,6 +337,12 @@ def parse_sale_transactions(filepath: str, broker: str) -> Dict:
                     "data": dict(row)
                 })
 
+            if len(candidates) >= SALE_BLOCK_ROWS:
+                _convert_sale_block(candidates, raw_columns, transactions, errors, cell_warnings)
+
+    _convert_sale_block(candidates, raw_columns, transactions, errors, cell_warnings)
+    errors.sort(key=lambda e: e["row"])  # row-level exceptions were reported as rows were read
+
     # Calculate totals
     total_shares = sum(t["quantity"] or 0 for t in transactions)
     total_proceeds = sum(t["proceeds"] or 0 for t in transactions)
@@ -265,12 +359,12 @@ def parse_sale_transactions(filepath: str, broker: str) -> Dict:
             "total_reported_cost_basis": round(total_reported_basis, 2),
             "reported_gain_loss": round(total_proceeds - total_reported_basis, 2)
         },
-        "warnings": [
+        "warnings": ([
             {
                 "message": "Cost basis reported may be INCORRECT. Verify against vesting FMV.",
                 "affected_rows": [t["row_number"] for t in transactions if t["cost_basis_reported"] == 0]
             }
-        ] if any(t["cost_basis_reported"] == 0 for t in transactions) else [],
+        ] if any(t["cost_basis_reported"] == 0 for t in transactions) else []) + cell_warnings,
         "errors": errors
     }
 
@@ -0,0 +1,51 @@
+import parse_broker_csv
+from parse_broker_csv import parse_number, parse_number_column, parse_sale_transactions
+
+CELLS = ['$1,234.50', '(12.5)', ' ($3,000) ', '', '   ', None, 'N/A', '7%', '1\x1f2', 'nan']
+
+SALES_CSV = """Symbol,Date,Action,Quantity,Price,Amount,Cost Basis,Gain/Loss
+AMZN,01/02/2024,Sell,10,$150.00,"$1,500.00",$0.00,(12.50)
+AMZN,01/03/2024,Buy,5,$140.00,$700.00,,
+AMZN,01/04/2024,Sell,x,$151.00,$151.00,$100.00,$51.00
+MSFT,01/05/2024,Sell,1,$400.00,$400.00,,
+AMZN,01/06/2024,Sell,,,,,
+AMZN,01/07/2024,Sell,3,N/A,$450.00,bad,$0.00
+"""
+
+
+def test_number_column_matches_per_cell_parsing():
+    column, bad = parse_number_column(CELLS)
+    expected = [parse_number(cell) for cell in CELLS]
+    assert column[:-1] == expected[:-1]
+    assert column[-1] != column[-1] and expected[-1] != expected[-1]  # NaN
+    assert [CELLS[i] for i in bad] == ['N/A', '7%', '1\x1f2']
+
+
+def test_sale_rows_are_parsed_across_blocks(tmp_path, monkeypatch):
+    path = tmp_path / 'sales.csv'
+    path.write_text(SALES_CSV)
+    whole = parse_sale_transactions(str(path), 'schwab')
+    monkeypatch.setattr(parse_broker_csv, 'SALE_BLOCK_ROWS', 2)
+    assert parse_sale_transactions(str(path), 'schwab') == whole
+
+    assert [t['row_number'] for t in whole['transactions']] == [2, 7]
+    assert whole['transactions'][0]['gain_loss_reported'] == -12.5
+    assert [(e['row'], e['issue']) for e in whole['errors']] == [
+        (4, "Missing essential fields (quantity, price, or proceeds): Unparseable quantity value: 'x'"),
+        (6, 'Missing essential fields (quantity, price, or proceeds)'),
+    ]
+
+
+def test_kept_rows_report_bad_cells_as_warnings_not_errors(tmp_path):
+    path = tmp_path / 'sales.csv'
+    path.write_text(SALES_CSV)
+    result = parse_sale_transactions(str(path), 'schwab')
+
+    kept = result['transactions'][1]
+    assert (kept['row_number'], kept['price'], kept['cost_basis_reported']) == (7, None, None)
+    assert 7 not in [e['row'] for e in result['errors']]
+    assert result['warnings'][-1] == {
+        'message': "Row 7: Unparseable price value: 'N/A'; Unparseable cost_basis value: 'bad' "
+                   "(read as missing)",
+        'affected_rows': [7],
+    }